@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from app.db.database import get_db
 from app.models.application import Application
@@ -9,8 +9,43 @@ from app.services.interview_prep_service import InterviewPrepService
 from typing import Any, Dict, List
 from datetime import datetime as dt
 
+try:
+    from pdf_generator import presign
+except ImportError:
+    presign = None
+
 router = APIRouter(prefix="/applications", tags=["applications"])
 
+
+def _with_download_urls(applications: List[Application], download: bool = False) -> List[ApplicationResponse]:
+    """Responses with presigned links to each stored resume and cover letter, signed as one cached batch."""
+    responses = [ApplicationResponse.model_validate(application) for application in applications]
+    if presign is None:
+        return responses
+    urls = presign.presigned_urls(
+        [url for r in responses for url in (r.tailored_resume_s3_url, r.cover_letter_s3_url)],
+        download=download
+    )
+    for response in responses:
+        response.tailored_resume_download_url = urls.get(response.tailored_resume_s3_url)
+        response.cover_letter_download_url = urls.get(response.cover_letter_s3_url)
+    return responses
+
+
+@router.get("", response_model=List[ApplicationResponse])
+def list_applications(
+    current_user: User = Depends(deps.get_current_user),
+    download: bool = Query(False, description="Make the file links download instead of open in the browser"),
+    skip: int = Query(0, ge=0, description="Number of records to skip"),
+    limit: int = Query(100, ge=1, le=1000, description="Maximum number of records to return"),
+    db: Session = Depends(get_db)
+):
+    """List the current user's applications, newest first, with download links to their files."""
+    applications = db.query(Application).filter(
+        Application.user_id == current_user.id
+    ).order_by(Application.created_at.desc()).offset(skip).limit(limit).all()
+    return _with_download_urls(applications, download)
+
 @router.get("/follow-ups", response_model=List[ApplicationResponse])
 def get_pending_follow_ups(
     current_user: User = Depends(deps.get_current_user),
@@ -23,7 +58,7 @@ def get_pending_follow_ups(
         Application.follow_up_date <= now,
         Application.follow_up_status == "pending"
     ).all()
-    return pending
+    return _with_download_urls(pending)
 
 @router.patch("/{application_id}", response_model=ApplicationResponse)
 def update_application(
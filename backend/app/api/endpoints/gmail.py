@@ -166,15 +166,16 @@ async def gmail_callback(
 @router.post("/scan")
 def scan_gmail(
     current_user: User = Depends(deps.get_current_user),
-    days_back: int = Query(7, description="Number of days to look back"),
+    days_back: int = Query(7, description="Number of days to look back on a full scan"),
+    full_scan: bool = Query(False, description="Rescan the last days_back days instead of only new mail"),
     db: Session = Depends(get_db)
 ):
     """
-    Scan Gmail for job application status updates.
+    Scan Gmail for job application status updates in mail not scanned before.
     """
     try:
         gmail_service = GmailService(db)
-        updates = gmail_service.scan_for_updates(current_user.id, days_back)
+        updates = gmail_service.scan_for_updates(current_user.id, days_back, full_scan=full_scan)
         
         return {
             "status": "success",
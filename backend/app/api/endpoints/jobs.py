@@ -4,7 +4,8 @@ Job CRUD API endpoints.
 import os
 import logging
 import json as _json
-from fastapi import APIRouter, Depends, HTTPException, Query
+import numpy as np
+from fastapi import APIRouter, Depends, HTTPException, Query, BackgroundTasks
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from app.db.database import get_db
@@ -17,7 +18,8 @@ from app.models.user import User
 from app.models.application import Application
 from sqlalchemy import func
 from datetime import datetime, timedelta
-from app.services.ollama_client import generate_text as _ollama_generate, embed_text as _ollama_embed
+from app.services.ollama_client import generate_text as _ollama_generate
+from app.services import embedding_store, job_index, skill_taxonomy
 
 logger = logging.getLogger(__name__)
 
@@ -76,6 +78,110 @@ def get_job_stats(
         }
     }
 
+@router.get("/match/rank")
+def rank_jobs_for_resume(
+    current_user: User = Depends(deps.get_current_user),
+    resume_id: Optional[int] = Query(None, description="Resume to rank against (defaults to most recent)"),
+    status: Optional[JobStatus] = Query(None, description="Only rank jobs with this status"),
+    company: Optional[str] = Query(None, description="Only rank jobs whose company matches"),
+    top_k: int = Query(20, ge=1, le=1000, description="Number of top matches to return"),
+    db: Session = Depends(get_db)
+):
+    """
+    Score all of the user's jobs (optionally filtered) against one resume in a
+    single call, using stored embeddings and one matrix-vector product.
+    """
+    from app.models.resume import Resume
+    resume_query = db.query(Resume).filter(Resume.user_id == current_user.id)
+    if resume_id:
+        resume = resume_query.filter(Resume.id == resume_id).first()
+        if not resume:
+            raise HTTPException(status_code=404, detail="Resume not found")
+    else:
+        resume = resume_query.order_by(Resume.created_at.desc()).first()
+        if not resume:
+            return {"resume_id": None, "total_scored": 0, "matches": [], "message": "No resume found to match against"}
+
+    resume_text = embedding_store.resume_embedding_text(resume)
+    if not resume_text:
+        return {"resume_id": resume.id, "total_scored": 0, "matches": [], "message": "Resume has no text content"}
+
+    query = db.query(Job).filter(Job.user_id == current_user.id)
+    if status:
+        query = query.filter(Job.status == status)
+    if company:
+        query = query.filter(Job.company.icontains(company, autoescape=True))
+
+    jobs = [j for j in query.all() if embedding_store.job_embedding_text(j)]
+    if not jobs:
+        return {"resume_id": resume.id, "total_scored": 0, "matches": []}
+
+    try:
+        vectors = embedding_store.get_pooled_embeddings(
+            db, [embedding_store.job_embedding_text(j) for j in jobs] + [resume_text]
+        )
+    except Exception as e:
+        logger.error(f"Embedding lookup failed while ranking jobs: {e}")
+        raise HTTPException(status_code=503, detail="Embedding service unavailable")
+
+    cosines = embedding_store.cosine_scores(np.vstack(vectors[:-1]), vectors[-1])
+    k = min(top_k, len(jobs))
+    top = np.argpartition(-cosines, k - 1)[:k]
+    top = top[np.argsort(-cosines[top])]
+    scores = embedding_store.to_match_score(cosines[top])
+
+    return {
+        "resume_id": resume.id,
+        "total_scored": len(jobs),
+        "matches": [
+            {
+                "job_id": jobs[i].id,
+                "title": jobs[i].title,
+                "company": jobs[i].company,
+                "status": jobs[i].status,
+                "match_score": int(score),
+                "similarity": round(float(cosines[i]), 4),
+            }
+            for i, score in zip(top, scores)
+        ]
+    }
+
+@router.get("/search/semantic")
+def semantic_job_search(
+    q: str = Query(..., min_length=1, description="Free text to find similar saved jobs for"),
+    k: int = Query(10, ge=1, le=100, description="Number of results to return"),
+    current_user: User = Depends(deps.get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Find the user's saved jobs most similar to a piece of text, using the
+    persisted approximate nearest-neighbour job index.
+    """
+    try:
+        hits = job_index.search_jobs(db, current_user.id, q.strip()[:embedding_store.MAX_EMBED_CHARS], k)
+    except Exception as e:
+        logger.error(f"Semantic job search failed: {e}")
+        raise HTTPException(status_code=503, detail="Embedding service unavailable")
+
+    jobs = {j.id: j for j in db.query(Job).filter(
+        Job.user_id == current_user.id,
+        Job.id.in_([job_id for job_id, _ in hits])
+    ).all()}
+
+    return {
+        "query": q,
+        "results": [
+            {
+                "job_id": job_id,
+                "title": jobs[job_id].title,
+                "company": jobs[job_id].company,
+                "status": jobs[job_id].status,
+                "similarity": round(similarity, 4),
+            }
+            for job_id, similarity in hits if job_id in jobs
+        ]
+    }
+
 @router.get("/{job_id}/match")
 def get_job_match_score(
     job_id: int,
@@ -84,7 +190,8 @@ def get_job_match_score(
 ):
     """
     Calculate a semantic match score between a job and the user's latest resume
-    using local Ollama embeddings and cosine similarity.
+    using chunked Ollama embeddings (cached in the embedding store): each job
+    section is matched against its most similar resume section.
     """
     job = db.query(Job).filter(Job.id == job_id, Job.user_id == current_user.id).first()
     if not job:
@@ -96,8 +203,8 @@ def get_job_match_score(
     if not resume:
         return {"match_score": 0, "message": "No resume found to match against"}
 
-    job_text = f"{job.title or ''} {job.description or ''}".strip()
-    resume_text = (resume.raw_text or "").strip()
+    job_text = embedding_store.job_embedding_text(job)
+    resume_text = embedding_store.resume_embedding_text(resume)
 
     if not job_text:
         return {"match_score": 0, "message": "Job has no text content"}
@@ -106,38 +213,28 @@ def get_job_match_score(
         return {"match_score": 0, "message": "Resume has no text content"}
 
     try:
-        job_vec = _ollama_embed(job_text[:8000])
-        resume_vec = _ollama_embed(resume_text[:8000])
-
-        # Cosine similarity (no external deps)
-        dot = sum(a * b for a, b in zip(job_vec, resume_vec))
-        mag_j = sum(x * x for x in job_vec) ** 0.5
-        mag_r = sum(x * x for x in resume_vec) ** 0.5
-        cosine = dot / (mag_j * mag_r) if (mag_j and mag_r) else 0.0
+        job_chunks, resume_chunks = embedding_store.get_chunk_embeddings(db, [job_text, resume_text])
+        cosine = embedding_store.chunk_match_similarity(job_chunks, resume_chunks)
 
         # Map [0, 1] → [0, 100] (embeddings for same-language text stay positive)
         score = int(max(0.0, min(1.0, cosine)) * 100)
 
+        skills = skill_taxonomy.match_skills(job_text, resume_text)
         return {
             "match_score": score,
             "method": "semantic",
-            "matched_skills": [],
-            "missing_skills": []
+            "matched_skills": skills.matched,
+            "missing_skills": skills.missing
         }
     except Exception as e:
         logger.warning(f"Embedding match failed, using keyword fallback: {e}")
-        # Keyword fallback — original logic
-        skills = ["python", "react", "fastapi", "next.js", "typescript", "aws", "docker",
-                  "sql", "machine learning", "ai"]
-        job_lower = job_text.lower()
-        resume_lower = resume_text.lower()
-        matched = [s for s in skills if s in job_lower and s in resume_lower]
-        score = min(len(matched) * 10, 100)
+        # Keyword fallback: share of the job's taxonomy skills the resume mentions
+        skills = skill_taxonomy.match_skills(job_text, resume_text)
         return {
-            "match_score": score,
+            "match_score": int(round(skills.coverage * 100)),
             "method": "keyword_fallback",
-            "matched_skills": matched,
-            "missing_skills": [s for s in skills if s in job_lower and s not in resume_lower]
+            "matched_skills": skills.matched,
+            "missing_skills": skills.missing
         }
 
 @router.get("/insights/next-actions")
@@ -237,6 +334,7 @@ Return ONLY the JSON array, no markdown."""
 @router.post("", response_model=JobResponse, status_code=201)
 def create_job(
     job: JobCreate,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(deps.get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -259,6 +357,7 @@ def create_job(
     db.add(db_job)
     db.commit()
     db.refresh(db_job)
+    background_tasks.add_task(job_index.index_job, db_job.id)
     return db_job
 
 
@@ -330,6 +429,7 @@ def get_job(
 def update_job(
     job_id: int,
     job_update: JobUpdate,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(deps.get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -347,12 +447,15 @@ def update_job(
     
     db.commit()
     db.refresh(db_job)
+    if {"title", "description"} & update_data.keys():
+        background_tasks.add_task(job_index.index_job, db_job.id)
     return db_job
 
 
 @router.delete("/{job_id}", status_code=204)
 def delete_job(
     job_id: int, 
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(deps.get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -365,4 +468,5 @@ def delete_job(
     
     db.delete(db_job)
     db.commit()
+    background_tasks.add_task(job_index.remove_job, current_user.id, job_id)
     return None
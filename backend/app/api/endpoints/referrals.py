@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from typing import List, Optional
 import logging
@@ -126,7 +127,8 @@ async def generate_referral_message(
     purpose = f"Requesting a referral for a position at {referral.company}. We are connected on LinkedIn where they are/were a {referral.relationship}."
     
     try:
-        message = email_service.generate_email(
+        message = await run_in_threadpool(
+            email_service.generate_email,
             user_id=current_user.id,
             purpose=purpose,
             tone=tone,
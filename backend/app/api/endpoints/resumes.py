@@ -1,38 +1,55 @@
 """
 Resume API endpoints.
 """
-from fastapi import APIRouter, Depends, HTTPException, File, UploadFile, Form, Query
+from fastapi import APIRouter, Depends, HTTPException, File, UploadFile, Form, Query, BackgroundTasks
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from typing import Optional
 import PyPDF2
 import io
-from app.db.database import get_db
+import os
+import json
+import asyncio
+import logging
+from app.db.database import get_db, SessionLocal
 from app.models.resume import Resume
 from app.models.job import Job
-from app.models.application import Application
-from app.schemas.resume import ResumeCreate, ResumeResponse
+from app.models.task import Task
+from app.schemas.resume import ResumeCreate, ResumeResponse, TailorBatchRequest, TailorBatchResponse
 from app.schemas.application import ApplicationResponse
-from app.services.resume_processor import (
-    extract_text_from_pdf,
-    extract_resume_data,
-    extract_job_description_data,
-    tailor_resume_for_job,
-    calculate_ats_score,
-    create_resume_filename,
-    generate_resume_pdf,
-    save_resume_json
+from app.services.resume_processor import extract_text_from_pdf
+from app.services.tailoring import (
+    build_tailoring_pipeline,
+    run_tailoring,
+    summarize_scores,
+    save_tailored_application,
+    tailored_application_response,
+    stream_tailoring
 )
+from app.services.pipeline import PipelineRun, StageError
+from app.services import embedding_store, parse_cache, task_queue
+from pdf_generator.constants import PDF_RENDERERS
 from app.api import deps
 from app.models.user import User
-from typing import Dict, Any
+from typing import Dict, Any, Tuple, AsyncIterator, Awaitable, Callable
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/resumes", tags=["resumes"])
 
+# Idle time after which a comment line is sent on an event stream
+SSE_KEEPALIVE_SECONDS = 15
+# Largest number of jobs accepted by /tailor/batch
+TAILOR_BATCH_MAX_JOBS = int(os.getenv("TAILOR_BATCH_MAX_JOBS", "100"))
+
 
 @router.post("/customize", response_model=Dict[str, Any])
 async def customize_resume_only(
     job_description_text: str = Form(..., description="Job description as text"),
     resume: UploadFile = File(...),
+    renderer: Optional[str] = Form(None, description="PDF renderer: latex or direct (default: PDF_RENDERER)"),
     current_user: User = Depends(deps.get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -40,45 +57,27 @@ async def customize_resume_only(
     Customize a resume without creating an application or linking to a job.
     Similar to the old /customize-resume/ but authenticated.
     """
+    renderer = _check_renderer(renderer)
     # Read and extract text from the resume
     resume_content = await resume.read()
-    resume_text = extract_text_from_pdf(resume_content)
-    
-    # Extract structured data
-    resume_data = extract_resume_data(resume_text)
-    job_description_data = extract_job_description_data(job_description_text)
-    
-    # Calculate initial ATS score
-    initial_ats_analysis = calculate_ats_score(resume_data, job_description_data, is_optimized=False)
-    initial_score = initial_ats_analysis.get("score", 35)
-    
-    # Customize the resume
-    customized_resume = tailor_resume_for_job(resume_data, job_description_data)
-    customized_resume["base_score"] = initial_score
-    
-    # Calculate final ATS score
-    final_ats_analysis = calculate_ats_score(customized_resume, job_description_data, is_optimized=True)
-    if "base_score" in customized_resume:
-        del customized_resume["base_score"]
-    
-    # Generate filename
-    filename = create_resume_filename(customized_resume, job_description_data)
-    
-    # Generate PDF and JSON
-    pdf_result = generate_resume_pdf(customized_resume, filename)
-    json_result = save_resume_json(customized_resume, filename)
+    resume_text = await run_in_threadpool(extract_text_from_pdf, resume_content)
     
-    final_score = final_ats_analysis.get("score", initial_score + 40)
+    # Run the tailoring DAG; independent LLM stages run concurrently in worker threads
+    run = await run_tailoring(resume_text, job_description_text, score_with_baseline=True, renderer=renderer)
+    return _customize_response(run)
+
+
+def _customize_response(run: PipelineRun) -> Dict[str, Any]:
+    customized_resume = run.results["tailor"]
+    pdf_result = run.results["pdf"]
+    json_result = run.results["json"]
     
     response = {
         "success": True,
         "customized_resume": customized_resume,
         "modifications_summary": customized_resume.get("modifications_summary", ""),
-        "initial_ats_score": initial_score,
-        "initial_ats_feedback": initial_ats_analysis.get("improvements", []),
-        "final_ats_score": final_score,
-        "final_ats_feedback": final_ats_analysis.get("improvements", []),
-        "score_improvement": final_score - initial_score
+        **summarize_scores(run),
+        "stage_timings": run.timings
     }
     
     if pdf_result:
@@ -89,8 +88,112 @@ async def customize_resume_only(
     return response
 
 
+def _check_renderer(renderer: Optional[str]) -> Optional[str]:
+    """Validate a requested PDF renderer; None means the PDF_RENDERER default."""
+    if not renderer:
+        return None
+    if renderer.lower() not in PDF_RENDERERS:
+        raise HTTPException(status_code=400, detail=f"renderer must be one of: {', '.join(PDF_RENDERERS)}")
+    return renderer.lower()
+
+
+def _sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(jsonable_encoder(data))}\n\n"
+
+
+async def _tailoring_event_stream(
+    resume_text: str,
+    job_description_text: str,
+    score_with_baseline: bool,
+    include_tokens: bool,
+    finalize: Callable[[PipelineRun], Awaitable[Dict[str, Any]]],
+    resume_id: Optional[int] = None,
+    renderer: Optional[str] = None,
+    job_id: Optional[int] = None
+) -> AsyncIterator[str]:
+    """
+    SSE body for the streaming endpoints: a `stage` event per completed stage,
+    `token` events when requested, then `complete` with the same payload as the
+    non-streaming endpoint (or `error`). Comment lines are sent while idle so
+    proxies don't drop the connection during long LLM calls.
+    """
+    events = stream_tailoring(resume_text, job_description_text, score_with_baseline, include_tokens, resume_id,
+                              renderer, job_id)
+    pending = None
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(events.__anext__())
+            done, _ = await asyncio.wait({pending}, timeout=SSE_KEEPALIVE_SECONDS)
+            if not done:
+                yield ": keepalive\n\n"
+                continue
+            try:
+                event, data = pending.result()
+            except StopAsyncIteration:
+                return
+            pending = None
+            if event == "run":
+                yield _sse("complete", await finalize(data))
+                return
+            yield _sse(event, data)
+    except StageError as e:
+        logger.error(f"Streaming tailoring failed: {e}")
+        yield _sse("error", {"stage": e.stage, "detail": str(e.__cause__ or e)})
+    except Exception as e:
+        logger.error(f"Streaming tailoring failed: {e}")
+        yield _sse("error", {"stage": None, "detail": str(e)})
+    finally:
+        if pending is not None:
+            pending.cancel()
+            await asyncio.gather(pending, return_exceptions=True)
+        await events.aclose()
+
+
+def _event_stream_response(body: AsyncIterator[str]) -> StreamingResponse:
+    return StreamingResponse(
+        body,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.post("/customize/stream")
+async def customize_resume_stream(
+    job_description_text: str = Form(..., description="Job description as text"),
+    resume: UploadFile = File(...),
+    tokens: bool = Form(False, description="Also stream generated LLM tokens"),
+    renderer: Optional[str] = Form(None, description="PDF renderer: latex or direct (default: PDF_RENDERER)"),
+    current_user: User = Depends(deps.get_current_user)
+):
+    """
+    Server-sent events variant of /customize. Emits `stage` events (parse_resume,
+    parse_job, initial_ats, tailor, final_ats, filename, pdf, json) as each
+    completes, `token` events if requested, and a final `complete` event.
+    """
+    renderer = _check_renderer(renderer)
+    resume_content = await resume.read()
+    resume_text = await run_in_threadpool(extract_text_from_pdf, resume_content)
+
+    async def finalize(run: PipelineRun) -> Dict[str, Any]:
+        return _customize_response(run)
+
+    return _event_stream_response(
+        _tailoring_event_stream(resume_text, job_description_text, True, tokens, finalize, renderer=renderer)
+    )
+
+
+@router.get("/tailor/pipeline")
+def get_tailoring_pipeline(current_user: User = Depends(deps.get_current_user)):
+    """
+    Describe the tailoring pipeline's stages and their dependencies.
+    """
+    return {"stages": build_tailoring_pipeline().graph()}
+
+
 @router.post("/upload", response_model=ResumeResponse, status_code=201)
 async def upload_resume(
+    background_tasks: BackgroundTasks,
     resume: UploadFile = File(...),
     current_user: User = Depends(deps.get_current_user),
     db: Session = Depends(get_db)
@@ -100,7 +203,7 @@ async def upload_resume(
     """
     # Read and extract text from PDF
     resume_content = await resume.read()
-    resume_text = extract_text_from_pdf(resume_content)
+    resume_text = await run_in_threadpool(extract_text_from_pdf, resume_content)
     
     # Store resume in database
     db_resume = Resume(
@@ -112,6 +215,8 @@ async def upload_resume(
     db.add(db_resume)
     db.commit()
     db.refresh(db_resume)
+    background_tasks.add_task(embedding_store.index_resume, db_resume.id)
+    background_tasks.add_task(parse_cache.warm_resume, db_resume.id)
     
     return db_resume
 
@@ -146,17 +251,15 @@ def get_resume(
     return resume
 
 
-@router.post("/tailor", response_model=ApplicationResponse, status_code=201)
-async def tailor_resume_for_job_endpoint(
-    job_id: int = Form(..., description="Job ID to tailor resume for"),
-    resume_id: Optional[int] = Form(None, description="Resume ID (if not provided, uses most recent)"),
-    resume_file: Optional[UploadFile] = File(None, description="New resume file (if not using resume_id)"),
-    current_user: User = Depends(deps.get_current_user),
-    db: Session = Depends(get_db)
-):
-    """
-    Tailor a resume for a specific job and create an application record.
-    """
+async def _resolve_tailoring_inputs(
+    db: Session,
+    current_user: User,
+    job_id: int,
+    resume_id: Optional[int],
+    resume_file: Optional[UploadFile],
+    background_tasks: BackgroundTasks
+) -> Tuple[Job, Resume, str]:
+    """Load the job and pick (or upload) the resume for a tailoring request."""
     # Get job
     job = db.query(Job).filter(Job.id == job_id, Job.user_id == current_user.id).first()
     if not job:
@@ -173,7 +276,7 @@ async def tailor_resume_for_job_endpoint(
     elif resume_file:
         # Upload new resume
         resume_content = await resume_file.read()
-        resume_text = extract_text_from_pdf(resume_content)
+        resume_text = await run_in_threadpool(extract_text_from_pdf, resume_content)
         
         # Create resume record
         db_resume = Resume(
@@ -184,6 +287,7 @@ async def tailor_resume_for_job_endpoint(
         db.add(db_resume)
         db.commit()
         db.refresh(db_resume)
+        background_tasks.add_task(embedding_store.index_resume, db_resume.id)
     else:
         # Use most recent resume
         db_resume = db.query(Resume).filter(Resume.user_id == current_user.id).order_by(Resume.created_at.desc()).first()
@@ -192,77 +296,148 @@ async def tailor_resume_for_job_endpoint(
         resume_text = db_resume.raw_text
         if not resume_text:
             raise HTTPException(status_code=400, detail="Resume has no raw text data")
-    
-    # Extract structured data
-    resume_data = extract_resume_data(resume_text)
-    job_description_data = extract_job_description_data(job.description)
-    
-    # Calculate initial ATS score
-    initial_ats_analysis = calculate_ats_score(resume_data, job_description_data, is_optimized=False)
-    initial_score = initial_ats_analysis.get("score", 35)
-    
-    # Customize the resume
-    customized_resume = tailor_resume_for_job(resume_data, job_description_data)
-    
-    # Calculate final ATS score
-    final_ats_analysis = calculate_ats_score(customized_resume, job_description_data, is_optimized=True)
-    final_score = final_ats_analysis.get("score", initial_score + 40)
-    
-    # Generate filename
-    filename = create_resume_filename(customized_resume, job_description_data)
-    
-    # Generate PDF
-    pdf_result = generate_resume_pdf(customized_resume, filename)
-    
-    # Save JSON
-    json_result = save_resume_json(customized_resume, filename)
-    
-    # Create or update application record
-    application = db.query(Application).filter(
-        Application.user_id == current_user.id,
-        Application.job_id == job_id,
-        Application.resume_id == db_resume.id
-    ).first()
-    
-    if application:
-        # Update existing application
-        application.tailored_resume_path = pdf_result.get("pdf_path") if pdf_result else None
-        application.tailored_resume_s3_url = pdf_result.get("s3_pdf_url") if pdf_result else None
+
+    return job, db_resume, resume_text
+
+
+@router.post("/tailor/batch", response_model=TailorBatchResponse, status_code=202)
+def tailor_resume_batch(
+    request: TailorBatchRequest,
+    current_user: User = Depends(deps.get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Tailor one resume against many saved jobs in the background. The resume is
+    parsed once and the per-job pipelines run concurrently in the task worker.
+    Poll /resumes/tailor/batch/{batch_id} for per-job status.
+    """
+    renderer = _check_renderer(request.renderer)
+    job_ids = list(dict.fromkeys(request.job_ids))
+    if len(job_ids) > TAILOR_BATCH_MAX_JOBS:
+        raise HTTPException(status_code=400, detail=f"A batch may contain at most {TAILOR_BATCH_MAX_JOBS} jobs")
+    found = {job_id for (job_id,) in db.query(Job.id).filter(Job.id.in_(job_ids), Job.user_id == current_user.id).all()}
+    missing = [job_id for job_id in job_ids if job_id not in found]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Jobs not found: {missing}")
+
+    if request.resume_id:
+        db_resume = db.query(Resume).filter(Resume.id == request.resume_id, Resume.user_id == current_user.id).first()
+        if not db_resume:
+            raise HTTPException(status_code=404, detail="Resume not found")
     else:
-        # Create new application
-        application = Application(
-            user_id=current_user.id,
-            job_id=job_id,
-            resume_id=db_resume.id,
-            tailored_resume_path=pdf_result.get("pdf_path") if pdf_result else None,
-            tailored_resume_s3_url=pdf_result.get("s3_pdf_url") if pdf_result else None
-        )
-        db.add(application)
-    
+        db_resume = db.query(Resume).filter(Resume.user_id == current_user.id).order_by(Resume.created_at.desc()).first()
+        if not db_resume:
+            raise HTTPException(status_code=404, detail="No resume found. Please upload a resume first.")
+    if not db_resume.raw_text:
+        raise HTTPException(status_code=400, detail="Resume has no raw text data")
+
+    task = task_queue.enqueue_task(db, current_user.id, "tailor_batch",
+                                   {"job_ids": job_ids, "resume_id": db_resume.id, "renderer": renderer})
+    task.progress = {**task.progress, "jobs": {str(job_id): {"status": "queued"} for job_id in job_ids}}
     db.commit()
-    db.refresh(application)
-    
-    # Return application with additional metadata
-    response_dict = {
-        "id": application.id,
-        "job_id": application.job_id,
-        "resume_id": application.resume_id,
-        "tailored_resume_path": application.tailored_resume_path,
-        "tailored_resume_s3_url": application.tailored_resume_s3_url,
-        "cover_letter_text": application.cover_letter_text,
-        "cover_letter_s3_url": application.cover_letter_s3_url,
-        "applied_at": application.applied_at,
-        "last_status_update": application.last_status_update,
-        "current_stage": application.current_stage,
-        "created_at": application.created_at,
-        "updated_at": application.updated_at,
-        # Add customization metadata
-        "initial_ats_score": initial_score,
-        "final_ats_score": final_score,
-        "score_improvement": final_score - initial_score,
-        "customized_resume": customized_resume,
-        "pdf_path": pdf_result.get("pdf_path") if pdf_result else None,
-        "s3_url": pdf_result.get("s3_pdf_url") if pdf_result else None
+    return _batch_response(task)
+
+
+@router.get("/tailor/batch/{batch_id}", response_model=TailorBatchResponse)
+def get_tailor_batch(
+    batch_id: str,
+    current_user: User = Depends(deps.get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Status of a tailoring batch, with per-job status and resulting application ids."""
+    task = db.query(Task).filter(
+        Task.id == batch_id,
+        Task.user_id == current_user.id,
+        Task.kind == "tailor_batch"
+    ).first()
+    if not task:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    return _batch_response(task)
+
+
+def _batch_response(task: Task) -> Dict[str, Any]:
+    jobs = (task.progress or {}).get("jobs") or {}
+    return {
+        "batch_id": task.id,
+        "status": task.status.value,
+        "resume_id": task.payload["resume_id"],
+        "jobs": [{"job_id": job_id, **jobs.get(str(job_id), {"status": "queued"})} for job_id in task.payload["job_ids"]],
+        "created_at": task.created_at,
+        "finished_at": task.finished_at
     }
-    
-    return response_dict
+
+
+@router.post("/tailor", response_model=ApplicationResponse, status_code=201)
+async def tailor_resume_for_job_endpoint(
+    background_tasks: BackgroundTasks,
+    job_id: int = Form(..., description="Job ID to tailor resume for"),
+    resume_id: Optional[int] = Form(None, description="Resume ID (if not provided, uses most recent)"),
+    resume_file: Optional[UploadFile] = File(None, description="New resume file (if not using resume_id)"),
+    background: bool = Form(False, description="Queue the work and return a task id instead of waiting"),
+    renderer: Optional[str] = Form(None, description="PDF renderer: latex or direct (default: PDF_RENDERER)"),
+    current_user: User = Depends(deps.get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Tailor a resume for a specific job and create an application record.
+    With background=true, responds 202 with a task id; poll /tasks/{task_id} for progress.
+    """
+    renderer = _check_renderer(renderer)
+    job, db_resume, resume_text = await _resolve_tailoring_inputs(
+        db, current_user, job_id, resume_id, resume_file, background_tasks
+    )
+
+    if background:
+        task = task_queue.enqueue_task(
+            db, current_user.id, "tailor",
+            {"job_id": job.id, "resume_id": db_resume.id, "renderer": renderer},
+            total_stages=len(build_tailoring_pipeline().stages)
+        )
+        return JSONResponse(status_code=202, content={
+            "task_id": task.id,
+            "status": task.status.value,
+            "status_url": f"/tasks/{task.id}"
+        })
+
+    # Run the tailoring DAG; independent LLM stages run concurrently in worker threads
+    run = await run_tailoring(resume_text, job.description, resume_id=db_resume.id, renderer=renderer,
+                              job_id=job.id)
+    application = save_tailored_application(db, current_user.id, job_id, db_resume.id, run)
+
+    # Return application with additional metadata
+    return tailored_application_response(application, run)
+
+
+@router.post("/tailor/stream")
+async def tailor_resume_stream(
+    background_tasks: BackgroundTasks,
+    job_id: int = Form(..., description="Job ID to tailor resume for"),
+    resume_id: Optional[int] = Form(None, description="Resume ID (if not provided, uses most recent)"),
+    resume_file: Optional[UploadFile] = File(None, description="New resume file (if not using resume_id)"),
+    tokens: bool = Form(False, description="Also stream generated LLM tokens"),
+    renderer: Optional[str] = Form(None, description="PDF renderer: latex or direct (default: PDF_RENDERER)"),
+    current_user: User = Depends(deps.get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Server-sent events variant of /tailor. Emits `stage` and optional `token`
+    events while running; the final `complete` event carries the application.
+    """
+    renderer = _check_renderer(renderer)
+    job, db_resume, resume_text = await _resolve_tailoring_inputs(
+        db, current_user, job_id, resume_id, resume_file, background_tasks
+    )
+    user_id, resume_pk = current_user.id, db_resume.id
+
+    async def finalize(run: PipelineRun) -> Dict[str, Any]:
+        # The request's session is closed once streaming starts, so use a fresh one
+        session = SessionLocal()
+        try:
+            application = save_tailored_application(session, user_id, job_id, resume_pk, run)
+            return tailored_application_response(application, run)
+        finally:
+            session.close()
+
+    return _event_stream_response(
+        _tailoring_event_stream(resume_text, job.description, False, tokens, finalize, resume_pk, renderer, job_id)
+    )
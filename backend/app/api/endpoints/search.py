@@ -2,7 +2,7 @@
 Job Search API endpoints (Phase 2: Hunter).
 Integrates with external job APIs for job discovery.
 """
-from fastapi import APIRouter, HTTPException, Query, Depends
+from fastapi import APIRouter, HTTPException, Query, Depends, BackgroundTasks
 from sqlalchemy.orm import Session
 from typing import List, Optional
 import os
@@ -14,6 +14,7 @@ from app.schemas.job import JobCreate, JobResponse
 from dotenv import load_dotenv
 from app.api import deps
 from app.models.user import User
+from app.services import job_index
 
 load_dotenv()
 
@@ -196,6 +197,7 @@ def search_jobs(
 @router.post("/jobs/save")
 def save_job_from_search(
     job_data: dict,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(deps.get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -243,6 +245,7 @@ def save_job_from_search(
         db.add(db_job)
         db.commit()
         db.refresh(db_job)
+        background_tasks.add_task(job_index.index_job, db_job.id)
         
         return {
             "success": True,
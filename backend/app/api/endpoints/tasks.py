@@ -0,0 +1,72 @@
+"""
+Background task API endpoints.
+"""
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from app.db.database import get_db
+from app.models.task import Task, TaskStatus
+from app.schemas.task import TaskResponse
+from app.services import task_queue
+from app.api import deps
+from app.models.user import User
+
+router = APIRouter(prefix="/tasks", tags=["tasks"])
+
+
+def _get_user_task(db: Session, task_id: str, user_id: int) -> Task:
+    task = db.query(Task).filter(Task.id == task_id, Task.user_id == user_id).first()
+    if not task:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return task
+
+
+@router.get("", response_model=List[TaskResponse])
+def list_tasks(
+    status: Optional[TaskStatus] = None,
+    limit: int = Query(20, ge=1, le=100),
+    current_user: User = Depends(deps.get_current_user),
+    db: Session = Depends(get_db)
+):
+    """List the current user's most recent tasks."""
+    query = db.query(Task).filter(Task.user_id == current_user.id)
+    if status:
+        query = query.filter(Task.status == status)
+    return query.order_by(Task.created_at.desc()).limit(limit).all()
+
+
+@router.get("/{task_id}", response_model=TaskResponse)
+def get_task(
+    task_id: str,
+    current_user: User = Depends(deps.get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Get a task's status and stage-level progress. Once it has succeeded,
+    `application` holds the resulting Application and `result` the full output.
+    """
+    return _get_user_task(db, task_id, current_user.id)
+
+
+@router.post("/{task_id}/cancel", response_model=TaskResponse)
+def cancel_task(
+    task_id: str,
+    current_user: User = Depends(deps.get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Cancel a task. A running task stops after its current stage finishes."""
+    task = _get_user_task(db, task_id, current_user.id)
+    return task_queue.cancel_task(db, task)
+
+
+@router.post("/{task_id}/retry", response_model=TaskResponse)
+def retry_task(
+    task_id: str,
+    current_user: User = Depends(deps.get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Re-queue a failed or cancelled task."""
+    task = _get_user_task(db, task_id, current_user.id)
+    if task.status not in (TaskStatus.FAILED, TaskStatus.CANCELLED):
+        raise HTTPException(status_code=409, detail=f"Only failed or cancelled tasks can be retried (status: {task.status.value})")
+    return task_queue.retry_task(db, task)
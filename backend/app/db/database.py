@@ -49,8 +49,18 @@ def _run_migrations():
                     "ALTER TABLE applications ADD COLUMN follow_up_status VARCHAR DEFAULT 'pending'"
                 ))
 
+    if "resumes" in tables:
+        existing = {c["name"] for c in inspector.get_columns("resumes")}
+        with engine.begin() as conn:
+            if "parsed_data" not in existing:
+                conn.execute(text("ALTER TABLE resumes ADD COLUMN parsed_data JSON"))
+            if "parsed_data_key" not in existing:
+                conn.execute(text("ALTER TABLE resumes ADD COLUMN parsed_data_key VARCHAR(64)"))
+
 
 def init_db():
-    from app.models import user, job, resume, application, outreach, referral
+    from app.models import (
+        user, job, resume, application, outreach, referral, embedding, task, parsed_job_description, gmail_sync
+    )
     Base.metadata.create_all(bind=engine)
     _run_migrations()
@@ -5,5 +5,10 @@ from app.models.resume import Resume
 from app.models.application import Application
 from app.models.outreach import Outreach
 from app.models.referral import Referral
+from app.models.embedding import Embedding
+from app.models.task import Task
+from app.models.parsed_job_description import ParsedJobDescription
+from app.models.gmail_sync import GmailSyncState, GmailProcessedMessage
 
-__all__ = ["User", "Job", "Resume", "Application", "Outreach", "Referral"]
+__all__ = ["User", "Job", "Resume", "Application", "Outreach", "Referral", "Embedding", "Task", "ParsedJobDescription",
+           "GmailSyncState", "GmailProcessedMessage"]
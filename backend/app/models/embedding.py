@@ -0,0 +1,18 @@
+"""
+Embedding model - caches embedding vectors by content hash and embed model.
+"""
+from sqlalchemy import Column, Integer, String, LargeBinary, DateTime, UniqueConstraint
+from sqlalchemy.sql import func
+from app.db.base import Base
+
+
+class Embedding(Base):
+    __tablename__ = "embeddings"
+    __table_args__ = (UniqueConstraint("content_hash", "model", name="uq_embeddings_hash_model"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    content_hash = Column(String(64), nullable=False, index=True)  # SHA-256 of the embedded text
+    model = Column(String, nullable=False)  # OLLAMA_EMBED_MODEL used to produce the vector
+    dim = Column(Integer, nullable=False)
+    vector = Column(LargeBinary, nullable=False)  # float32 bytes
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
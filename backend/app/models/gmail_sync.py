@@ -0,0 +1,29 @@
+"""
+Gmail sync models - the per-user History API cursor and the messages already scanned.
+"""
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy.sql import func
+from app.db.base import Base
+
+
+class GmailSyncState(Base):
+    __tablename__ = "gmail_sync_states"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, unique=True, index=True)
+    history_id = Column(String, nullable=True)  # Mailbox historyId the next incremental sync starts from
+    last_full_scan_at = Column(DateTime(timezone=True), nullable=True)
+    last_synced_at = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+
+class GmailProcessedMessage(Base):
+    __tablename__ = "gmail_processed_messages"
+    __table_args__ = (UniqueConstraint("user_id", "message_id", name="uq_gmail_processed_user_message"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    message_id = Column(String, nullable=False)  # Gmail message id
+    is_job_related = Column(Boolean, default=False, nullable=False)
+    processed_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
@@ -0,0 +1,17 @@
+"""
+ParsedJobDescription model - caches LLM-parsed job description sections, shared across users.
+"""
+from sqlalchemy import Column, Integer, String, JSON, DateTime
+from sqlalchemy.sql import func
+from app.db.base import Base
+
+
+class ParsedJobDescription(Base):
+    __tablename__ = "parsed_job_descriptions"
+
+    id = Column(Integer, primary_key=True, index=True)
+    cache_key = Column(String(64), nullable=False, unique=True, index=True)  # parse_cache_key of the JD text
+    model = Column(String, nullable=False)  # OLLAMA_MODEL used for the parse
+    parse_version = Column(Integer, nullable=False)
+    sections = Column(JSON, nullable=False)  # Output of extract_job_description_data
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
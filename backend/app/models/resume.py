@@ -16,6 +16,8 @@ class Resume(Base):
     file_path = Column(String, nullable=True)  # Path to original resume file
     s3_url = Column(String, nullable=True)  # S3 URL if stored in S3
     tags = Column(JSON, nullable=True)  # e.g., ["frontend", "backend", "fullstack"]
+    parsed_data = Column(JSON, nullable=True)  # Structured LLM parse of raw_text
+    parsed_data_key = Column(String(64), nullable=True)  # Parse cache key parsed_data was built for
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
@@ -0,0 +1,45 @@
+"""
+Task model - a unit of background work (e.g. resume tailoring) processed by the task worker.
+"""
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Enum, JSON, Boolean
+from sqlalchemy.sql import func
+from sqlalchemy.orm import relationship
+import enum
+from app.db.base import Base
+
+
+class TaskStatus(str, enum.Enum):
+    """Background task lifecycle status."""
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+class Task(Base):
+    __tablename__ = "tasks"
+
+    id = Column(String(36), primary_key=True)  # UUID4
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    kind = Column(String, nullable=False)  # e.g., "tailor"
+    status = Column(Enum(TaskStatus), default=TaskStatus.QUEUED, nullable=False, index=True)
+    payload = Column(JSON, nullable=False)  # Handler arguments, e.g. {"job_id": 1, "resume_id": 2}
+    stage = Column(String, nullable=True)  # Most recently completed stage
+    progress = Column(JSON, nullable=True)  # {"completed_stages": [...], "total_stages": 8, "timings": {...}}
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+    attempts = Column(Integer, default=0, nullable=False)
+    max_attempts = Column(Integer, default=3, nullable=False)
+    cancel_requested = Column(Boolean, default=False, nullable=False)
+    application_id = Column(Integer, ForeignKey("applications.id"), nullable=True)
+    available_at = Column(DateTime(timezone=True), server_default=func.now())  # Not claimed before this (retry backoff)
+    locked_by = Column(String, nullable=True)  # Worker that holds the task
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    # Relationships
+    application = relationship("Application")
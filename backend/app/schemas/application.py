@@ -45,6 +45,9 @@ class ApplicationResponse(BaseModel):
     follow_up_status: Optional[Literal["pending", "sent", "dismissed"]]
     created_at: datetime
     updated_at: Optional[datetime]
+    # Presigned https links to the stored files, filled in by the endpoints that list applications
+    tailored_resume_download_url: Optional[str] = None
+    cover_letter_download_url: Optional[str] = None
 
     class Config:
         from_attributes = True
@@ -25,3 +25,27 @@ class ResumeResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class TailorBatchRequest(BaseModel):
+    job_ids: List[int] = Field(..., min_length=1, description="Jobs to tailor the resume for")
+    resume_id: Optional[int] = Field(None, description="Resume ID (if not provided, uses most recent)")
+    renderer: Optional[str] = Field(None, description="PDF renderer: latex or direct (default: PDF_RENDERER)")
+
+
+class TailorBatchJobStatus(BaseModel):
+    job_id: int
+    status: str  # queued | running | succeeded | failed | cancelled
+    stage: Optional[str] = None
+    application_id: Optional[int] = None
+    final_ats_score: Optional[int] = None
+    error: Optional[str] = None
+
+
+class TailorBatchResponse(BaseModel):
+    batch_id: str
+    status: str
+    resume_id: int
+    jobs: List[TailorBatchJobStatus]
+    created_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
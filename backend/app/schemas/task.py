@@ -0,0 +1,28 @@
+"""
+Pydantic schemas for Task model.
+"""
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+from app.models.task import TaskStatus
+from app.schemas.application import ApplicationResponse
+
+
+class TaskResponse(BaseModel):
+    id: str
+    kind: str
+    status: TaskStatus
+    stage: Optional[str]
+    progress: Optional[dict]
+    attempts: int
+    max_attempts: int
+    cancel_requested: bool
+    error: Optional[str]
+    result: Optional[dict]
+    application: Optional[ApplicationResponse]
+    created_at: Optional[datetime]
+    started_at: Optional[datetime]
+    finished_at: Optional[datetime]
+
+    class Config:
+        from_attributes = True
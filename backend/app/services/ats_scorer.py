@@ -0,0 +1,314 @@
+"""
+Deterministic local ATS scorer.
+
+Scores a parsed resume against a parsed job description without calling the
+LLM, using the same weighting the ATS prompt describes:
+
+- keyword match (40%): the JD's most important terms (TF-IDF weighted, by the
+  section they appear in) and how often the resume uses them, saturated BM25-style
+- content relevance (30%): TF-IDF cosine of the experience/projects sections
+  against the JD, optionally blended with embedding similarity
+- technical skills (20%): coverage of the JD's required skills (see
+  skill_taxonomy) by the skills section
+- formatting and impact (10%): core sections present, quantified bullet points
+
+The result has the same shape as the LLM scorer (`score`, `improvements`,
+`keyword_match_analysis`, `section_scores`), and identical inputs always give
+identical scores. Set ATS_SCORER=llm to use `calculate_ats_score` instead.
+
+Configure via env vars: ATS_SCORER (local | llm), ATS_EMBEDDING_WEIGHT (0-1).
+"""
+import os
+import re
+import logging
+from collections import Counter
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from app.db.database import SessionLocal
+from app.services import embedding_store, skill_taxonomy
+from app.services.resume_processor import calculate_ats_score
+
+logger = logging.getLogger(__name__)
+
+ATS_SCORER = os.getenv("ATS_SCORER", "local").lower()
+# Share of content relevance taken from embedding similarity (0 disables the embedding call)
+ATS_EMBEDDING_WEIGHT = min(1.0, max(0.0, float(os.getenv("ATS_EMBEDDING_WEIGHT", "0"))))
+
+# Score component weights, as in ATS_EVALUATION_PROMPT
+WEIGHTS = {"keywords": 0.4, "relevance": 0.3, "skills": 0.2, "format": 0.1}
+# How much a JD term counts depending on the section it appears in
+JD_SECTION_WEIGHTS = {
+    "job_title": 1.5,
+    "requirements": 1.0,
+    "qualifications": 1.0,
+    "preferred_skills": 0.6,
+    "responsibilities": 0.7,
+    "description": 0.8,
+}
+# JD sections whose terms are treated as required skills
+SKILL_SECTIONS = ("requirements", "qualifications", "preferred_skills")
+# Number of top-weighted JD terms treated as keywords
+TOP_KEYWORDS = 25
+# Relative weight of two-word phrases, which are sparser and noisier than single terms
+BIGRAM_WEIGHT = 0.5
+# BM25 term-frequency saturation; lower values reward the first mention more
+BM25_K1 = 0.5
+# TF-IDF cosine at which section relevance is considered full
+RELEVANCE_FULL_AT = 0.35
+CORE_SECTIONS = ("experience", "education", "skills")
+
+# Resume keys that are not content
+_IGNORED_RESUME_KEYS = {"personal_info", "basics", "base_score", "modifications_summary"}
+_SECTION_ALIASES = {
+    "work_experience": "experience",
+    "professional_experience": "experience",
+    "work": "experience",
+    "technical_skills": "skills",
+    "summary": "summary",
+    "objective": "summary",
+    "certificates": "certifications",
+    "awards": "achievements",
+}
+
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#]*(?:[./-][a-z0-9+#]+)*")
+# Phrase boundaries; bigrams never span them
+_PHRASE_SPLIT_RE = re.compile(r"[.,;:!?()\[\]{}|•\n]+(?:\s|$)|[;:!?()\[\]{}|•\n]")
+_STOPWORDS = frozenset("""
+a an and are as at be been being by for from has have had in is it its of on or that the to was were will
+with you your we our they their this these those i me my he she them us not but if then than so such can
+may must should would could into over under about across per via etc also more most other any all each
+both either within without upon using use used new well able including include includes like etc
+experience experiences years year ability strong work working works team teams required requirements
+preferred plus knowledge skills skill understanding responsibilities responsibility qualifications
+qualification role position candidate candidates job company environment excellent good great ideal
+senior junior lead staff principal sr jr mid level entry development
+""".split())
+
+
+def _is_term(word: str) -> bool:
+    return word not in _STOPWORDS and len(word) > 1 and any(c.isalpha() for c in word)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased terms: unigrams without stopwords plus bigrams of adjacent content words in a phrase."""
+    terms = []
+    for phrase in _PHRASE_SPLIT_RE.split(text.lower()):
+        words = _TOKEN_RE.findall(phrase)
+        terms.extend(w for w in words if _is_term(w))
+        terms.extend(f"{a} {b}" for a, b in zip(words, words[1:]) if _is_term(a) and _is_term(b))
+    return terms
+
+
+def _flatten(value: Any) -> List[str]:
+    """All string leaves of a parsed JSON value, in order."""
+    if isinstance(value, str):
+        return [value] if value.strip() else []
+    if isinstance(value, dict):
+        return [s for v in value.values() for s in _flatten(v)]
+    if isinstance(value, (list, tuple)):
+        return [s for v in value for s in _flatten(v)]
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return [str(value)]
+    return []
+
+
+def resume_sections(resume: Dict[str, Any]) -> Dict[str, str]:
+    """Map normalized section names (experience, skills, ...) to their flattened text."""
+    sections: Dict[str, List[str]] = {}
+    for key, value in resume.items():
+        if key in _IGNORED_RESUME_KEYS:
+            continue
+        name = key.lower().strip().replace(" ", "_")
+        name = _SECTION_ALIASES.get(name, name)
+        # Category names carry information in a skills section ("Cloud Platforms": [...])
+        parts = _flatten(list(value.keys()) + list(value.values())) if name == "skills" and isinstance(value, dict) \
+            else _flatten(value)
+        sections.setdefault(name, []).extend(parts)
+    return {name: "\n".join(parts) for name, parts in sections.items() if parts}
+
+
+def _bullets(resume: Dict[str, Any]) -> List[str]:
+    """Bullet-point strings from the experience and projects entries."""
+    bullets = []
+    for key in ("experience", "projects"):
+        for entry in resume.get(key) or []:
+            if isinstance(entry, dict):
+                for field in ("details", "highlights", "bullets", "description", "achievements"):
+                    value = entry.get(field)
+                    if isinstance(value, list):
+                        bullets.extend(s for s in value if isinstance(s, str) and s.strip())
+    return bullets
+
+
+def _job_documents(job_description: Dict[str, Any]) -> Dict[str, str]:
+    docs = {}
+    for key in JD_SECTION_WEIGHTS:
+        text = " ".join(_flatten(job_description.get(key)))
+        if text:
+            docs[key] = text
+    return docs
+
+
+def _tfidf(counts: List[Counter], vocabulary: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """Term-count matrix for the documents and smoothed IDF over them."""
+    index = {term: i for i, term in enumerate(vocabulary)}
+    matrix = np.zeros((len(counts), len(vocabulary)), dtype=np.float64)
+    for row, counter in enumerate(counts):
+        for term, count in counter.items():
+            matrix[row, index[term]] = count
+    doc_freq = (matrix > 0).sum(axis=0)
+    idf = np.log((1 + len(counts)) / (1 + doc_freq)) + 1.0
+    return matrix, idf
+
+
+def _embedding_similarity(resume_text: str, job_text: str) -> float:
+    db = SessionLocal()
+    try:
+        resume_vector, job_vector = embedding_store.get_pooled_embeddings(db, [resume_text, job_text])
+        if resume_vector is None or job_vector is None:
+            return 0.0
+        return max(0.0, embedding_store.cosine_similarity(resume_vector, job_vector))
+    finally:
+        db.close()
+
+
+def score_resume(resume: Dict[str, Any], job_description: Dict[str, Any]) -> Dict[str, Any]:
+    """Score a parsed resume against parsed JD sections; deterministic for identical inputs."""
+    sections = resume_sections(resume)
+    job_docs = _job_documents(job_description)
+    if not job_docs:
+        job_docs = {"description": " ".join(_flatten(job_description))}
+
+    section_names = list(sections)
+    resume_counts = [Counter(tokenize(sections[name])) for name in section_names]
+    job_counts = [Counter(tokenize(job_docs[name])) for name in job_docs]
+    vocabulary = sorted(set().union(*resume_counts, *job_counts)) if (resume_counts or job_counts) else []
+    if not vocabulary:
+        return _result(0, [], [], {}, ["Add content that reflects the job description"])
+
+    matrix, idf = _tfidf(resume_counts + job_counts, vocabulary)
+    resume_matrix, job_matrix = matrix[:len(section_names)], matrix[len(section_names):]
+
+    # JD term importance: section-weighted term frequency x IDF
+    section_weights = np.array([JD_SECTION_WEIGHTS.get(name, 0.8) for name in job_docs])[:, None]
+    is_bigram = np.array([" " in term for term in vocabulary])
+    term_weights = (job_matrix * section_weights).sum(axis=0) * idf * np.where(is_bigram, BIGRAM_WEIGHT, 1.0)
+
+    # Keywords: the top-weighted JD terms (stable sort keeps ties in vocabulary order)
+    order = np.argsort(-term_weights, kind="stable")
+    keyword_idx = [int(i) for i in order[:TOP_KEYWORDS] if term_weights[i] > 0]
+    weights = term_weights[keyword_idx]
+
+    resume_tf = resume_matrix.sum(axis=0)[keyword_idx] if len(section_names) else np.zeros(len(keyword_idx))
+    saturation = resume_tf * (BM25_K1 + 1) / (resume_tf + BM25_K1) / (BM25_K1 + 1)
+    keyword_score = float((weights * saturation).sum() / weights.sum()) if weights.sum() else 0.0
+    matched = [vocabulary[i] for i, tf in zip(keyword_idx, resume_tf) if tf > 0]
+    missing = [vocabulary[i] for i, tf in zip(keyword_idx, resume_tf) if tf == 0]
+
+    # Content relevance: cosine of every resume section against the JD in one product
+    relevance_by_section = {}
+    if section_names:
+        cosines = embedding_store.cosine_scores(resume_matrix * idf, term_weights)
+        relevance_by_section = {name: float(c) for name, c in zip(section_names, cosines)}
+    work = [relevance_by_section[n] for n in ("experience", "projects") if n in relevance_by_section]
+    content_cosine = max(work) if work else max(relevance_by_section.values(), default=0.0)
+    relevance_score = min(1.0, content_cosine / RELEVANCE_FULL_AT)
+    if ATS_EMBEDDING_WEIGHT > 0:
+        try:
+            similarity = _embedding_similarity("\n".join(sections.values()), "\n".join(job_docs.values()))
+            relevance_score = (1 - ATS_EMBEDDING_WEIGHT) * relevance_score + ATS_EMBEDDING_WEIGHT * similarity
+        except Exception as e:
+            logger.warning(f"Embedding similarity unavailable for ATS scoring: {e}")
+
+    # Technical skills: required skills listed in the skills section count fully, elsewhere half.
+    # Skills come from the taxonomy; postings it finds none in fall back to the required-section keywords.
+    required_text = "\n".join(job_docs[name] for name in SKILL_SECTIONS if name in job_docs)
+    job_skills = list(skill_taxonomy.find_skills(required_text or "\n".join(job_docs.values())))
+    job_rows = [row for row, name in enumerate(job_docs) if name in SKILL_SECTIONS]
+    required = job_matrix[job_rows].sum(axis=0) > 0 if job_rows else np.ones(len(vocabulary), dtype=bool)
+    skill_pos = [pos for pos, i in enumerate(keyword_idx) if required[i]]
+    skills_row = resume_matrix[section_names.index("skills")] if "skills" in sections else np.zeros(len(vocabulary))
+    listed_elsewhere = []
+    if job_skills:
+        listed = skill_taxonomy.find_skills(sections.get("skills", ""))
+        mentioned = skill_taxonomy.find_skills("\n".join(sections.values()))
+        credit = [1.0 if s in listed else 0.5 if s in mentioned else 0.0 for s in job_skills]
+        skills_score = sum(credit) / len(credit)
+        if "skills" in sections:
+            listed_elsewhere = [s for s, c in zip(job_skills, credit) if c == 0.5]
+    elif skill_pos:
+        skill_idx = [keyword_idx[pos] for pos in skill_pos]
+        credit = np.where(skills_row[skill_idx] > 0, 1.0, np.where(resume_tf[skill_pos] > 0, 0.5, 0.0))
+        skills_score = float((weights[skill_pos] * credit).sum() / weights[skill_pos].sum())
+        if "skills" in sections:
+            listed_elsewhere = [vocabulary[i] for i, c in zip(skill_idx, credit) if c == 0.5 and " " not in vocabulary[i]]
+    else:
+        skills_score = keyword_score
+
+    # Formatting and impact
+    bullets = _bullets(resume)
+    quantified = [b for b in bullets if re.search(r"\d", b)]
+    present = [s for s in CORE_SECTIONS if s in sections]
+    quantified_ratio = len(quantified) / len(bullets) if bullets else 0.0
+    format_score = 0.5 * len(present) / len(CORE_SECTIONS) + 0.2 * bool(bullets) + 0.3 * min(1.0, quantified_ratio / 0.6)
+
+    score = 100 * (
+        WEIGHTS["keywords"] * keyword_score
+        + WEIGHTS["relevance"] * relevance_score
+        + WEIGHTS["skills"] * skills_score
+        + WEIGHTS["format"] * format_score
+    )
+
+    improvements = []
+    if missing:
+        improvements.append(
+            f"Work these job keywords into your experience or skills where accurate: {', '.join(missing[:8])}"
+        )
+    if listed_elsewhere:
+        improvements.append(f"List these skills explicitly in the skills section: {', '.join(listed_elsewhere[:6])}")
+    for section in CORE_SECTIONS:
+        if section not in sections:
+            improvements.append(f"Add a clearly headed {section} section")
+    if bullets and quantified_ratio < 0.5:
+        improvements.append(
+            f"Quantify more achievements: {len(quantified)} of {len(bullets)} bullet points include a metric"
+        )
+    if relevance_score < 0.5:
+        title = job_description.get("job_title") or "this role"
+        improvements.append(f"Lead with the experience and projects most relevant to {title}")
+
+    # Having an education section earns half; relevance to the JD earns the rest
+    education_score = 0.5 + 0.5 * min(1.0, relevance_by_section["education"] / RELEVANCE_FULL_AT) \
+        if "education" in sections else 0.0
+    section_scores = {
+        "skills_score": round(100 * skills_score),
+        "experience_score": round(100 * relevance_score),
+        "education_score": round(100 * education_score),
+        "overall_format_score": round(100 * format_score),
+    }
+    return _result(int(round(score)), matched, missing, section_scores, improvements[:6])
+
+
+def _result(score: int, matched: List[str], missing: List[str], section_scores: Dict[str, int],
+            improvements: List[str]) -> Dict[str, Any]:
+    total = len(matched) + len(missing)
+    return {
+        "score": max(0, min(100, score)),
+        "improvements": improvements,
+        "keyword_match_analysis": {
+            "matched_keywords": matched,
+            "missing_keywords": missing,
+            "keyword_match_percentage": round(100 * len(matched) / total) if total else 0,
+        },
+        "section_scores": section_scores,
+        "scorer": "local",
+    }
+
+
+def calculate_ats(resume: Dict[str, Any], job_description: Dict[str, Any], is_optimized: bool = False) -> Dict[str, Any]:
+    """ATS score with the configured scorer: local by default, the LLM when ATS_SCORER=llm."""
+    if ATS_SCORER == "llm":
+        return calculate_ats_score(resume, job_description, is_optimized=is_optimized)
+    return score_resume(resume, job_description)
@@ -0,0 +1,331 @@
+"""
+Local pre-classifier for Gmail scans.
+
+Most mail that matches the Gmail job query is not a status update: job
+alerts, newsletters, recruiting-vendor marketing, credit card "applications".
+Sending each one to the LLM costs a generation per message, so the scan first
+scores every message from its metadata (sender, subject, snippet) with a small
+logistic regression and only fetches and parses the likely ones. Features:
+
+- sender domain rules: applicant tracking systems (greenhouse.io, lever.co,
+  myworkday.com, ...) vs. job boards that mostly send alerts
+- sender role: no-reply, newsletter/marketing, recruiting or support mailbox,
+  a person, a personal (gmail.com, outlook.com, ...) address
+- status phrases ("received your application", "not to move forward",
+  "schedule ... interview", "offer letter"), job vocabulary vs. alert,
+  marketing and non-job application (loan, visa, passport) phrases
+
+Only these hand-picked rules are features, not individual words: word weights
+learned from a small corpus fit its phrasing and misjudge mail written any
+other way. The threshold favours recall, and a screened-out message is not
+recorded as processed, so a full scan with the classifier off or a lower
+threshold still reaches it. Weights live in
+app/services/data/email_classifier.json and are trained on the labelled
+fixture corpus next to it:
+
+    python -m app.services.email_classifier evaluate
+    python -m app.services.email_classifier train
+
+The corpus is synthetic: templated emails (every fourth template held out as
+`test`) plus a hand-written `realistic` split of status emails and look-alikes
+that follow none of the templates, used only for evaluation. `evaluate`
+reports precision and recall on each split, how many LLM calls the
+classifier leaves out of those the keyword query alone sends, and the floor:
+one call per status update. The reduction is therefore bounded by the share
+of status updates among keyword matches. On the templated splits (about one
+match in ten is a status update) the classifier reaches that floor on `test`
+with recall 1.0, about 11x fewer calls; `realistic` is mostly status updates
+by construction, so its 1.6x is its floor too, with precision and recall 1.0.
+An inbox where status updates are a large share of keyword matches sees
+proportionally less. The classifier is on by default; evaluate it on labelled
+mail from real inboxes with --corpus (split "realistic").
+
+Configure via env vars: EMAIL_CLASSIFIER_ENABLED, EMAIL_CLASSIFIER_THRESHOLD,
+EMAIL_CLASSIFIER_PATH.
+"""
+import os
+import re
+import sys
+import json
+import math
+import logging
+import argparse
+import threading
+from dataclasses import dataclass
+from email.utils import parseaddr
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+BUILTIN_MODEL_PATH = os.path.join(_DATA_DIR, "email_classifier.json")
+CORPUS_PATH = os.path.join(_DATA_DIR, "email_corpus.jsonl")
+
+EMAIL_CLASSIFIER_ENABLED = os.getenv("EMAIL_CLASSIFIER_ENABLED", "true").lower() == "true"
+EMAIL_CLASSIFIER_PATH = os.getenv("EMAIL_CLASSIFIER_PATH") or BUILTIN_MODEL_PATH
+# Overrides the threshold stored with the model
+EMAIL_CLASSIFIER_THRESHOLD = os.getenv("EMAIL_CLASSIFIER_THRESHOLD")
+
+# Bump when features change: weights trained on other features are then refused
+FEATURE_VERSION = 3
+# Stored threshold: below the class-balanced 0.5, since unseen phrasings of status emails score lower
+DEFAULT_THRESHOLD = 0.3
+# Training recall the stored threshold must reach
+TARGET_RECALL = 0.99
+
+ATS_DOMAINS = (
+    "greenhouse.io", "greenhouse-mail.io", "lever.co", "myworkday.com", "myworkdayjobs.com", "workday.com",
+    "ashbyhq.com", "smartrecruiters.com", "icims.com", "jobvite.com", "taleo.net", "successfactors.com",
+    "bamboohr.com", "workable.com", "recruitee.com", "breezy.hr", "applytojob.com", "jazzhr.com",
+    "paylocity.com", "eightfold.ai", "phenompeople.com", "amazon.jobs", "gem.com", "goodtime.io",
+    # Assessment and interview vendors, which write on behalf of a hiring company
+    "hackerrank.com", "codesignal.com", "codility.com", "hirevue.com",
+)
+JOB_BOARD_DOMAINS = (
+    "linkedin.com", "indeed.com", "glassdoor.com", "ziprecruiter.com", "monster.com", "dice.com",
+    "wellfound.com", "angel.co", "hired.com", "builtin.com", "joinhandshake.com", "simplyhired.com",
+    "otta.com", "welcometothejungle.com",
+)
+# Personal mailboxes: mostly friends and family, whose mail mentions interviews and offers in passing
+FREEMAIL_DOMAINS = (
+    "gmail.com", "googlemail.com", "yahoo.com", "outlook.com", "hotmail.com", "live.com", "icloud.com", "me.com",
+    "aol.com", "proton.me", "protonmail.com",
+)
+
+_SENDER_ROLES = {
+    "noreply": re.compile(r"no[-._]?reply|do[-._]?not[-._]?reply|notifications?|alerts?"),
+    "bulk": re.compile(r"news|newsletter|digest|marketing|promo|deals|offers|store|hello|info|events?|team"),
+    "recruiting": re.compile(r"careers?|jobs?|recruit(?:ing|er|ment)?|talent|hiring|people|hr"),
+    "support": re.compile(r"support|help|feedback|billing"),
+}
+# Mailboxes of ATS integrations sending from the company's own domain (workday@company.com)
+_ATS_SENDER_RE = re.compile(r"workday|greenhouse|lever|icims|taleo|successfactors|smartrecruiters|hcm")
+_PERSON_RE = re.compile(r"^[a-z]+[._][a-z]+$")
+
+_PHRASES = {
+    "status_update": ("application status", "status of your application", "update on your", "update regarding your",
+                      "candidate status", "candidate dashboard", "candidate home", "candidate portal",
+                      "your candidacy", "your application for", "your application to", "your submission",
+                      "application update", "your application was sent", "application submitted"),
+    "applied": ("received your application", "thank you for applying", "thanks for applying",
+                "application has been submitted", "application received", "thank you for submitting your application",
+                "confirms we received", "thanks for your interest in", "thank you for your interest in",
+                "sent your application", "application has been sent", "application was delivered", "you applied"),
+    "interview": ("schedule", "availability", "phone screen", "next step", "move forward with your",
+                  "invite you to interview", "interview is confirmed", "interview confirmed", "interview stage",
+                  "hiring manager", "set up a call", "select times", "pick a time", "technical screen",
+                  "onsite", "on-site", "video interview", "on-demand interview", "next round", "panel",
+                  "intro call", "first conversation", "free tuesday", "are you free"),
+    "assessment": ("coding assessment", "online assessment", "take-home", "coding challenge", "hackerrank",
+                   "codesignal", "invited you to a test", "invites you to take", "certified assessment"),
+    "rejection": ("unfortunately", "not to move forward", "not moving forward", "won't be moving forward",
+                  "other candidates", "another candidate", "position has been filled", "regret to inform",
+                  "after careful consideration", "not able to offer", "not to proceed", "decided to proceed with",
+                  "moving ahead with other", "role has been closed", "filled this role", "with another"),
+    "offer": ("offer letter", "extend you an offer", "pleased to offer", "make you an offer", "verbal offer",
+              "sign your offer", "offer stage", "accepting your offer", "employment offer", "employment agreement",
+              "start date"),
+    "alert": ("job alert", "new jobs", "jobs you may", "recommended jobs", "is hiring", "are hiring", "apply now",
+              "easy apply", "jobs match", "jobs that match", "similar jobs", "viewed your profile", "one click",
+              "one-click"),
+    "marketing": ("% off", "save ", "deal", "webinar", "limited time", "limited-time", "ends tonight", "ends soon",
+                  "free for", "premium", "subscribe", "register", "rsvp", "report", "shop now",
+                  "your ticket", "doors open"),
+    "job_context": ("position", " role", "candidate", "recruit", "talent", "career", "job", "hiring", "employment",
+                    "thank you for applying", "thanks for applying"),
+    "non_job_application": ("credit card", "card application", "loan application", "mortgage", "rental application",
+                            "permit application", "oauth application", "app update", "app submission",
+                            "admissions", "financial aid", "your app ", "reservation", "case status", "pipeline",
+                            "loan", "visa application", "passport", "scholarship", "grant application",
+                            "lease application", "your lease"),
+}
+
+
+def _domain_matches(domain: str, domains: Iterable[str]) -> bool:
+    return any(domain == d or domain.endswith("." + d) for d in domains)
+
+
+def extract_features(sender: str, subject: str, snippet: str) -> List[str]:
+    """Binary feature names for one message."""
+    _, address = parseaddr(sender or "")
+    local, _, domain = address.lower().rpartition("@")
+    features = []
+    if _domain_matches(domain, ATS_DOMAINS) or _ATS_SENDER_RE.search(local):
+        features.append("domain:ats")
+    elif _domain_matches(domain, JOB_BOARD_DOMAINS):
+        features.append("domain:job_board")
+    elif domain.endswith((".edu", ".gov")):
+        features.append("domain:institution")
+    elif _domain_matches(domain, FREEMAIL_DOMAINS):
+        features.append("domain:freemail")
+    for role, pattern in _SENDER_ROLES.items():
+        if pattern.search(local):
+            features.append(f"sender:{role}")
+    if _PERSON_RE.match(local) and not any(f.startswith("sender:") for f in features):
+        features.append("sender:person")
+
+    subject = (subject or "").lower()
+    text = f"{subject}\n{(snippet or '').lower()}"
+    if re.match(r"(?:re|fwd?):", subject):
+        features.append("subject:reply")
+    for group, phrases in _PHRASES.items():
+        if any(phrase in text for phrase in phrases):
+            features.append(f"phrase:{group}")
+    return features
+
+
+@dataclass
+class EmailClassifier:
+    weights: Dict[str, float]
+    bias: float
+    threshold: float
+
+    def score(self, sender: str, subject: str, snippet: str) -> float:
+        """Probability that the message is a job application status update."""
+        z = self.bias + sum(self.weights.get(f, 0.0) for f in extract_features(sender, subject, snippet))
+        return 1.0 / (1.0 + math.exp(-max(-50.0, min(50.0, z))))
+
+    def is_candidate(self, sender: str, subject: str, snippet: str) -> bool:
+        return self.score(sender, subject, snippet) >= self.threshold
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            "version": FEATURE_VERSION,
+            "threshold": round(self.threshold, 4),
+            "bias": round(self.bias, 4),
+            "weights": {f: round(w, 4) for f, w in sorted(self.weights.items())},
+        }
+
+
+def load_classifier(path: str) -> EmailClassifier:
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    if data.get("version") != FEATURE_VERSION:
+        raise ValueError(f"model was trained for feature version {data.get('version')}, not {FEATURE_VERSION}")
+    return EmailClassifier(dict(data["weights"]), float(data["bias"]), float(data["threshold"]))
+
+
+def load_corpus(path: str = CORPUS_PATH) -> List[Dict[str, Any]]:
+    """Labelled examples: {"sender", "subject", "snippet", "label" (1 = status update), "split", "kind"}."""
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def train(examples: List[Dict[str, Any]], l2: float = 0.001, epochs: int = 2000,
+          learning_rate: float = 0.5) -> EmailClassifier:
+    """
+    Fit an L2-regularized logistic regression by full-batch gradient descent,
+    with positives weighted up to balance the classes. The threshold is
+    DEFAULT_THRESHOLD, lowered if needed to reach TARGET_RECALL on the training examples.
+    """
+    rows = [extract_features(e["sender"], e["subject"], e["snippet"]) for e in examples]
+    vocabulary = sorted({f for row in rows for f in row})
+    index = {f: i for i, f in enumerate(vocabulary)}
+    x = np.zeros((len(rows), len(vocabulary)))
+    for i, row in enumerate(rows):
+        x[i, [index[f] for f in row]] = 1.0
+    y = np.array([float(e["label"]) for e in examples])
+    positives = max(1.0, y.sum())
+    sample_weight = np.where(y == 1, (len(y) - positives) / positives, 1.0)
+    sample_weight /= sample_weight.sum()
+
+    w = np.zeros(len(vocabulary))
+    b = 0.0
+    for _ in range(epochs):
+        p = 1.0 / (1.0 + np.exp(-(x @ w + b)))
+        error = (p - y) * sample_weight
+        w -= learning_rate * (x.T @ error + l2 * w)
+        b -= learning_rate * error.sum()
+
+    scores = np.sort(1.0 / (1.0 + np.exp(-(x[y == 1] @ w + b))))
+    missed = int(len(scores) * (1 - TARGET_RECALL))
+    threshold = float(min(DEFAULT_THRESHOLD, scores[missed] * 0.9)) if len(scores) else DEFAULT_THRESHOLD
+    # Drop weights too small to matter, to keep the model file readable
+    weights = {f: float(v) for f, v in zip(vocabulary, w) if abs(v) >= 0.01}
+    return EmailClassifier(weights, float(b), threshold)
+
+
+def evaluate(classifier: EmailClassifier, examples: List[Dict[str, Any]]) -> Dict[str, float]:
+    """
+    Precision and recall on `examples`, and the LLM calls left over the
+    keyword-query baseline and over the floor of one per status update.
+    """
+    tp = fp = fn = 0
+    for e in examples:
+        predicted = classifier.is_candidate(e["sender"], e["subject"], e["snippet"])
+        tp += predicted and e["label"] == 1
+        fp += predicted and e["label"] == 0
+        fn += not predicted and e["label"] == 1
+    return {
+        "examples": len(examples),
+        "precision": tp / (tp + fp) if tp + fp else 1.0,
+        "recall": tp / (tp + fn) if tp + fn else 1.0,
+        "llm_calls": tp + fp,
+        "llm_calls_keyword_only": len(examples),
+        "llm_calls_needed": tp + fn,
+    }
+
+
+_classifier: Optional[EmailClassifier] = None
+_classifier_loaded = False
+_classifier_lock = threading.Lock()
+
+
+def get_classifier() -> Optional[EmailClassifier]:
+    """The process-wide classifier, loaded on first use; None if disabled or it cannot be loaded."""
+    global _classifier, _classifier_loaded
+    if not _classifier_loaded:
+        with _classifier_lock:
+            if not _classifier_loaded:
+                if EMAIL_CLASSIFIER_ENABLED:
+                    try:
+                        _classifier = load_classifier(EMAIL_CLASSIFIER_PATH)
+                        if EMAIL_CLASSIFIER_THRESHOLD:
+                            _classifier.threshold = float(EMAIL_CLASSIFIER_THRESHOLD)
+                    except (OSError, ValueError, KeyError) as e:
+                        logger.error(f"Could not load email classifier from {EMAIL_CLASSIFIER_PATH}: {e}; "
+                                     f"every message will be parsed by the LLM")
+                _classifier_loaded = True
+    return _classifier
+
+
+def _print_report(name: str, report: Dict[str, float]) -> None:
+    reduction = report["llm_calls_keyword_only"] / max(1, report["llm_calls"])
+    print(f"{name:9s}: {report['examples']:4d} emails | precision {report['precision']:.3f} | "
+          f"recall {report['recall']:.3f} | LLM calls {report['llm_calls']} vs {report['llm_calls_keyword_only']} "
+          f"with the keyword query alone ({reduction:.1f}x fewer, at most "
+          f"{report['llm_calls_keyword_only'] / max(1, report['llm_calls_needed']):.1f}x)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Train or evaluate the Gmail pre-classifier")
+    parser.add_argument("command", choices=["train", "evaluate"])
+    parser.add_argument("--corpus", default=CORPUS_PATH, help="Labelled JSONL corpus")
+    parser.add_argument("--model", default=EMAIL_CLASSIFIER_PATH, help="Model file to write or read")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    train_set = [e for e in corpus if e.get("split") == "train"]
+    test_set = [e for e in corpus if e.get("split") == "test"]
+    realistic_set = [e for e in corpus if e.get("split") == "realistic"]
+    if args.command == "train":
+        classifier = train(train_set)
+        with open(args.model, "w", encoding="utf-8") as f:
+            json.dump(classifier.to_json(), f, indent=1)
+            f.write("\n")
+        print(f"Wrote {args.model}: {len(classifier.weights)} weights, threshold {classifier.threshold:.3f}")
+    else:
+        classifier = load_classifier(args.model)
+    _print_report("train", evaluate(classifier, train_set))
+    reports = [evaluate(classifier, test_set)]
+    _print_report("test", reports[0])
+    if realistic_set:
+        reports.append(evaluate(classifier, realistic_set))
+        _print_report("realistic", reports[-1])
+    sys.exit(0 if all(report["recall"] >= 0.9 for report in reports) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -212,7 +212,7 @@ Subject: [subject line]
 [email body with complete signature]
 """
         try:
-            return _ollama_generate(prompt=prompt, system_prompt=system_instruction) or "Failed to generate email"
+            return _ollama_generate(prompt=prompt, system_prompt=system_instruction, use_cache=False) or "Failed to generate email"
         except Exception as e:
             logger.error(f"AI email generation error: {str(e)}")
             raise RuntimeError(f"Email generation failed: {str(e)}") from e
@@ -0,0 +1,217 @@
+"""
+Persistent embedding store.
+
+Vectors are cached in the `embeddings` table keyed by (SHA-256 of the text,
+OLLAMA_EMBED_MODEL) and stored as float32 blobs. Editing a job description or
+resume, or switching embed model, changes the key, so stale vectors are never
+served and no explicit invalidation is needed.
+
+Long documents are split on section boundaries into chunks that are embedded
+(and cached) individually, so nothing past a fixed character limit is lost.
+A document is then represented by its chunk matrix, or by the mean of its
+normalized chunk vectors where a single vector is needed (ranking, ANN index).
+"""
+import re
+import hashlib
+import logging
+from typing import Dict, List
+
+import numpy as np
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.db.database import SessionLocal
+from app.models.embedding import Embedding
+from app.models.job import Job
+from app.models.resume import Resume
+from app.services.ollama_client import OLLAMA_EMBED_MODEL, embed_texts
+
+logger = logging.getLogger(__name__)
+
+# Longest free-text query accepted for similarity search
+MAX_EMBED_CHARS = 8000
+# Target chunk size; sections longer than this are split further
+CHUNK_MAX_CHARS = 1500
+# Upper bound on chunks per document, to cap embedding cost on pathological inputs
+MAX_CHUNKS = 32
+
+# A line that starts a new section: markdown headings, short ALL-CAPS lines, or short "Heading:" lines
+_HEADING_RE = re.compile(r"^\s*(#{1,6}\s+\S.*|[A-Z][A-Z0-9 &/,()-]{2,60}:?|[A-Z][\w &/,()-]{2,60}:)\s*$")
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def job_embedding_text(job: Job) -> str:
+    return f"{job.title or ''} {job.description or ''}".strip()
+
+
+def resume_embedding_text(resume: Resume) -> str:
+    return (resume.raw_text or "").strip()
+
+
+def _split_long(text: str, limit: int) -> List[str]:
+    """Split text longer than `limit` at sentence or whitespace boundaries."""
+    pieces = []
+    while len(text) > limit:
+        window = text[:limit]
+        cut = max(window.rfind(". "), window.rfind("\n"))
+        if cut < limit // 2:
+            cut = window.rfind(" ")
+        if cut <= 0:
+            cut = limit - 1
+        pieces.append(text[:cut + 1].strip())
+        text = text[cut + 1:].strip()
+    if text:
+        pieces.append(text)
+    return pieces
+
+
+def chunk_text(text: str, max_chars: int = CHUNK_MAX_CHARS, max_chunks: int = MAX_CHUNKS) -> List[str]:
+    """
+    Split a document into section-aligned chunks of at most `max_chars`.
+
+    Sections start at heading-like lines; consecutive short sections are packed
+    together so a chunk is as close to `max_chars` as possible.
+    """
+    sections, current = [], []
+    for line in text.splitlines():
+        if _HEADING_RE.match(line) and any(l.strip() for l in current):
+            sections.append("\n".join(current).strip())
+            current = []
+        current.append(line)
+    sections.append("\n".join(current).strip())
+
+    chunks, buffer = [], ""
+    for section in filter(None, sections):
+        # Fold a short leftover (e.g. a lone title line) into the next section rather than emitting it alone
+        if buffer and len(buffer) < max_chars // 5:
+            section, buffer = f"{buffer}\n\n{section}", ""
+        for piece in _split_long(section, max_chars):
+            if buffer and len(buffer) + len(piece) + 2 > max_chars:
+                chunks.append(buffer)
+                buffer = ""
+            buffer = f"{buffer}\n\n{piece}" if buffer else piece
+    if buffer:
+        chunks.append(buffer)
+    return chunks[:max_chunks]
+
+
+def _to_blob(vector) -> bytes:
+    return np.asarray(vector, dtype=np.float32).tobytes()
+
+
+def _from_blob(blob: bytes) -> np.ndarray:
+    return np.frombuffer(blob, dtype=np.float32)
+
+
+def get_embeddings(db: Session, texts: List[str], persist: bool = True) -> List[np.ndarray]:
+    """
+    Return a float32 vector for every text, in order. Cached vectors are loaded
+    in one query; the misses are embedded together in a single Ollama call.
+    With persist=False the misses are not stored (e.g. one-off search queries).
+    """
+    hashes = [content_hash(t) for t in texts]
+    found: Dict[str, np.ndarray] = {}
+    unique_hashes = list(dict.fromkeys(hashes))
+    if unique_hashes:
+        rows = db.query(Embedding.content_hash, Embedding.vector).filter(
+            Embedding.model == OLLAMA_EMBED_MODEL,
+            Embedding.content_hash.in_(unique_hashes)
+        ).all()
+        found = {h: _from_blob(v) for h, v in rows}
+
+    missing = {h: t for h, t in zip(hashes, texts) if h not in found}
+    if missing:
+        vectors = embed_texts(list(missing.values()))
+        for h, vector in zip(missing.keys(), vectors):
+            found[h] = np.asarray(vector, dtype=np.float32)
+            if persist:
+                db.add(Embedding(
+                    content_hash=h,
+                    model=OLLAMA_EMBED_MODEL,
+                    dim=len(vector),
+                    vector=_to_blob(vector)
+                ))
+        if persist:
+            try:
+                db.commit()
+            except IntegrityError:
+                # Another request stored the same vector first; ours is identical
+                db.rollback()
+
+    return [found[h] for h in hashes]
+
+
+def get_embedding(db: Session, text: str) -> np.ndarray:
+    return get_embeddings(db, [text])[0]
+
+
+def get_chunk_embeddings(db: Session, documents: List[str], persist: bool = True) -> List[np.ndarray]:
+    """
+    Return an (n_chunks, dim) matrix per document. Chunks of all documents are
+    looked up together and any misses are embedded in one batched call.
+    """
+    chunked = [chunk_text(doc) for doc in documents]
+    vectors = get_embeddings(db, [c for chunks in chunked for c in chunks], persist)
+    matrices, offset = [], 0
+    for chunks in chunked:
+        matrices.append(np.vstack(vectors[offset:offset + len(chunks)]) if chunks else None)
+        offset += len(chunks)
+    return matrices
+
+
+def pool_chunks(matrix: np.ndarray) -> np.ndarray:
+    """Mean-pool normalized chunk vectors into one document vector."""
+    return normalize_rows(normalize_rows(matrix).mean(axis=0))
+
+
+def get_pooled_embeddings(db: Session, documents: List[str], persist: bool = True) -> List[np.ndarray]:
+    return [pool_chunks(m) if m is not None else None for m in get_chunk_embeddings(db, documents, persist)]
+
+
+def chunk_match_similarity(job_chunks: np.ndarray, resume_chunks: np.ndarray) -> float:
+    """
+    Chunk-to-chunk similarity: each job chunk is scored by its best-matching
+    resume chunk, and the scores are averaged, so every requirements section
+    counts even when the resume covers it in only one place.
+    """
+    similarities = normalize_rows(job_chunks) @ normalize_rows(resume_chunks).T
+    return float(similarities.max(axis=1).mean())
+
+
+def cosine_similarity(a: np.ndarray, b: np.ndarray) -> float:
+    norm = float(np.linalg.norm(a) * np.linalg.norm(b))
+    return float(np.dot(a, b) / norm) if norm else 0.0
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """L2-normalize each row; all-zero rows stay zero."""
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.where(norms == 0, 1.0, norms)
+
+
+def cosine_scores(matrix: np.ndarray, query: np.ndarray) -> np.ndarray:
+    """Cosine similarity of every row of `matrix` against `query` in one matrix-vector product."""
+    return normalize_rows(matrix) @ normalize_rows(query)
+
+
+def to_match_score(cosine):
+    """Map cosine similarity to a 0-100 score (embeddings for same-language text stay positive)."""
+    return (np.clip(cosine, 0.0, 1.0) * 100).astype(int)
+
+
+def index_resume(resume_id: int) -> None:
+    """Background task: make sure the resume's current text has a stored vector."""
+    db = SessionLocal()
+    try:
+        resume = db.query(Resume).filter(Resume.id == resume_id).first()
+        text = resume_embedding_text(resume) if resume else ""
+        if text:
+            get_chunk_embeddings(db, [text])
+    except Exception as e:
+        logger.warning(f"Failed to embed resume {resume_id}: {e}")
+    finally:
+        db.close()
+
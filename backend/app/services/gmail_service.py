@@ -3,8 +3,9 @@ import json
 import base64
 import logging
 import re
-from typing import List, Dict, Any, Optional
-from datetime import datetime
+import time
+from typing import List, Dict, Any, Optional, Tuple
+from datetime import datetime, timedelta
 
 from google.oauth2.credentials import Credentials
 from googleapiclient.discovery import build
@@ -14,11 +15,30 @@ from sqlalchemy.orm import Session
 from ..models.user import User
 from ..models.application import Application
 from ..models.job import Job, JobStatus
+from ..models.gmail_sync import GmailSyncState, GmailProcessedMessage
 from ..prompts import GMAIL_EMAIL_PARSING_PROMPT
 from .ollama_client import generate_text as _ollama_generate
+from . import email_classifier
 
 logger = logging.getLogger(__name__)
 
+# Messages a full scan lists per run, following result pages
+GMAIL_FULL_SCAN_MAX_MESSAGES = int(os.getenv("GMAIL_FULL_SCAN_MAX_MESSAGES", "500"))
+# messages.get calls per batch HTTP request; Gmail allows 100 but rate limits large batches
+GMAIL_BATCH_SIZE = max(1, min(100, int(os.getenv("GMAIL_BATCH_SIZE", "50"))))
+GMAIL_FETCH_MAX_ATTEMPTS = max(1, int(os.getenv("GMAIL_FETCH_MAX_ATTEMPTS", "4")))
+GMAIL_FETCH_BACKOFF_SECONDS = float(os.getenv("GMAIL_FETCH_BACKOFF_SECONDS", "1.0"))
+# Processed message ids older than this are forgotten; keep it above the longest scan window
+GMAIL_PROCESSED_RETENTION_DAYS = int(os.getenv("GMAIL_PROCESSED_RETENTION_DAYS", "90"))
+
+# Words a job update is searched for: in the Gmail query, and locally for messages found via history
+JOB_KEYWORDS = ("interview", "application", "offer", "rejection", "greenhouse", "lever")
+_JOB_KEYWORDS_RE = re.compile(r"\b(?:" + "|".join(JOB_KEYWORDS) + r")", re.IGNORECASE)
+# Gmail search leaves out drafts, spam and trash; history does not
+_SKIPPED_LABELS = {'DRAFT', 'SPAM', 'TRASH'}
+# Batch entries worth retrying: rate limits and server errors
+_RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
 class GmailService:
     def __init__(self, db: Session):
         self.db = db
@@ -41,53 +61,246 @@ class GmailService:
             logger.error(f"Error building Gmail client for user {user_id}: {str(e)}")
             return None
 
-    def scan_for_updates(self, user_id: int, days_back: int = 7) -> List[Dict[str, Any]]:
+    def scan_for_updates(self, user_id: int, days_back: int = 7, full_scan: bool = False) -> List[Dict[str, Any]]:
         """
-        Scans recent emails for job application updates and updates the database.
+        Scans new emails for job application updates and updates the database.
+
+        Only messages added since the stored history cursor are fetched
+        (users.history.list). The first scan, a `full_scan`, or a cursor Gmail
+        no longer has history for runs a bounded scan of the last `days_back`
+        days instead. Messages scanned before are skipped either way, so each
+        email is parsed once.
         """
         service = self._get_gmail_client(user_id)
         if not service:
             return []
 
         try:
-            # Query for recent emails likely to be job updates
-            after_timestamp = int(datetime.now().timestamp() - days_back * 86400)
-            query = f"after:{after_timestamp} (interview OR application OR offer OR rejection OR greenhouse OR lever)"
-            
-            results = service.users().messages().list(userId='me', q=query).execute()
-            messages = results.get('messages', [])
-            
-            updates = []
-            for msg in messages:
-                msg_id = msg['id']
-                msg_detail = service.users().messages().get(userId='me', id=msg_id, format='full').execute()
-                
-                # Extract snippet and body
-                payload = msg_detail.get('payload', {})
-                body = self._extract_email_body(payload)
-                
-                if not body:
-                    body = msg_detail.get('snippet', '')
-
-                # Parse with Gemini
-                update = self._parse_email_content(body)
-                if update and update.get('is_job_related'):
-                    update['message_id'] = msg_id
-                    update['received_at'] = datetime.fromtimestamp(int(msg_detail['internalDate'])/1000).isoformat()
-                    updates.append(update)
-                    
-                    # Try to update database
-                    self._sync_update_to_db(user_id, update)
-            
+            state = self._get_sync_state(user_id)
+            message_ids = None
+            if state.history_id and not full_scan:
+                message_ids, history_id = self._list_new_message_ids(service, state.history_id)
+            incremental = message_ids is not None
+            if not incremental:
+                message_ids, history_id = self._list_recent_message_ids(service, days_back)
+                state.last_full_scan_at = datetime.now()
+
+            new_ids = self._unprocessed_ids(user_id, message_ids)
+            # History entries are not matched against the search query, so check sender, subject and snippet locally
+            updates, unparsed = self._process_messages(service, user_id, new_ids, check_keywords=incremental)
+
+            # Keep the old cursor while any message still needs parsing, so the next sync lists it again
+            if not unparsed:
+                state.history_id = history_id
+            state.last_synced_at = datetime.now()
+            if not incremental:
+                self._prune_processed(user_id)
+            self.db.commit()
+            logger.info(
+                f"Gmail {'incremental' if incremental else 'full'} sync for user {user_id}: "
+                f"{len(message_ids)} listed, {len(new_ids)} new, {len(updates)} updates, {unparsed} unparsed"
+            )
             return updates
 
         except HttpError as error:
+            # Drop the partial scan (e.g. processed-message rows) so the caller's session stays usable
+            self.db.rollback()
             logger.error(f"An error occurred calling Gmail API: {error}")
             return []
         except Exception as e:
+            # e.g. an IntegrityError on uq_gmail_processed_user_message when two scans of one user overlap
+            self.db.rollback()
             logger.error(f"Unexpected error in scan_for_updates: {str(e)}")
             return []
 
+    def _get_sync_state(self, user_id: int) -> GmailSyncState:
+        state = self.db.query(GmailSyncState).filter(GmailSyncState.user_id == user_id).first()
+        if state is None:
+            state = GmailSyncState(user_id=user_id)
+            self.db.add(state)
+        return state
+
+    def _list_new_message_ids(self, service, start_history_id: str) -> Tuple[Optional[List[str]], Optional[str]]:
+        """
+        Ids of messages added since `start_history_id`, oldest first, and the
+        mailbox's current historyId. (None, None) when the cursor has expired.
+        """
+        message_ids = []
+        page_token = None
+        try:
+            while True:
+                response = service.users().history().list(
+                    userId='me',
+                    startHistoryId=start_history_id,
+                    historyTypes=['messageAdded'],
+                    pageToken=page_token
+                ).execute()
+                for record in response.get('history', []):
+                    for added in record.get('messagesAdded', []):
+                        message = added['message']
+                        if not _SKIPPED_LABELS.intersection(message.get('labelIds', [])):
+                            message_ids.append(message['id'])
+                page_token = response.get('nextPageToken')
+                if not page_token:
+                    return list(dict.fromkeys(message_ids)), response.get('historyId', start_history_id)
+        except HttpError as error:
+            # Gmail keeps history for about a week; an older cursor is answered with 404
+            if error.resp.status == 404:
+                logger.info(f"Gmail history cursor {start_history_id} expired; falling back to a full scan")
+                return None, None
+            raise
+
+    def _list_recent_message_ids(self, service, days_back: int) -> Tuple[List[str], Optional[str]]:
+        """Ids of messages from the last `days_back` days matching the job query, and the cursor to sync on from."""
+        # Read the cursor first: mail arriving while listing is then picked up by the next incremental sync
+        history_id = service.users().getProfile(userId='me').execute().get('historyId')
+
+        after_timestamp = int(datetime.now().timestamp() - days_back * 86400)
+        query = f"after:{after_timestamp} ({' OR '.join(JOB_KEYWORDS)})"
+        message_ids = []
+        page_token = None
+        while len(message_ids) < GMAIL_FULL_SCAN_MAX_MESSAGES:
+            results = service.users().messages().list(
+                userId='me',
+                q=query,
+                maxResults=min(500, GMAIL_FULL_SCAN_MAX_MESSAGES - len(message_ids)),
+                pageToken=page_token
+            ).execute()
+            message_ids.extend(msg['id'] for msg in results.get('messages', []))
+            page_token = results.get('nextPageToken')
+            if not page_token:
+                break
+        if page_token:
+            logger.warning(f"Gmail full scan stopped at GMAIL_FULL_SCAN_MAX_MESSAGES={GMAIL_FULL_SCAN_MAX_MESSAGES}")
+        return message_ids, history_id
+
+    def _unprocessed_ids(self, user_id: int, message_ids: List[str]) -> List[str]:
+        processed = set()
+        # Chunked to stay under the database's bound-parameter limit
+        for i in range(0, len(message_ids), 500):
+            chunk = message_ids[i:i + 500]
+            processed.update(row.message_id for row in self.db.query(GmailProcessedMessage.message_id).filter(
+                GmailProcessedMessage.user_id == user_id,
+                GmailProcessedMessage.message_id.in_(chunk)
+            ))
+        return [msg_id for msg_id in message_ids if msg_id not in processed]
+
+    def _process_messages(self, service, user_id: int, message_ids: List[str],
+                          check_keywords: bool = False) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Fetch, parse and apply messages, oldest first so the latest email sets the status.
+        Headers and snippets are fetched first, and full bodies only for the
+        candidates the local pre-classifier (see email_classifier) keeps.
+        Returns the updates and the number of messages that could not be fetched or parsed.
+        """
+        metadata = self._fetch_messages(service, message_ids, format='metadata', metadataHeaders=['From', 'Subject'])
+        classifier = email_classifier.get_classifier()
+        candidates = []
+        for msg_id in message_ids:
+            msg_meta = metadata.get(msg_id)
+            if msg_meta is None:
+                continue
+            headers = self._headers(msg_meta.get('payload', {}))
+            snippet = msg_meta.get('snippet', '')
+            if check_keywords and not self._mentions_job_keywords(headers, snippet):
+                self._mark_processed(user_id, msg_id, False)
+                continue
+            if classifier and not classifier.is_candidate(headers.get('from', ''), headers.get('subject', ''), snippet):
+                # Not marked processed: a misjudged status email is still reached by a later full scan
+                # once the classifier is off or its threshold lowered
+                continue
+            candidates.append(msg_meta)
+        if classifier and message_ids:
+            logger.info(f"Pre-classifier kept {len(candidates)} of {len(message_ids)} new messages for the LLM")
+        candidates.sort(key=lambda msg_meta: int(msg_meta.get('internalDate', 0)))
+        messages = self._fetch_messages(service, [msg_meta['id'] for msg_meta in candidates], format='full')
+
+        updates = []
+        # Deleted messages come back as None; anything missing altogether could not be fetched
+        unparsed = sum(msg_id not in metadata for msg_id in message_ids)
+        unparsed += sum(msg_meta['id'] not in messages for msg_meta in candidates)
+        for msg_meta in candidates:
+            msg_detail = messages.get(msg_meta['id'])
+            if msg_detail is None:
+                continue
+            msg_id = msg_detail['id']
+            # Extract snippet and body
+            payload = msg_detail.get('payload', {})
+            body = self._extract_email_body(payload)
+
+            if not body:
+                body = msg_detail.get('snippet', '')
+
+            # Parse with Gemini
+            update = self._parse_email_content(body)
+            if update is None:
+                # Left unmarked, so the next scan retries it
+                unparsed += 1
+                continue
+            self._mark_processed(user_id, msg_id, bool(update.get('is_job_related')))
+            if update.get('is_job_related'):
+                update['message_id'] = msg_id
+                update['received_at'] = datetime.fromtimestamp(int(msg_detail['internalDate'])/1000).isoformat()
+                updates.append(update)
+
+                # Try to update database
+                self._sync_update_to_db(user_id, update)
+        return updates, unparsed
+
+    def _fetch_messages(self, service, message_ids: List[str], **params) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        messages.get for many ids, GMAIL_BATCH_SIZE per batch HTTP request instead
+        of one round trip each. Ids rate limited or hit by a server error are
+        retried with backoff; ids that still fail are left out of the result,
+        and deleted messages map to None.
+        """
+        results: Dict[str, Optional[Dict[str, Any]]] = {}
+        pending = list(dict.fromkeys(message_ids))
+        for attempt in range(GMAIL_FETCH_MAX_ATTEMPTS):
+            if not pending:
+                break
+            if attempt:
+                time.sleep(GMAIL_FETCH_BACKOFF_SECONDS * 2 ** (attempt - 1))
+            failed = []
+
+            def collect(request_id, response, exception):
+                if exception is None:
+                    results[request_id] = response
+                elif isinstance(exception, HttpError) and exception.resp.status == 404:
+                    # Deleted since it was listed
+                    results[request_id] = None
+                elif isinstance(exception, HttpError) and exception.resp.status in _RETRYABLE_STATUSES:
+                    failed.append(request_id)
+                else:
+                    logger.warning(f"Fetching Gmail message {request_id} failed: {exception}")
+
+            for i in range(0, len(pending), GMAIL_BATCH_SIZE):
+                batch = service.new_batch_http_request(callback=collect)
+                for msg_id in pending[i:i + GMAIL_BATCH_SIZE]:
+                    batch.add(service.users().messages().get(userId='me', id=msg_id, **params), request_id=msg_id)
+                batch.execute()
+            pending = failed
+        if pending:
+            logger.warning(f"Gave up fetching {len(pending)} Gmail message(s) after {GMAIL_FETCH_MAX_ATTEMPTS} attempts")
+        return results
+
+    def _headers(self, payload: Dict[str, Any]) -> Dict[str, str]:
+        return {h.get('name', '').lower(): h.get('value', '') for h in payload.get('headers', [])}
+
+    def _mentions_job_keywords(self, headers: Dict[str, str], text: str) -> bool:
+        return bool(_JOB_KEYWORDS_RE.search(f"{headers.get('from', '')}\n{headers.get('subject', '')}\n{text}"))
+
+    def _mark_processed(self, user_id: int, message_id: str, is_job_related: bool) -> None:
+        self.db.add(GmailProcessedMessage(user_id=user_id, message_id=message_id, is_job_related=is_job_related))
+
+    def _prune_processed(self, user_id: int) -> None:
+        """Forget messages older than any scan window, so the processed set stays bounded."""
+        cutoff = datetime.now() - timedelta(days=GMAIL_PROCESSED_RETENTION_DAYS)
+        self.db.query(GmailProcessedMessage).filter(
+            GmailProcessedMessage.user_id == user_id,
+            GmailProcessedMessage.processed_at < cutoff
+        ).delete(synchronize_session=False)
+
     def send_email(self, user_id: int, recipient_email: str, subject: str, body: str) -> bool:
         """
         Sends an email using the user's Gmail account.
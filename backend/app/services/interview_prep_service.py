@@ -76,6 +76,7 @@ IMPORTANT: Return ONLY the JSON object, no other text."""
                 system_prompt=system_instruction,
                 temperature=0.7,
                 json_mode=True,
+                use_cache=False,
             )
             try:
                 return json.loads(content)
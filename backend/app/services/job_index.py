@@ -0,0 +1,318 @@
+"""
+Approximate nearest-neighbour index over each user's saved jobs.
+
+Each job is represented by its mean-pooled chunk vector from the embedding
+store. Each user gets one index file under VECTOR_INDEX_DIR. It uses HNSW
+(hnswlib) when installed and falls back to an exact brute-force NumPy scan
+otherwise. Job create/update/delete hooks keep the index current
+incrementally, and every change is written to disk, so a restart reloads the
+index instead of rebuilding it.
+
+Configure via env vars: VECTOR_INDEX_DIR, VECTOR_INDEX_BACKEND (auto | hnsw | bruteforce).
+"""
+import os
+import re
+import json
+import logging
+import threading
+from typing import Dict, List, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.db.database import SessionLocal
+from app.models.job import Job
+from app.services import embedding_store
+from app.services.ollama_client import OLLAMA_EMBED_MODEL
+
+try:
+    import hnswlib
+except ImportError:
+    hnswlib = None
+
+logger = logging.getLogger(__name__)
+
+VECTOR_INDEX_DIR = os.getenv("VECTOR_INDEX_DIR", os.path.join("output", "vector_index"))
+VECTOR_INDEX_BACKEND = os.getenv("VECTOR_INDEX_BACKEND", "auto").lower()
+# Bump when the way job vectors are derived changes, so old index files are rebuilt
+VECTOR_KIND = "mean_pooled_chunks_v1"
+
+
+class BruteForceIndex:
+    """Exact cosine search over a dense matrix of pre-normalized vectors."""
+
+    kind = "bruteforce"
+    extension = ".npz"
+
+    def __init__(self, dim: int):
+        self.dim = dim
+        self.ids = np.empty(0, dtype=np.int64)
+        self.matrix = np.empty((0, dim), dtype=np.float32)
+
+    def upsert(self, ids: List[int], vectors: np.ndarray) -> None:
+        self.remove(ids)
+        self.ids = np.concatenate([self.ids, np.asarray(ids, dtype=np.int64)])
+        self.matrix = np.vstack([self.matrix, embedding_store.normalize_rows(vectors).astype(np.float32)])
+
+    def remove(self, ids: List[int]) -> None:
+        keep = ~np.isin(self.ids, ids)
+        self.ids, self.matrix = self.ids[keep], self.matrix[keep]
+
+    def query(self, vector: np.ndarray, k: int) -> List[Tuple[int, float]]:
+        k = min(k, len(self.ids))
+        if k == 0:
+            return []
+        scores = self.matrix @ embedding_store.normalize_rows(vector)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(self.ids[i]), float(scores[i])) for i in top]
+
+    def save(self, path: str) -> None:
+        with open(path, "wb") as f:
+            np.savez(f, ids=self.ids, matrix=self.matrix)
+
+    @classmethod
+    def load(cls, path: str, dim: int) -> "BruteForceIndex":
+        index = cls(dim)
+        with np.load(path) as data:
+            index.ids, index.matrix = data["ids"], data["matrix"]
+        return index
+
+
+class HNSWIndex:
+    """hnswlib graph index; job ids are used directly as labels."""
+
+    kind = "hnsw"
+    extension = ".hnsw"
+
+    def __init__(self, dim: int, max_elements: int = 1024):
+        self.dim = dim
+        self.index = hnswlib.Index(space="cosine", dim=dim)
+        self.index.init_index(max_elements=max_elements, ef_construction=200, M=16)
+        self.index.set_ef(64)
+        self.live = set()
+        self.deleted = set()
+
+    def upsert(self, ids: List[int], vectors: np.ndarray) -> None:
+        needed = self.index.element_count + len(ids)
+        if needed > self.index.get_max_elements():
+            self.index.resize_index(max(needed, 2 * self.index.get_max_elements()))
+        for job_id in ids:
+            if job_id in self.deleted:
+                self.index.unmark_deleted(job_id)
+                self.deleted.discard(job_id)
+        self.index.add_items(np.asarray(vectors, dtype=np.float32), ids)
+        self.live.update(ids)
+
+    def remove(self, ids: List[int]) -> None:
+        for job_id in ids:
+            if job_id in self.live:
+                self.index.mark_deleted(job_id)
+                self.live.discard(job_id)
+                self.deleted.add(job_id)
+
+    def query(self, vector: np.ndarray, k: int) -> List[Tuple[int, float]]:
+        k = min(k, len(self.live))
+        if k == 0:
+            return []
+        labels, distances = self.index.knn_query(np.asarray(vector, dtype=np.float32), k=k)
+        return [(int(label), 1.0 - float(dist)) for label, dist in zip(labels[0], distances[0])]
+
+    def save(self, path: str) -> None:
+        self.index.save_index(path)
+
+    @classmethod
+    def load(cls, path: str, dim: int, live: set, deleted: set) -> "HNSWIndex":
+        index = cls.__new__(cls)
+        index.dim = dim
+        index.index = hnswlib.Index(space="cosine", dim=dim)
+        index.index.load_index(path)
+        index.index.set_ef(64)
+        index.live, index.deleted = set(live), set(deleted)
+        return index
+
+
+def _backend_class():
+    if VECTOR_INDEX_BACKEND == "bruteforce" or hnswlib is None:
+        if VECTOR_INDEX_BACKEND == "hnsw":
+            logger.warning("VECTOR_INDEX_BACKEND=hnsw but hnswlib is not installed; using brute force")
+        return BruteForceIndex
+    return HNSWIndex
+
+
+class JobIndex:
+    """A user's job index plus the content hash each job was indexed from."""
+
+    def __init__(self, user_id: int):
+        self.user_id = user_id
+        self.lock = threading.RLock()
+        slug = re.sub(r"[^\w.-]", "_", OLLAMA_EMBED_MODEL)
+        self.base_path = os.path.join(VECTOR_INDEX_DIR, f"jobs_u{user_id}_{slug}")
+        self.backend = None
+        self.hashes: Dict[int, str] = {}
+        self.loaded_mtime = 0.0
+
+    @property
+    def meta_path(self) -> str:
+        return self.base_path + ".json"
+
+    def _disk_mtime(self) -> float:
+        try:
+            return os.path.getmtime(self.meta_path)
+        except OSError:
+            return 0.0
+
+    def refresh_from_disk(self) -> None:
+        """Reload if another worker process saved a newer version."""
+        mtime = self._disk_mtime()
+        if not mtime or mtime <= self.loaded_mtime:
+            return
+        try:
+            with open(self.meta_path, "r") as f:
+                meta = json.load(f)
+            if meta.get("vector_kind") != VECTOR_KIND:
+                raise RuntimeError("index was built with a different vector kind")
+            cls = HNSWIndex if meta["backend"] == HNSWIndex.kind else BruteForceIndex
+            if cls is HNSWIndex and hnswlib is None:
+                raise RuntimeError("index was built with hnswlib, which is not installed")
+            path = self.base_path + cls.extension
+            hashes = {int(k): v for k, v in meta["hashes"].items()}
+            if cls is HNSWIndex:
+                self.backend = cls.load(path, meta["dim"], set(hashes), {int(i) for i in meta.get("deleted", [])})
+            else:
+                self.backend = cls.load(path, meta["dim"])
+            self.hashes = hashes
+        except Exception as e:
+            logger.warning(f"Discarding unreadable job index for user {self.user_id}: {e}")
+            self.backend, self.hashes = None, {}
+        self.loaded_mtime = mtime
+
+    def save(self) -> None:
+        if self.backend is None:
+            return
+        os.makedirs(VECTOR_INDEX_DIR, exist_ok=True)
+        data_path = self.base_path + self.backend.extension
+        self.backend.save(data_path + ".tmp")
+        os.replace(data_path + ".tmp", data_path)
+        meta = {
+            "backend": self.backend.kind,
+            "dim": self.backend.dim,
+            "model": OLLAMA_EMBED_MODEL,
+            "vector_kind": VECTOR_KIND,
+            "hashes": {str(k): v for k, v in self.hashes.items()},
+            "deleted": sorted(getattr(self.backend, "deleted", ())),
+        }
+        with open(self.meta_path + ".tmp", "w") as f:
+            json.dump(meta, f)
+        os.replace(self.meta_path + ".tmp", self.meta_path)
+        self.loaded_mtime = self._disk_mtime()
+
+    def upsert(self, items: List[Tuple[int, str, np.ndarray]]) -> None:
+        """Add or replace (job_id, content_hash, vector) entries."""
+        if not items:
+            return
+        vectors = np.vstack([v for _, _, v in items])
+        if self.backend is None or self.backend.dim != vectors.shape[1]:
+            self.backend, self.hashes = _backend_class()(vectors.shape[1]), {}
+        self.backend.upsert([job_id for job_id, _, _ in items], vectors)
+        self.hashes.update({job_id: h for job_id, h, _ in items})
+
+    def remove(self, job_ids: List[int]) -> None:
+        job_ids = [j for j in job_ids if j in self.hashes]
+        if job_ids and self.backend is not None:
+            self.backend.remove(job_ids)
+            for job_id in job_ids:
+                del self.hashes[job_id]
+
+
+_indexes: Dict[int, JobIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_job_index(user_id: int) -> JobIndex:
+    with _indexes_lock:
+        index = _indexes.get(user_id)
+        if index is None:
+            index = _indexes[user_id] = JobIndex(user_id)
+    with index.lock:
+        index.refresh_from_disk()
+    return index
+
+
+def _embed_jobs(db: Session, jobs: List[Job]) -> List[Tuple[int, str, np.ndarray]]:
+    jobs = [j for j in jobs if embedding_store.job_embedding_text(j)]
+    texts = [embedding_store.job_embedding_text(j) for j in jobs]
+    vectors = embedding_store.get_pooled_embeddings(db, texts)
+    return [(j.id, embedding_store.content_hash(t), v) for j, t, v in zip(jobs, texts, vectors)]
+
+
+def sync_user_index(db: Session, user_id: int) -> JobIndex:
+    """
+    Bring the index in line with the user's jobs. Each job's content hash is
+    compared with the one indexed, so an update lost to a concurrent save in
+    another process (the last save wins) is repaired here; hashing is cheap
+    next to embedding, which only runs for the jobs that differ.
+    """
+    index = get_job_index(user_id)
+    rows = db.query(Job.id, Job.title, Job.description).filter(Job.user_id == user_id).all()
+    expected = {}
+    for row in rows:
+        text = embedding_store.job_embedding_text(row)
+        if text:
+            expected[row.id] = embedding_store.content_hash(text)
+    with index.lock:
+        changed = [job_id for job_id, h in expected.items() if index.hashes.get(job_id) != h]
+        extra = index.hashes.keys() - expected.keys()
+        if not changed and not extra:
+            return index
+        if changed:
+            jobs = db.query(Job).filter(Job.id.in_(changed)).all()
+            index.upsert(_embed_jobs(db, jobs))
+        index.remove(list(extra))
+        index.save()
+    return index
+
+
+def search_jobs(db: Session, user_id: int, text: str, k: int = 10) -> List[Tuple[int, float]]:
+    """Return up to k (job_id, cosine similarity) pairs most similar to the text."""
+    index = sync_user_index(db, user_id)
+    # Queries are one-off: embed them without filling the embeddings table
+    query_vector = embedding_store.get_pooled_embeddings(db, [text], persist=False)[0]
+    with index.lock:
+        if index.backend is None:
+            return []
+        return index.backend.query(query_vector, k)
+
+
+def index_job(job_id: int) -> None:
+    """Background task: embed a created/updated job and upsert it into its user's index."""
+    db = SessionLocal()
+    try:
+        job = db.query(Job).filter(Job.id == job_id).first()
+        if not job:
+            return
+        index = get_job_index(job.user_id)
+        items = _embed_jobs(db, [job])
+        with index.lock:
+            if items and index.hashes.get(job_id) == items[0][1]:
+                return
+            if items:
+                index.upsert(items)
+            else:
+                index.remove([job_id])
+            index.save()
+    except Exception as e:
+        logger.warning(f"Failed to index job {job_id}: {e}")
+    finally:
+        db.close()
+
+
+def remove_job(user_id: int, job_id: int) -> None:
+    """Background task: drop a deleted job from its user's index."""
+    try:
+        index = get_job_index(user_id)
+        with index.lock:
+            index.remove([job_id])
+            index.save()
+    except Exception as e:
+        logger.warning(f"Failed to remove job {job_id} from index: {e}")
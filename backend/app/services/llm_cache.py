@@ -0,0 +1,217 @@
+"""
+Content-addressed cache for LLM generations.
+
+Responses are keyed by a SHA-256 of (model, system prompt, prompt, temperature,
+json_mode), so an identical request is served locally instead of paying for a
+full Ollama generation. Two tiers are used: a bounded in-process LRU in front
+of a SQLite file shared by every worker on the host.
+
+Configure via env vars: LLM_CACHE_ENABLED, LLM_CACHE_TTL_SECONDS,
+LLM_CACHE_MAX_ENTRIES, LLM_CACHE_PATH.
+"""
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "512"))
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", os.path.join("output", "cache", "llm_cache.sqlite3"))
+
+
+def make_cache_key(model: str, system_prompt: str, prompt: str, temperature: float, json_mode: bool) -> str:
+    """Hash every input that influences a generation into a stable key."""
+    payload = json.dumps(
+        [model, system_prompt or "", prompt, float(temperature), bool(json_mode)],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class CacheBackend(ABC):
+    """Interface for a cache tier. Values are stored with an absolute expiry timestamp."""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[str]:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value: str, ttl: int) -> None:
+        ...
+
+    @abstractmethod
+    def clear(self) -> None:
+        ...
+
+
+class MemoryLRUBackend(CacheBackend):
+    """Bounded in-process LRU tier."""
+
+    def __init__(self, max_entries: int = LLM_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str, ttl: int) -> None:
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class SQLiteBackend(CacheBackend):
+    """On-disk tier backed by a standalone SQLite file (independent of DATABASE_URL)."""
+
+    def __init__(self, path: str = LLM_CACHE_PATH):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, expires_at = row
+            if expires_at < time.time():
+                with self._conn:
+                    self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                return None
+            return value
+
+    def set(self, key: str, value: str, ttl: int) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, time.time() + ttl),
+            )
+
+    def purge_expired(self) -> int:
+        with self._lock, self._conn:
+            cursor = self._conn.execute("DELETE FROM llm_cache WHERE expires_at < ?", (time.time(),))
+            return cursor.rowcount
+
+    def clear(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM llm_cache")
+
+
+class LLMCache:
+    """
+    Read-through cache over an ordered list of tiers.
+
+    A hit in a slower tier is promoted into every faster tier. Cache failures
+    are logged and treated as misses so they can never break a generation.
+    """
+
+    def __init__(self, tiers, ttl: int = LLM_CACHE_TTL_SECONDS):
+        self.tiers = list(tiers)
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "writes": 0, "errors": 0}
+        self._tier_hits = [0] * len(self.tiers)
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._stats[name] += 1
+
+    def get(self, key: str) -> Optional[str]:
+        for index, tier in enumerate(self.tiers):
+            try:
+                value = tier.get(key)
+            except Exception as e:
+                logger.warning(f"LLM cache read failed in {type(tier).__name__}: {e}")
+                self._count("errors")
+                continue
+            if value is not None:
+                for faster in self.tiers[:index]:
+                    try:
+                        faster.set(key, value, self.ttl)
+                    except Exception:
+                        pass
+                with self._lock:
+                    self._stats["hits"] += 1
+                    self._tier_hits[index] += 1
+                return value
+        self._count("misses")
+        return None
+
+    def set(self, key: str, value: str) -> None:
+        for tier in self.tiers:
+            try:
+                tier.set(key, value, self.ttl)
+            except Exception as e:
+                logger.warning(f"LLM cache write failed in {type(tier).__name__}: {e}")
+                self._count("errors")
+        self._count("writes")
+
+    def clear(self) -> None:
+        for tier in self.tiers:
+            tier.clear()
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "hit_rate": round(self._stats["hits"] / lookups, 4) if lookups else 0.0,
+                "tier_hits": {type(t).__name__: n for t, n in zip(self.tiers, self._tier_hits)},
+            }
+
+
+_cache: Optional[LLMCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> Optional[LLMCache]:
+    """Return the process-wide cache, or None when caching is disabled."""
+    global _cache
+    if not LLM_CACHE_ENABLED:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                tiers = [MemoryLRUBackend()]
+                try:
+                    tiers.append(SQLiteBackend())
+                except Exception as e:
+                    logger.warning(f"LLM disk cache unavailable, using memory only: {e}")
+                _cache = LLMCache(tiers)
+    return _cache
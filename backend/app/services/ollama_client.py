@@ -1,35 +1,248 @@
 """
 Shared Ollama client — replaces Google Gemini for all AI calls.
-Configure via env vars: OLLAMA_MODEL, OLLAMA_BASE_URL, OLLAMA_EMBED_MODEL.
+Configure via env vars: OLLAMA_MODEL, OLLAMA_BASE_URL, OLLAMA_EMBED_MODEL,
+OLLAMA_NUM_PARALLEL.
+
+All traffic goes through a single AsyncOllamaClient that lives on a dedicated
+event-loop thread. It caps concurrent requests at OLLAMA_NUM_PARALLEL (match
+the Ollama server's parallel slots) and coalesces identical in-flight
+generations onto one task. Async routes await `agenerate_text`/`aembed_text`;
+sync code keeps calling `generate_text`/`embed_text`, which bridge onto the
+same loop, so both share the one concurrency budget.
+
+Inside a `stream_tokens(callback)` block, generations made by the current
+thread or task are streamed from Ollama and each chunk is passed to the
+callback as it arrives (on the client loop's thread).
 """
 import os
+import asyncio
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Union
+
 import ollama as _ollama
 
+from app.services.llm_cache import get_llm_cache, make_cache_key
+
+logger = logging.getLogger(__name__)
+
 OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "llama3.2")
 OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
 OLLAMA_EMBED_MODEL = os.getenv("OLLAMA_EMBED_MODEL", "nomic-embed-text")
+OLLAMA_NUM_PARALLEL = max(1, int(os.getenv("OLLAMA_NUM_PARALLEL", "4")))
+
+TokenCallback = Callable[[str], None]
+_token_callback: contextvars.ContextVar[Optional[TokenCallback]] = contextvars.ContextVar(
+    "ollama_token_callback", default=None
+)
+
+
+@contextmanager
+def stream_tokens(callback: TokenCallback) -> Iterator[None]:
+    """Stream generations made in this context to `callback` chunk by chunk."""
+    token = _token_callback.set(callback)
+    try:
+        yield
+    finally:
+        _token_callback.reset(token)
+
+
+class AsyncOllamaClient:
+    """
+    Async Ollama client with bounded concurrency and request coalescing.
+
+    Must only be used from the event loop it was created on; other threads and
+    loops reach it through the module-level bridge functions below.
+    """
+
+    def __init__(self, host: str = OLLAMA_BASE_URL, max_concurrency: int = OLLAMA_NUM_PARALLEL):
+        self._client = _ollama.AsyncClient(host=host)
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.max_concurrency = max_concurrency
+        self.coalesced = 0
+
+    async def generate_text(self, prompt: str, system_prompt: str = "", temperature: float = 0.2,
+                            json_mode: bool = False, use_cache: bool = True,
+                            on_token: Optional[TokenCallback] = None) -> str:
+        cache = get_llm_cache() if use_cache else None
+        key = make_cache_key(OLLAMA_MODEL, system_prompt, prompt, temperature, json_mode)
+        if cache is not None:
+            # The disk tier blocks on SQLite, which must not stall the shared loop
+            cached = await asyncio.to_thread(cache.get, key)
+            if cached is not None:
+                if on_token is not None:
+                    on_token(cached)
+                return cached
+
+        if on_token is not None:
+            # Streamed generations are not coalesced: each caller wants its own chunks
+            content = await self._chat(prompt, system_prompt, temperature, json_mode, on_token)
+            if cache is not None and content:
+                await asyncio.to_thread(cache.set, key, content)
+            return content
+
+        # Stochastic callers (use_cache=False) expect independent samples, so only
+        # cacheable requests are coalesced.
+        if not use_cache:
+            return await self._chat(prompt, system_prompt, temperature, json_mode)
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._generate_shared(key, cache, prompt, system_prompt, temperature,
+                                                               json_mode))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self.coalesced += 1
+        # Every caller, including the one that started it, awaits the shared task through a
+        # shield: a cancelled caller stops waiting without cancelling the others' generation
+        return await asyncio.shield(task)
+
+    async def _generate_shared(self, key: str, cache, prompt: str, system_prompt: str, temperature: float,
+                               json_mode: bool) -> str:
+        content = await self._chat(prompt, system_prompt, temperature, json_mode)
+        if cache is not None and content:
+            await asyncio.to_thread(cache.set, key, content)
+        return content
+
+    def _forget(self, key: str, task: "asyncio.Task") -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Retrieve the outcome so a task whose callers were all cancelled doesn't log a warning
+        if not task.cancelled():
+            task.exception()
+
+    async def _chat(self, prompt: str, system_prompt: str, temperature: float, json_mode: bool,
+                    on_token: Optional[TokenCallback] = None) -> str:
+        messages = []
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+        messages.append({"role": "user", "content": prompt})
+
+        kwargs = {
+            "model": OLLAMA_MODEL,
+            "messages": messages,
+            "options": {"temperature": temperature},
+        }
+        if json_mode:
+            kwargs["format"] = "json"
+
+        async with self._semaphore:
+            if on_token is None:
+                response = await self._client.chat(**kwargs)
+                return response.message.content
+            parts = []
+            async for chunk in await self._client.chat(**kwargs, stream=True):
+                piece = chunk.message.content or ""
+                if piece:
+                    parts.append(piece)
+                    on_token(piece)
+            return "".join(parts)
 
-_client = _ollama.Client(host=OLLAMA_BASE_URL)
+    async def embed(self, texts: Union[str, List[str]]) -> List[List[float]]:
+        async with self._semaphore:
+            response = await self._client.embed(model=OLLAMA_EMBED_MODEL, input=texts)
+        return response.embeddings
 
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "inflight": len(self._inflight),
+            "coalesced": self.coalesced,
+        }
 
-def generate_text(prompt: str, system_prompt: str = "", temperature: float = 0.2, json_mode: bool = False) -> str:
-    messages = []
-    if system_prompt:
-        messages.append({"role": "system", "content": system_prompt})
-    messages.append({"role": "user", "content": prompt})
 
-    kwargs = {
-        "model": OLLAMA_MODEL,
-        "messages": messages,
-        "options": {"temperature": temperature},
-    }
-    if json_mode:
-        kwargs["format"] = "json"
+class _LoopBridge:
+    """Owns the background event loop that hosts the shared AsyncOllamaClient."""
 
-    response = _client.chat(**kwargs)
-    return response.message.content
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._client: Optional[AsyncOllamaClient] = None
+
+    def _start(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                ready = threading.Event()
+
+                def _run():
+                    asyncio.set_event_loop(loop)
+                    loop.call_soon(ready.set)
+                    loop.run_forever()
+
+                threading.Thread(target=_run, name="ollama-client-loop", daemon=True).start()
+                ready.wait()
+                self._client = asyncio.run_coroutine_threadsafe(self._create_client(), loop).result()
+                self._loop = loop
+        return self._loop
+
+    @staticmethod
+    async def _create_client() -> AsyncOllamaClient:
+        return AsyncOllamaClient()
+
+    @property
+    def client(self) -> AsyncOllamaClient:
+        self._start()
+        return self._client
+
+    def submit(self, coro: Awaitable) -> "asyncio.Future":
+        loop = self._start()
+        return asyncio.run_coroutine_threadsafe(coro, loop)
+
+    def run_sync(self, coro: Awaitable) -> Any:
+        """Block the calling thread until the coroutine finishes on the bridge loop."""
+        return self.submit(coro).result()
+
+    async def run_async(self, coro: Awaitable) -> Any:
+        """Await the coroutine on the bridge loop from any other event loop."""
+        return await asyncio.wrap_future(self.submit(coro))
+
+
+_bridge = _LoopBridge()
+
+
+def get_async_client() -> AsyncOllamaClient:
+    return _bridge.client
+
+
+async def agenerate_text(prompt: str, system_prompt: str = "", temperature: float = 0.2, json_mode: bool = False,
+                         use_cache: bool = True) -> str:
+    client = get_async_client()
+    return await _bridge.run_async(
+        client.generate_text(prompt, system_prompt, temperature, json_mode, use_cache, _token_callback.get())
+    )
+
+
+async def aembed_text(text: str) -> list:
+    client = get_async_client()
+    embeddings = await _bridge.run_async(client.embed(text))
+    return embeddings[0]
+
+
+def generate_text(prompt: str, system_prompt: str = "", temperature: float = 0.2, json_mode: bool = False,
+                  use_cache: bool = True) -> str:
+    """
+    Run a chat generation. Identical requests are served from the LLM response
+    cache; pass use_cache=False for generations that should vary between calls.
+    """
+    client = get_async_client()
+    return _bridge.run_sync(
+        client.generate_text(prompt, system_prompt, temperature, json_mode, use_cache, _token_callback.get())
+    )
 
 
 def embed_text(text: str) -> list:
-    response = _client.embed(model=OLLAMA_EMBED_MODEL, input=text)
-    return response.embeddings[0]
+    client = get_async_client()
+    return _bridge.run_sync(client.embed(text))[0]
+
+
+def embed_texts(texts: List[str]) -> List[list]:
+    """Embed several texts in one Ollama request."""
+    if not texts:
+        return []
+    client = get_async_client()
+    return _bridge.run_sync(client.embed(list(texts)))
@@ -0,0 +1,96 @@
+"""
+Persistent caches for LLM document parses.
+
+A resume's structured parse is stored on its Resume row, next to the
+`parse_cache_key` it was built for (raw text + model + prompt version), so a
+resume reused across many tailor requests is parsed by the LLM only once.
+
+Job description parses contain no user data, so they are cached globally in
+the `parsed_job_descriptions` table: every user tailoring against the same
+posting text shares one parse.
+"""
+import logging
+from typing import Any, Dict
+
+from sqlalchemy.exc import IntegrityError
+
+from app.db.database import SessionLocal
+from app.models.parsed_job_description import ParsedJobDescription
+from app.models.resume import Resume
+from app.services.ollama_client import OLLAMA_MODEL
+from app.services import resume_processor
+from app.services.resume_processor import (
+    extract_job_description_data,
+    extract_resume_data,
+    parse_cache_key
+)
+
+logger = logging.getLogger(__name__)
+
+
+def get_parsed_resume(resume_id: int, resume_text: str) -> Dict[str, Any]:
+    """
+    Structured parse of a stored resume, from the Resume row when it is current
+    and from the LLM otherwise (storing the result). Safe to call from a thread.
+    """
+    key = parse_cache_key(resume_text, "resume")
+    db = SessionLocal()
+    try:
+        resume = db.query(Resume).filter(Resume.id == resume_id).first()
+        if resume is not None and resume.parsed_data and resume.parsed_data_key == key:
+            return resume.parsed_data
+
+        parsed = extract_resume_data(resume_text)
+        # Only store parses of the row's current text; a caller may pass edited text
+        if resume is not None and resume.raw_text == resume_text:
+            resume.parsed_data = parsed
+            resume.parsed_data_key = key
+            db.commit()
+        return parsed
+    finally:
+        db.close()
+
+
+def warm_resume(resume_id: int) -> None:
+    """Background task: parse a newly uploaded resume ahead of its first tailor request."""
+    db = SessionLocal()
+    try:
+        resume = db.query(Resume).filter(Resume.id == resume_id).first()
+        text = resume.raw_text if resume else None
+    finally:
+        db.close()
+    if not text:
+        return
+    try:
+        get_parsed_resume(resume_id, text)
+    except Exception as e:
+        logger.warning(f"Failed to parse resume {resume_id}: {e}")
+
+
+def get_parsed_job_description(text: str) -> Dict[str, str]:
+    """
+    Parsed sections of a job description, from the shared cache when present and
+    from the LLM otherwise (storing the result). Safe to call from a thread.
+    """
+    key = parse_cache_key(text, "job_description")
+    db = SessionLocal()
+    try:
+        row = db.query(ParsedJobDescription.sections).filter(ParsedJobDescription.cache_key == key).first()
+        if row is not None:
+            return row.sections
+
+        sections = extract_job_description_data(text)
+        db.add(ParsedJobDescription(
+            cache_key=key,
+            model=OLLAMA_MODEL,
+            parse_version=resume_processor.PARSE_VERSION,
+            sections=sections
+        ))
+        try:
+            db.commit()
+        except IntegrityError:
+            # Another request stored the same parse first
+            db.rollback()
+        return sections
+    finally:
+        db.close()
@@ -0,0 +1,150 @@
+"""
+Minimal DAG executor for multi-stage request pipelines.
+
+A pipeline is a set of named stages, each declaring the stages (or initial
+inputs) it depends on. Stages whose dependencies are satisfied run
+concurrently — sync functions in worker threads, coroutines on the loop — so
+wall-clock time tracks the critical path rather than the sum of all stages.
+"""
+import time
+import asyncio
+import inspect
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Stage:
+    """A pipeline step. `func` is called with its dependencies' results as keyword arguments."""
+    name: str
+    func: Callable[..., Any]
+    deps: Tuple[str, ...] = ()
+
+
+class StageError(Exception):
+    """Raised when a stage fails; `stage` names the failing stage and `__cause__` holds the original error."""
+
+    def __init__(self, stage: str, error: Exception):
+        super().__init__(f"Stage '{stage}' failed: {error}")
+        self.stage = stage
+
+
+@dataclass
+class PipelineRun:
+    results: Dict[str, Any]
+    timings: Dict[str, Dict[str, float]] = field(default_factory=dict)
+    total_seconds: float = 0.0
+
+
+class Pipeline:
+    def __init__(self, stages: Iterable[Stage], inputs: Iterable[str] = ()):
+        self.stages: Dict[str, Stage] = {}
+        for stage in stages:
+            if stage.name in self.stages:
+                raise ValueError(f"Duplicate stage name: {stage.name}")
+            self.stages[stage.name] = stage
+        self.inputs = tuple(inputs)
+        known = set(self.stages) | set(self.inputs)
+        for stage in self.stages.values():
+            unknown = set(stage.deps) - known
+            if unknown:
+                raise ValueError(f"Stage '{stage.name}' depends on unknown {sorted(unknown)}")
+        self.order = self._topological_order()
+
+    def _topological_order(self) -> List[str]:
+        order, done, visiting = [], set(self.inputs), set()
+
+        def visit(name: str):
+            if name in done:
+                return
+            if name in visiting:
+                raise ValueError(f"Cycle detected at stage '{name}'")
+            visiting.add(name)
+            for dep in self.stages[name].deps:
+                visit(dep)
+            visiting.discard(name)
+            done.add(name)
+            order.append(name)
+
+        for name in self.stages:
+            visit(name)
+        return order
+
+    def graph(self) -> Dict[str, List[str]]:
+        """Dependency graph as {stage: [dependencies]}, in topological order."""
+        return {name: list(self.stages[name].deps) for name in self.order}
+
+    def critical_path(self, timings: Dict[str, Dict[str, float]]) -> List[str]:
+        """The chain of stages that determined total wall-clock time for a run."""
+        finish: Dict[str, float] = {}
+        previous: Dict[str, Optional[str]] = {}
+        for name in self.order:
+            stage_deps = [d for d in self.stages[name].deps if d in self.stages]
+            slowest = max(stage_deps, key=lambda d: finish[d], default=None)
+            previous[name] = slowest
+            finish[name] = (finish[slowest] if slowest else 0.0) + timings.get(name, {}).get("seconds", 0.0)
+        node = max(finish, key=finish.get, default=None)
+        path = []
+        while node:
+            path.append(node)
+            node = previous[node]
+        return path[::-1]
+
+    async def run(self, inputs: Dict[str, Any],
+                  on_stage_complete: Optional[Callable[[str, Any], Any]] = None) -> PipelineRun:
+        """
+        Execute every stage and return all results with per-stage timings.
+        `on_stage_complete(name, result)` is called (on the loop) as each stage finishes.
+        """
+        missing = set(self.inputs) - set(inputs)
+        if missing:
+            raise ValueError(f"Missing pipeline inputs: {sorted(missing)}")
+
+        results: Dict[str, Any] = dict(inputs)
+        timings: Dict[str, Dict[str, float]] = {}
+        pending = set(self.stages)
+        running: Dict[asyncio.Task, str] = {}
+        started = time.perf_counter()
+
+        async def execute(stage: Stage) -> Any:
+            kwargs = {dep: results[dep] for dep in stage.deps}
+            stage_start = time.perf_counter()
+            try:
+                if inspect.iscoroutinefunction(stage.func):
+                    return await stage.func(**kwargs)
+                return await asyncio.to_thread(stage.func, **kwargs)
+            finally:
+                timings[stage.name] = {
+                    "started_at": round(stage_start - started, 4),
+                    "seconds": round(time.perf_counter() - stage_start, 4),
+                }
+
+        try:
+            while pending or running:
+                for name in [n for n in pending if all(d in results for d in self.stages[n].deps)]:
+                    pending.discard(name)
+                    running[asyncio.create_task(execute(self.stages[name]))] = name
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    name = running.pop(task)
+                    try:
+                        results[name] = task.result()
+                    except Exception as e:
+                        raise StageError(name, e) from e
+                    if on_stage_complete is not None:
+                        outcome = on_stage_complete(name, results[name])
+                        if inspect.isawaitable(outcome):
+                            await outcome
+        finally:
+            for task in running:
+                task.cancel()
+
+        run = PipelineRun(results=results, timings=timings, total_seconds=round(time.perf_counter() - started, 4))
+        logger.info(
+            f"Pipeline finished in {run.total_seconds}s; critical path: "
+            f"{' -> '.join(self.critical_path(timings))}"
+        )
+        return run
@@ -4,6 +4,7 @@ Resume processing utility functions.
 import PyPDF2
 import io
 import json
+import hashlib
 import re
 import logging
 import os
@@ -11,7 +12,7 @@ from typing import Dict, Any, List, Optional
 from datetime import datetime
 from contextlib import contextmanager
 from pathlib import Path
-from app.services.ollama_client import generate_text as _ollama_generate
+from app.services.ollama_client import OLLAMA_MODEL, generate_text as _ollama_generate
 
 # Import prompts
 from app.prompts import (
@@ -28,6 +29,9 @@ logger = logging.getLogger(__name__)
 
 OUTPUT_DIR = "output"
 
+# Bump when the post-processing of parsed documents changes, so stored parses are rebuilt
+PARSE_VERSION = 1
+
 # Ensure output directory exists
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
@@ -75,16 +79,28 @@ def extract_text_from_pdf(pdf_file: bytes) -> str:
     pdf_reader = PyPDF2.PdfReader(io.BytesIO(pdf_file))
     return "".join(page.extract_text() + "\n" for page in pdf_reader.pages)
 
+PARSE_PROMPTS = {
+    "resume": RESUME_ANALYSIS_PROMPT,
+    "job_description": JOB_DESCRIPTION_ANALYSIS_PROMPT
+}
+
 def analyze_document_with_ai(text: str, parse_type: str) -> Dict[str, Any]:
     """Parse text using AI with structured prompts."""
-    prompts = {
-        "resume": RESUME_ANALYSIS_PROMPT,
-        "job_description": JOB_DESCRIPTION_ANALYSIS_PROMPT
-    }
     system_prompt = DOCUMENT_PARSER_SYSTEM_PROMPT
-    user_prompt = f"{prompts[parse_type]}\n\nDocument to parse:\n\n{text}"
+    user_prompt = f"{PARSE_PROMPTS[parse_type]}\n\nDocument to parse:\n\n{text}"
     return call_ai_service(user_prompt, system_prompt)
 
+def parse_cache_key(text: str, parse_type: str) -> str:
+    """
+    Key for a stored parse of `text`. Covers the model, prompts and PARSE_VERSION,
+    so editing a prompt or switching models invalidates earlier parses.
+    """
+    material = "\x1f".join([
+        str(PARSE_VERSION), OLLAMA_MODEL, parse_type,
+        DOCUMENT_PARSER_SYSTEM_PROMPT, PARSE_PROMPTS[parse_type], text
+    ])
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
 #------------------------------------------------------------
 # BUSINESS LOGIC FUNCTIONS
 #------------------------------------------------------------
@@ -196,8 +212,10 @@ def calculate_ats_score(resume_data: Dict[str, Any], job_description: Dict[str,
             
     return result
 
-def create_resume_filename(customized_resume: Dict[str, Any], job_description: Dict[str, str]) -> str:
-    """Generate a filename for the resume."""
+def create_resume_filename(customized_resume: Dict[str, Any], job_description: Dict[str, str],
+                           job_id: Optional[int] = None) -> str:
+    """Generate a filename for the resume. With `job_id`, the name is unique per job."""
+    suffix = f"-{job_id}" if job_id is not None else ""
     try:
         person_name = (
             customized_resume.get('basics', {}).get('name') or
@@ -227,21 +245,21 @@ def create_resume_filename(customized_resume: Dict[str, Any], job_description: D
         clean_company = clean_text(company_name)
         
         if clean_name and clean_company:
-            return f"{clean_name}-{clean_company}"
+            return f"{clean_name}-{clean_company}{suffix}"
         else:
             timestamp = datetime.now().strftime("%m%d-%H%M")
             if clean_name:
-                return f"{clean_name}-{timestamp}"
+                return f"{clean_name}-{timestamp}{suffix}"
             else:
-                return f"resume-{timestamp}"
+                return f"resume-{timestamp}{suffix}"
     except Exception:
         timestamp = datetime.now().strftime("%m%d-%H%M")
-        return f"resume-{timestamp}"
+        return f"resume-{timestamp}{suffix}"
 
 # Helper to import generate_resume_pdf and save_resume_json lazily to avoid circular imports if they use this service
-def generate_resume_pdf(customized_resume: Dict[str, Any], filename: str):
+def generate_resume_pdf(customized_resume: Dict[str, Any], filename: str, renderer: Optional[str] = None):
     from pdf_generator.generate_pdf import generate_resume_pdf as _generate_pdf
-    return _generate_pdf(customized_resume, filename)
+    return _generate_pdf(customized_resume, filename, renderer=renderer)
 
 def save_resume_json(customized_resume: Dict[str, Any], filename: str):
     from pdf_generator.generate_pdf import save_resume_json as _save_json
@@ -0,0 +1,232 @@
+"""
+Skill taxonomy and matcher.
+
+The taxonomy (app/services/data/skills.json: ~1,300 skills in categories, with
+aliases such as "k8s" -> Kubernetes) is compiled once into an Aho-Corasick
+automaton, so finding every skill in a text is one linear pass over it however
+large the taxonomy grows. Matches respect word boundaries ("ai" never matches
+inside "maintain", "java" never inside "javascript"), and overlapping matches
+resolve to the longest one ("react native" rather than "react"). Surface forms
+that are also ordinary words ("Go", "Swift", "Spring") only match with the
+capitalization listed under `match_case`.
+
+Used by the job match keyword fallback and the local ATS scorer; anything that
+needs "which skills does this text mention" should go through `find_skills`.
+
+Configure via env vars: SKILL_TAXONOMY_PATH (extra JSON file in the same format,
+merged over the built-in taxonomy).
+"""
+import os
+import json
+import logging
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+BUILTIN_TAXONOMY_PATH = os.path.join(os.path.dirname(__file__), "data", "skills.json")
+SKILL_TAXONOMY_PATH = os.getenv("SKILL_TAXONOMY_PATH", "")
+
+# Characters that continue a word: a skill must not touch them on either side
+_WORD_CHARS = frozenset("+#")
+# One- and two-letter forms ("C", "R", "Go") must also not touch these ("C-level", "R&D", "go-to")
+_SHORT_FORM_CHARS = frozenset("-&")
+# Separators treated as a space when matching ("react-native", "machine\nlearning")
+_SPACE_TABLE = str.maketrans({"-": " ", "_": " ", "\t": " ", "\n": " ", "\r": " "})
+
+
+@dataclass(frozen=True)
+class Skill:
+    name: str
+    category: str
+    aliases: Tuple[str, ...] = ()
+
+
+@dataclass
+class SkillMatch:
+    """Skills of a job found (`matched`) or not found (`missing`) in a resume, in job order."""
+    matched: List[str] = field(default_factory=list)
+    missing: List[str] = field(default_factory=list)
+    extra: List[str] = field(default_factory=list)
+
+    @property
+    def coverage(self) -> float:
+        total = len(self.matched) + len(self.missing)
+        return len(self.matched) / total if total else 0.0
+
+
+def _normalize(text: str) -> str:
+    """Lowercase with separators as spaces; keeps offsets aligned with `text`."""
+    lowered = text.lower()
+    if len(lowered) != len(text):
+        # A few characters (e.g. "İ") lowercase to two code points
+        lowered = "".join(c if len(c.lower()) != 1 else c.lower() for c in text)
+    return lowered.translate(_SPACE_TABLE)
+
+
+class SkillTaxonomy:
+    """Skills compiled into an Aho-Corasick automaton over their normalized surface forms."""
+
+    def __init__(self, skills: Iterable[Skill], match_case: Iterable[str] = ()):
+        self.skills: List[Skill] = list(skills)
+        self.by_name: Dict[str, Skill] = {skill.name: skill for skill in self.skills}
+        case_forms = {form.lower(): form for form in match_case}
+
+        # Trie: per node a transition dict, a failure link and the patterns ending there
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[int]] = [[]]
+        # Pattern id -> (length, skill index, required exact-case form or None)
+        self._patterns: List[Tuple[int, int, Optional[str]]] = []
+
+        seen = set()
+        for skill_idx, skill in enumerate(self.skills):
+            for form in (skill.name,) + skill.aliases:
+                pattern = " ".join(_normalize(form).split())
+                if not pattern or pattern in seen:
+                    continue
+                seen.add(pattern)
+                self._add(pattern, skill_idx, case_forms.get(form.lower()))
+        self._build_failure_links()
+
+    def _add(self, pattern: str, skill_idx: int, case_form: Optional[str]) -> None:
+        node = 0
+        for ch in pattern:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        self._out[node].append(len(self._patterns))
+        self._patterns.append((len(pattern), skill_idx, case_form))
+
+    def _build_failure_links(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                if node == 0:
+                    continue
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(ch, 0)
+                # Patterns ending at the failure node also end here
+                self._out[child].extend(self._out[self._fail[child]])
+
+    @staticmethod
+    def _bounded(text: str, start: int, end: int) -> bool:
+        blocked = _WORD_CHARS | _SHORT_FORM_CHARS if end - start <= 2 else _WORD_CHARS
+        before = text[start - 1] if start > 0 else " "
+        after = text[end] if end < len(text) else " "
+        if before.isalnum() or before in blocked or after.isalnum() or after in blocked:
+            return False
+        # "node" in "node.js", "R" in "R.J." -- a dot followed by a letter continues the word
+        return not (after == "." and end + 1 < len(text) and text[end + 1].isalnum())
+
+    def find_matches(self, text: str) -> List[Tuple[int, int, str]]:
+        """Non-overlapping (start, end, skill name) matches, leftmost-longest, in text order."""
+        if not text:
+            return []
+        normalized = _normalize(text)
+        goto, fail, out, patterns = self._goto, self._fail, self._out, self._patterns
+
+        candidates = []
+        node = 0
+        for i, ch in enumerate(normalized):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for pattern_id in out[node]:
+                length, skill_idx, case_form = patterns[pattern_id]
+                start = i + 1 - length
+                if case_form is not None and text[start:i + 1] != case_form:
+                    continue
+                if self._bounded(text, start, i + 1):
+                    candidates.append((start, i + 1, skill_idx))
+
+        candidates.sort(key=lambda m: (m[0], -m[1]))
+        matches, last_end = [], 0
+        for start, end, skill_idx in candidates:
+            if start >= last_end:
+                matches.append((start, end, self.skills[skill_idx].name))
+                last_end = end
+        return matches
+
+    def find_skills(self, text: str) -> Dict[str, int]:
+        """Canonical skill name -> number of mentions, in order of first mention."""
+        counts: Dict[str, int] = {}
+        for _, _, name in self.find_matches(text):
+            counts[name] = counts.get(name, 0) + 1
+        return counts
+
+    def match(self, job_text: str, resume_text: str) -> SkillMatch:
+        job_skills = self.find_skills(job_text)
+        resume_skills = self.find_skills(resume_text)
+        return SkillMatch(
+            matched=[s for s in job_skills if s in resume_skills],
+            missing=[s for s in job_skills if s not in resume_skills],
+            extra=[s for s in resume_skills if s not in job_skills],
+        )
+
+
+def load_skills(path: str) -> Tuple[List[Skill], List[str]]:
+    """Read a taxonomy JSON file: {"skills": [{"name", "category", "aliases"}], "match_case": [...]}."""
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    skills = [
+        Skill(entry["name"], entry.get("category", "other"), tuple(entry.get("aliases") or ()))
+        for entry in data.get("skills", [])
+    ]
+    return skills, list(data.get("match_case") or [])
+
+
+def build_taxonomy() -> SkillTaxonomy:
+    """The built-in taxonomy, with SKILL_TAXONOMY_PATH merged over it when set."""
+    skills, match_case = load_skills(BUILTIN_TAXONOMY_PATH)
+    if SKILL_TAXONOMY_PATH:
+        try:
+            extra_skills, extra_case = load_skills(SKILL_TAXONOMY_PATH)
+        except (OSError, ValueError, KeyError) as e:
+            logger.error(f"Could not load skill taxonomy from {SKILL_TAXONOMY_PATH}: {e}")
+        else:
+            merged = {skill.name: skill for skill in skills}
+            for skill in extra_skills:
+                known = merged.get(skill.name)
+                if known is not None:
+                    skill = Skill(skill.name, skill.category,
+                                  known.aliases + tuple(a for a in skill.aliases if a not in known.aliases))
+                merged[skill.name] = skill
+            skills = list(merged.values())
+            match_case += extra_case
+    taxonomy = SkillTaxonomy(skills, match_case)
+    logger.info(f"Skill taxonomy compiled: {len(taxonomy.skills)} skills, {len(taxonomy._patterns)} surface forms")
+    return taxonomy
+
+
+_taxonomy: Optional[SkillTaxonomy] = None
+_taxonomy_lock = threading.Lock()
+
+
+def get_taxonomy() -> SkillTaxonomy:
+    """The process-wide taxonomy, compiled on first use."""
+    global _taxonomy
+    if _taxonomy is None:
+        with _taxonomy_lock:
+            if _taxonomy is None:
+                _taxonomy = build_taxonomy()
+    return _taxonomy
+
+
+def find_skills(text: str) -> Dict[str, int]:
+    return get_taxonomy().find_skills(text)
+
+
+def match_skills(job_text: str, resume_text: str) -> SkillMatch:
+    return get_taxonomy().match(job_text, resume_text)
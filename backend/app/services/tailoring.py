@@ -0,0 +1,275 @@
+"""
+Resume tailoring pipeline.
+
+Parsing the resume and the job description are independent, and so are the
+initial ATS score and the tailoring call once both parses exist; the DAG
+executor runs each of those pairs concurrently.
+
+    parse_resume ─┬─> initial_ats ──────────┐
+                  ├─> tailor ─┬─> final_ats ┘
+    parse_job ────┘           ├─> filename ─┬─> pdf
+                              │             └─> json
+
+`stream_tailoring` runs the same DAG but yields each stage's result (and
+optionally the LLM's output tokens) as it happens, for the SSE endpoints.
+
+S3 uploads of the generated files run in the background (pdf_generator.upload_queue);
+an application's tailored_resume_s3_url is filled in when its PDF upload finishes.
+"""
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Tuple
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.orm import Session
+
+from app.db.database import SessionLocal
+from app.models.application import Application
+from app.services.ats_scorer import calculate_ats
+from app.services.ollama_client import stream_tokens
+from app.services.parse_cache import get_parsed_job_description, get_parsed_resume
+from app.services.pipeline import Pipeline, PipelineRun, Stage
+from app.services.resume_processor import (
+    extract_resume_data,
+    tailor_resume_for_job,
+    create_resume_filename,
+    generate_resume_pdf,
+    save_resume_json
+)
+
+try:
+    from pdf_generator import upload_queue
+except ImportError:
+    upload_queue = None
+
+logger = logging.getLogger(__name__)
+
+
+def _parse_resume(resume_text, resume_id):
+    if resume_id is not None:
+        return get_parsed_resume(resume_id, resume_text)
+    return extract_resume_data(resume_text)
+
+
+def _initial_ats(parse_resume, parse_job):
+    return calculate_ats(parse_resume, parse_job, is_optimized=False)
+
+
+def _final_ats(tailor, parse_job, initial_ats, score_with_baseline):
+    resume = dict(tailor)
+    if score_with_baseline:
+        resume["base_score"] = initial_ats.get("score", 35)
+    return calculate_ats(resume, parse_job, is_optimized=True)
+
+
+def _streaming_stage(stage: Stage, on_token: Callable[[str, str], None]) -> Stage:
+    """Wrap a sync stage so LLM output generated while it runs goes to `on_token(stage, text)`."""
+    def run(**kwargs):
+        with stream_tokens(lambda text: on_token(stage.name, text)):
+            return stage.func(**kwargs)
+    return Stage(stage.name, run, stage.deps)
+
+
+def build_tailoring_pipeline(score_with_baseline: bool = False,
+                             on_token: Optional[Callable[[str, str], None]] = None,
+                             resume_id: Optional[int] = None,
+                             renderer: Optional[str] = None,
+                             job_id: Optional[int] = None) -> Pipeline:
+    """
+    Build the tailoring DAG. Inputs: `resume_text`, `job_description_text`.
+    With `resume_id`, the resume parse is read from (or stored on) that Resume row.
+    With `score_with_baseline`, the final ATS call sees the initial score as `base_score`.
+    With `on_token`, LLM output is streamed to `on_token(stage_name, text)` as it is generated.
+    `renderer` picks the PDF renderer ("latex" or "direct"; default PDF_RENDERER).
+    With `job_id`, output filenames include it so jobs at the same company don't collide.
+    """
+    stages = [
+        Stage("parse_resume", lambda resume_text: _parse_resume(resume_text, resume_id), ("resume_text",)),
+        Stage("parse_job", lambda job_description_text: get_parsed_job_description(job_description_text),
+              ("job_description_text",)),
+        Stage("initial_ats", _initial_ats, ("parse_resume", "parse_job")),
+        Stage("tailor", lambda parse_resume, parse_job: tailor_resume_for_job(parse_resume, parse_job),
+              ("parse_resume", "parse_job")),
+        Stage("final_ats",
+              lambda tailor, parse_job, initial_ats: _final_ats(tailor, parse_job, initial_ats, score_with_baseline),
+              ("tailor", "parse_job", "initial_ats")),
+        Stage("filename", lambda tailor, parse_job: create_resume_filename(tailor, parse_job, job_id),
+              ("tailor", "parse_job")),
+        Stage("pdf", lambda tailor, filename: generate_resume_pdf(tailor, filename, renderer), ("tailor", "filename")),
+        Stage("json", lambda tailor, filename: save_resume_json(tailor, filename), ("tailor", "filename")),
+    ]
+    if on_token is not None:
+        stages = [_streaming_stage(stage, on_token) for stage in stages]
+    return Pipeline(inputs=("resume_text", "job_description_text"), stages=stages)
+
+
+async def run_tailoring(resume_text: str, job_description_text: str, score_with_baseline: bool = False,
+                        on_stage_complete=None, resume_id: Optional[int] = None,
+                        renderer: Optional[str] = None, job_id: Optional[int] = None) -> PipelineRun:
+    pipeline = build_tailoring_pipeline(score_with_baseline, resume_id=resume_id, renderer=renderer, job_id=job_id)
+    return await pipeline.run(
+        {"resume_text": resume_text, "job_description_text": job_description_text},
+        on_stage_complete=on_stage_complete,
+    )
+
+
+async def stream_tailoring(resume_text: str, job_description_text: str, score_with_baseline: bool = False,
+                           include_tokens: bool = False, resume_id: Optional[int] = None,
+                           renderer: Optional[str] = None,
+                           job_id: Optional[int] = None) -> AsyncIterator[Tuple[str, Any]]:
+    """
+    Run the tailoring DAG, yielding events as they happen:
+    ("stage", {"stage", "result"}) as each stage completes,
+    ("token", {"stage", "text"}) for generated LLM output when `include_tokens`,
+    and finally ("run", PipelineRun). A failing stage raises StageError.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+
+    def emit(event: str, data: Any) -> None:
+        # Token callbacks arrive on the Ollama client loop's thread
+        loop.call_soon_threadsafe(queue.put_nowait, (event, data))
+
+    on_token = (lambda stage, text: emit("token", {"stage": stage, "text": text})) if include_tokens else None
+    pipeline = build_tailoring_pipeline(score_with_baseline, on_token, resume_id, renderer, job_id)
+
+    async def on_stage_complete(name: str, result: Any) -> None:
+        queue.put_nowait(("stage", {"stage": name, "result": jsonable_encoder(result)}))
+
+    async def execute() -> None:
+        try:
+            run = await pipeline.run(
+                {"resume_text": resume_text, "job_description_text": job_description_text},
+                on_stage_complete=on_stage_complete,
+            )
+            emit("run", run)
+        except Exception as e:
+            emit("error", e)
+
+    task = asyncio.create_task(execute())
+    try:
+        while True:
+            event, data = await queue.get()
+            if event == "error":
+                raise data
+            yield event, data
+            if event == "run":
+                return
+    finally:
+        task.cancel()
+
+
+def summarize_scores(run: PipelineRun) -> Dict[str, Any]:
+    """Initial/final ATS scores and feedback in the shape the resume endpoints return."""
+    initial = run.results["initial_ats"]
+    final = run.results["final_ats"]
+    initial_score = initial.get("score", 35)
+    final_score = final.get("score", initial_score + 40)
+    return {
+        "initial_ats_score": initial_score,
+        "initial_ats_feedback": initial.get("improvements", []),
+        "final_ats_score": final_score,
+        "final_ats_feedback": final.get("improvements", []),
+        "score_improvement": final_score - initial_score,
+    }
+
+
+def _backfill_s3_url(file_path: str, s3_url: str) -> None:
+    """Upload listener: store a tailored PDF's S3 URL on the applications that use that PDF."""
+    if not file_path.endswith(".pdf"):
+        return
+    db = SessionLocal()
+    try:
+        updated = db.query(Application).filter(Application.tailored_resume_path == file_path).update(
+            {Application.tailored_resume_s3_url: s3_url}, synchronize_session=False
+        )
+        db.commit()
+        if updated:
+            logger.info(f"Backfilled S3 URL for {file_path} on {updated} application(s)")
+    finally:
+        db.close()
+
+
+if upload_queue is not None:
+    upload_queue.add_listener(_backfill_s3_url)
+
+
+def _pdf_s3_url(pdf_result: Optional[Dict[str, Any]]) -> Optional[str]:
+    """S3 URL of a run's PDF: set if uploaded inline, else known once its background upload finished."""
+    if not pdf_result:
+        return None
+    if pdf_result.get("s3_pdf_url") or upload_queue is None:
+        return pdf_result.get("s3_pdf_url")
+    return upload_queue.uploaded_url(pdf_result.get("pdf_path"))
+
+
+def save_tailored_application(db: Session, user_id: int, job_id: int, resume_id: int,
+                              run: PipelineRun) -> Application:
+    """
+    Create or update the Application for (user, job, resume) with the tailored PDF from a run.
+    If the PDF is still uploading, tailored_resume_s3_url is backfilled when the upload finishes.
+    """
+    pdf_result = run.results["pdf"]
+    application = db.query(Application).filter(
+        Application.user_id == user_id,
+        Application.job_id == job_id,
+        Application.resume_id == resume_id
+    ).first()
+
+    if application:
+        # Update existing application
+        application.tailored_resume_path = pdf_result.get("pdf_path") if pdf_result else None
+        application.tailored_resume_s3_url = _pdf_s3_url(pdf_result)
+    else:
+        # Create new application
+        application = Application(
+            user_id=user_id,
+            job_id=job_id,
+            resume_id=resume_id,
+            tailored_resume_path=pdf_result.get("pdf_path") if pdf_result else None,
+            tailored_resume_s3_url=_pdf_s3_url(pdf_result)
+        )
+        db.add(application)
+
+    db.commit()
+    if application.tailored_resume_s3_url is None and _pdf_s3_url(pdf_result):
+        # The upload finished between the check above and the commit, when the row was not yet visible
+        application.tailored_resume_s3_url = _pdf_s3_url(pdf_result)
+        db.commit()
+    db.refresh(application)
+    return application
+
+
+def tailored_application_response(application: Application, run: PipelineRun) -> Dict[str, Any]:
+    """Application fields plus customization metadata, as returned by /resumes/tailor."""
+    pdf_result = run.results["pdf"]
+    scores = summarize_scores(run)
+    return {
+        "id": application.id,
+        "user_id": application.user_id,
+        "job_id": application.job_id,
+        "resume_id": application.resume_id,
+        "tailored_resume_path": application.tailored_resume_path,
+        "tailored_resume_s3_url": application.tailored_resume_s3_url,
+        "cover_letter_text": application.cover_letter_text,
+        "cover_letter_s3_url": application.cover_letter_s3_url,
+        "applied_at": application.applied_at,
+        "last_status_update": application.last_status_update,
+        "current_stage": application.current_stage,
+        "interview_date": application.interview_date,
+        "interview_notes": application.interview_notes,
+        "interviewer_names": application.interviewer_names,
+        "generated_interview_prep": application.generated_interview_prep,
+        "follow_up_date": application.follow_up_date,
+        "follow_up_status": application.follow_up_status,
+        "created_at": application.created_at,
+        "updated_at": application.updated_at,
+        # Add customization metadata
+        "initial_ats_score": scores["initial_ats_score"],
+        "final_ats_score": scores["final_ats_score"],
+        "score_improvement": scores["score_improvement"],
+        "customized_resume": run.results["tailor"],
+        "pdf_path": pdf_result.get("pdf_path") if pdf_result else None,
+        "s3_url": application.tailored_resume_s3_url,
+        "s3_pending": pdf_result.get("s3_pending", []) if pdf_result else []
+    }
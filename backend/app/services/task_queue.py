@@ -0,0 +1,270 @@
+"""
+Persistent background task queue.
+
+Tasks live in the `tasks` table, so the queue works with both SQLite and
+Postgres and survives restarts. Web workers enqueue; task workers
+(see app/services/task_worker.py) claim tasks with a compare-and-set update,
+so any number of worker processes can poll the same table safely.
+
+A failed task is re-queued with exponential backoff until it has used
+`max_attempts`. Workers heartbeat every TASK_HEARTBEAT_SECONDS while running a
+task; a task whose worker stops heartbeating for TASK_LEASE_SECONDS (e.g. the
+process was killed) is re-queued as well. A worker only records the outcome of
+a task it still holds, so one that lost its lease cannot overwrite the new
+attempt's state.
+
+Configure via env vars: TASK_MAX_ATTEMPTS, TASK_RETRY_BACKOFF_SECONDS, TASK_LEASE_SECONDS,
+TASK_HEARTBEAT_SECONDS.
+"""
+import os
+import uuid
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.models.task import Task, TaskStatus
+
+logger = logging.getLogger(__name__)
+
+TASK_MAX_ATTEMPTS = max(1, int(os.getenv("TASK_MAX_ATTEMPTS", "3")))
+TASK_RETRY_BACKOFF_SECONDS = float(os.getenv("TASK_RETRY_BACKOFF_SECONDS", "30"))
+TASK_LEASE_SECONDS = float(os.getenv("TASK_LEASE_SECONDS", "600"))
+# Well under the lease, so a few missed beats (e.g. a slow database) don't lose the task
+TASK_HEARTBEAT_SECONDS = float(os.getenv("TASK_HEARTBEAT_SECONDS", str(min(30.0, TASK_LEASE_SECONDS / 4))))
+
+FINISHED_STATUSES = (TaskStatus.SUCCEEDED, TaskStatus.FAILED, TaskStatus.CANCELLED)
+
+
+class TaskCancelled(Exception):
+    """Raised inside a handler when cancellation of its task has been requested."""
+
+
+class PermanentTaskError(Exception):
+    """Raised by a handler for failures a retry cannot fix (e.g. the job was deleted)."""
+
+
+def _now() -> datetime:
+    return datetime.utcnow()
+
+
+def enqueue_task(db: Session, user_id: int, kind: str, payload: Dict[str, Any],
+                 total_stages: Optional[int] = None, max_attempts: Optional[int] = None) -> Task:
+    task = Task(
+        id=str(uuid.uuid4()),
+        user_id=user_id,
+        kind=kind,
+        status=TaskStatus.QUEUED,
+        payload=payload,
+        progress={"completed_stages": [], "total_stages": total_stages},
+        max_attempts=max_attempts or TASK_MAX_ATTEMPTS,
+        available_at=_now(),
+    )
+    db.add(task)
+    db.commit()
+    db.refresh(task)
+    return task
+
+
+def claim_next_task(db: Session, worker_id: str, kinds: Optional[List[str]] = None) -> Optional[Task]:
+    """
+    Atomically move the oldest runnable task to RUNNING for this worker.
+    Returns None when nothing is runnable or another worker won every race.
+    """
+    for _ in range(5):
+        query = db.query(Task.id).filter(
+            Task.status == TaskStatus.QUEUED,
+            Task.available_at <= _now()
+        )
+        if kinds:
+            query = query.filter(Task.kind.in_(kinds))
+        candidate = query.order_by(Task.available_at, Task.created_at).first()
+        if candidate is None:
+            return None
+
+        now = _now()
+        claimed = db.execute(
+            update(Task)
+            .where(Task.id == candidate.id, Task.status == TaskStatus.QUEUED)
+            .values(
+                status=TaskStatus.RUNNING,
+                locked_by=worker_id,
+                heartbeat_at=now,
+                started_at=now,
+                attempts=Task.attempts + 1,
+                error=None,
+            )
+        ).rowcount
+        db.commit()
+        if claimed:
+            return db.query(Task).filter(Task.id == candidate.id).first()
+    return None
+
+
+def _update_held(db: Session, task: Task, worker_id: str, **values: Any) -> None:
+    """Update a task this worker still holds; raises TaskCancelled once another worker owns it."""
+    updated = db.execute(
+        update(Task)
+        .where(Task.id == task.id, Task.status == TaskStatus.RUNNING, Task.locked_by == worker_id)
+        .values(heartbeat_at=_now(), **values)
+    ).rowcount
+    db.commit()
+    if not updated:
+        logger.warning(f"Task {task.id} is no longer held by {worker_id}; stopping")
+        raise TaskCancelled()
+
+
+def record_stage(db: Session, task: Task, worker_id: str, stage: str) -> bool:
+    """
+    Persist a completed stage and refresh the task's heartbeat.
+    Returns True if cancellation has been requested meanwhile; raises
+    TaskCancelled if the task was re-queued and claimed by another worker.
+    """
+    db.refresh(task)
+    progress = dict(task.progress or {})
+    progress["completed_stages"] = list(progress.get("completed_stages") or []) + [stage]
+    cancel_requested = task.cancel_requested
+    _update_held(db, task, worker_id, progress=progress, stage=stage)
+    return cancel_requested
+
+
+def record_batch_job(db: Session, task: Task, worker_id: str, job_id: int, **fields: Any) -> bool:
+    """
+    Merge `fields` into one job's entry of a batch task's progress["jobs"] and
+    refresh the heartbeat. Returns True if cancellation has been requested;
+    raises TaskCancelled if the task is no longer held by this worker.
+    """
+    db.refresh(task)
+    progress = dict(task.progress or {})
+    jobs = dict(progress.get("jobs") or {})
+    jobs[str(job_id)] = {**jobs.get(str(job_id), {}), **fields}
+    progress["jobs"] = jobs
+    cancel_requested = task.cancel_requested
+    _update_held(db, task, worker_id, progress=progress)
+    return cancel_requested
+
+
+def heartbeat(db: Session, task_id: str, worker_id: str) -> bool:
+    """Refresh the lease on a task this worker runs. Returns False if the worker no longer holds it."""
+    updated = db.execute(
+        update(Task)
+        .where(Task.id == task_id, Task.status == TaskStatus.RUNNING, Task.locked_by == worker_id)
+        .values(heartbeat_at=_now())
+    ).rowcount
+    db.commit()
+    return bool(updated)
+
+
+def _finish(db: Session, task: Task, worker_id: str, values: Dict[str, Any], *conditions) -> bool:
+    """
+    Apply `values` to a task only while it is still RUNNING under `worker_id`.
+    Returns False (and changes nothing) if the lease was lost, e.g. the task was
+    re-queued as stale and claimed by another worker.
+    """
+    updated = db.execute(
+        update(Task)
+        .where(Task.id == task.id, Task.status == TaskStatus.RUNNING, Task.locked_by == worker_id, *conditions)
+        .values(locked_by=None, **values)
+    ).rowcount
+    db.commit()
+    if not updated:
+        logger.warning(f"Task {task.id} is no longer held by {worker_id}; discarding its outcome")
+    return bool(updated)
+
+
+def complete_task(db: Session, task: Task, worker_id: str, result: Dict[str, Any],
+                  application_id: Optional[int] = None) -> bool:
+    return _finish(db, task, worker_id, dict(
+        status=TaskStatus.SUCCEEDED,
+        result=result,
+        application_id=application_id,
+        error=None,
+        finished_at=_now(),
+    ))
+
+
+def fail_task(db: Session, task: Task, worker_id: str, error: str, retryable: bool = True, *conditions) -> bool:
+    """
+    Record a failure; re-queue with exponential backoff while attempts remain.
+    Extra `conditions` further restrict the update (see `_finish`).
+    """
+    values: Dict[str, Any] = {"error": error}
+    if task.cancel_requested:
+        values.update(status=TaskStatus.CANCELLED, finished_at=_now())
+    elif retryable and task.attempts < task.max_attempts:
+        delay = TASK_RETRY_BACKOFF_SECONDS * (2 ** (task.attempts - 1))
+        values.update(
+            status=TaskStatus.QUEUED,
+            available_at=_now() + timedelta(seconds=delay),
+            progress={**(task.progress or {}), "completed_stages": []},
+            stage=None,
+        )
+    else:
+        values.update(status=TaskStatus.FAILED, finished_at=_now())
+    finished = _finish(db, task, worker_id, values, *conditions)
+    if finished and values["status"] == TaskStatus.QUEUED:
+        logger.info(f"Task {task.id} failed (attempt {task.attempts}/{task.max_attempts}); "
+                    f"retrying in {delay:.0f}s")
+    return finished
+
+
+def mark_cancelled(db: Session, task: Task, worker_id: str) -> bool:
+    return _finish(db, task, worker_id, dict(status=TaskStatus.CANCELLED, finished_at=_now()))
+
+
+def cancel_task(db: Session, task: Task) -> Task:
+    """
+    Cancel a task. Queued tasks are cancelled immediately; running tasks are
+    flagged and stop at their next stage boundary.
+    """
+    if task.status in FINISHED_STATUSES:
+        return task
+    if task.status == TaskStatus.QUEUED:
+        db.execute(
+            update(Task)
+            .where(Task.id == task.id, Task.status == TaskStatus.QUEUED)
+            .values(status=TaskStatus.CANCELLED, cancel_requested=True, finished_at=_now())
+        )
+    else:
+        task.cancel_requested = True
+    db.commit()
+    db.refresh(task)
+    if task.status == TaskStatus.RUNNING and not task.cancel_requested:
+        # Claimed by a worker between our read and the update above
+        task.cancel_requested = True
+        db.commit()
+    return task
+
+
+def retry_task(db: Session, task: Task) -> Task:
+    """Re-queue a failed or cancelled task with a fresh attempt budget."""
+    task.status = TaskStatus.QUEUED
+    task.attempts = 0
+    task.cancel_requested = False
+    task.error = None
+    task.result = None
+    task.stage = None
+    task.progress = {**(task.progress or {}), "completed_stages": []}
+    task.available_at = _now()
+    task.started_at = None
+    task.finished_at = None
+    db.commit()
+    db.refresh(task)
+    return task
+
+
+def requeue_stale_tasks(db: Session) -> int:
+    """Hand RUNNING tasks whose worker stopped heartbeating back to the queue."""
+    cutoff = _now() - timedelta(seconds=TASK_LEASE_SECONDS)
+    stale = db.query(Task).filter(Task.status == TaskStatus.RUNNING, Task.heartbeat_at < cutoff).all()
+    requeued = 0
+    for task in stale:
+        worker_id = task.locked_by
+        # Guarded on the heartbeat too, in case the worker came back since the query
+        if fail_task(db, task, worker_id, f"Worker {worker_id} stopped responding", True,
+                     Task.heartbeat_at < cutoff):
+            logger.warning(f"Task {task.id} lost its worker ({worker_id}); re-queued")
+            requeued += 1
+    return requeued
@@ -0,0 +1,304 @@
+"""
+Task worker: claims queued tasks from the `tasks` table and runs them.
+
+Run a dedicated pool with `python worker.py` (TASK_WORKER_CONCURRENCY
+processes, independent of the number of web workers), or set
+TASK_WORKER_EMBEDDED=true to run worker threads inside the API process for
+single-process development setups.
+
+Configure via env vars: TASK_WORKER_CONCURRENCY, TASK_POLL_INTERVAL_SECONDS, TASK_WORKER_EMBEDDED,
+TAILOR_BATCH_CONCURRENCY.
+"""
+import os
+import signal
+import socket
+import asyncio
+import logging
+import threading
+import multiprocessing
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.orm import Session
+
+from app.db.database import SessionLocal, engine, init_db
+from app.models.job import Job
+from app.models.resume import Resume
+from app.models.task import Task
+from app.services import task_queue
+from app.services.task_queue import PermanentTaskError, TaskCancelled
+from app.services.parse_cache import get_parsed_resume
+from pdf_generator import compile_service as latex_compile_service
+
+try:
+    from pdf_generator import s3_utils, upload_queue
+except ImportError:
+    s3_utils = upload_queue = None
+from app.services.tailoring import (
+    run_tailoring,
+    save_tailored_application,
+    summarize_scores,
+    tailored_application_response
+)
+
+logger = logging.getLogger(__name__)
+
+TASK_WORKER_CONCURRENCY = max(1, int(os.getenv("TASK_WORKER_CONCURRENCY", "2")))
+TASK_POLL_INTERVAL_SECONDS = float(os.getenv("TASK_POLL_INTERVAL_SECONDS", "1.0"))
+TASK_WORKER_EMBEDDED = os.getenv("TASK_WORKER_EMBEDDED", "false").lower() == "true"
+# Jobs of one batch tailored at the same time (LLM calls are further capped by OLLAMA_NUM_PARALLEL)
+TAILOR_BATCH_CONCURRENCY = max(1, int(os.getenv("TAILOR_BATCH_CONCURRENCY", "4")))
+
+
+class _Heartbeat:
+    """
+    Refreshes a running task's lease every TASK_HEARTBEAT_SECONDS from its own
+    thread and session, so long stages (a slow LLM call, a large batch) don't
+    outlive TASK_LEASE_SECONDS. `lost` is set once another worker holds the task.
+    """
+
+    def __init__(self, task_id: str, worker_id: str):
+        self.task_id = task_id
+        self.worker_id = worker_id
+        self.lost = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"heartbeat-{task_id[:8]}", daemon=True)
+
+    def __enter__(self) -> "_Heartbeat":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *_) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(task_queue.TASK_HEARTBEAT_SECONDS):
+            db = SessionLocal()
+            try:
+                if not task_queue.heartbeat(db, self.task_id, self.worker_id):
+                    logger.warning(f"Task {self.task_id} was taken from worker {self.worker_id}")
+                    self.lost = True
+                    return
+            except Exception as e:
+                logger.warning(f"Heartbeat for task {self.task_id} failed: {e}")
+            finally:
+                db.close()
+
+
+# A handler runs one task (held under the given heartbeat) and returns (result, application_id)
+Handler = Callable[[Session, Task, _Heartbeat, Callable[[str, Any], None]], Tuple[Dict[str, Any], Optional[int]]]
+
+
+def _run_tailor_task(db: Session, task: Task, heartbeat: _Heartbeat,
+                     on_stage_complete) -> Tuple[Dict[str, Any], Optional[int]]:
+    payload = task.payload
+    job = db.query(Job).filter(Job.id == payload["job_id"], Job.user_id == task.user_id).first()
+    if not job:
+        raise PermanentTaskError("Job not found")
+    resume = db.query(Resume).filter(Resume.id == payload["resume_id"], Resume.user_id == task.user_id).first()
+    if not resume or not resume.raw_text:
+        raise PermanentTaskError("Resume not found or has no raw text data")
+
+    run = asyncio.run(run_tailoring(
+        resume.raw_text, job.description, on_stage_complete=on_stage_complete, resume_id=resume.id,
+        renderer=payload.get("renderer"), job_id=job.id
+    ))
+    application = save_tailored_application(db, task.user_id, job.id, resume.id, run)
+    result = tailored_application_response(application, run)
+    result["stage_timings"] = run.timings
+    return jsonable_encoder(result), application.id
+
+
+async def _tailor_batch_jobs(db: Session, task: Task, heartbeat: _Heartbeat, resume: Resume, jobs: Dict[int, Job],
+                             job_ids: List[int]) -> None:
+    semaphore = asyncio.Semaphore(TAILOR_BATCH_CONCURRENCY)
+    worker_id = heartbeat.worker_id
+
+    async def tailor_one(job_id: int) -> None:
+        async with semaphore:
+            if heartbeat.lost:
+                raise TaskCancelled()
+            if task_queue.record_batch_job(db, task, worker_id, job_id, status="running", stage=None, error=None):
+                task_queue.record_batch_job(db, task, worker_id, job_id, status="cancelled")
+                raise TaskCancelled()
+            job = jobs.get(job_id)
+            if job is None:
+                # Can never succeed, so retries of the batch skip it
+                task_queue.record_batch_job(db, task, worker_id, job_id, status="failed", error="Job not found",
+                                            permanent=True)
+                return
+
+            def on_stage_complete(stage: str, _result: Any) -> None:
+                # Stop at the next stage once the batch was lost, as single tasks do
+                if heartbeat.lost or task_queue.record_batch_job(db, task, worker_id, job_id, stage=stage):
+                    raise TaskCancelled()
+
+            try:
+                run = await run_tailoring(resume.raw_text, job.description, on_stage_complete=on_stage_complete,
+                                          resume_id=resume.id, renderer=task.payload.get("renderer"),
+                                          job_id=job.id)
+                application = save_tailored_application(db, task.user_id, job_id, resume.id, run)
+            except TaskCancelled:
+                db.rollback()
+                task_queue.record_batch_job(db, task, worker_id, job_id, status="cancelled")
+                raise
+            except Exception as e:
+                db.rollback()
+                logger.warning(f"Batch {task.id}: job {job_id} failed: {e}")
+                task_queue.record_batch_job(db, task, worker_id, job_id, status="failed", error=str(e))
+                return
+            task_queue.record_batch_job(
+                db, task, worker_id, job_id,
+                status="succeeded",
+                application_id=application.id,
+                final_ats_score=summarize_scores(run)["final_ats_score"]
+            )
+
+    outcomes = await asyncio.gather(*(tailor_one(job_id) for job_id in job_ids), return_exceptions=True)
+    for outcome in outcomes:
+        if isinstance(outcome, BaseException):
+            raise outcome
+
+
+def _run_tailor_batch_task(db: Session, task: Task, heartbeat: _Heartbeat,
+                           on_stage_complete) -> Tuple[Dict[str, Any], Optional[int]]:
+    """
+    Tailor one resume against many jobs. The resume is parsed once up front (and
+    stored on its row, where every job's pipeline then finds it); the per-job
+    pipelines run concurrently, up to TAILOR_BATCH_CONCURRENCY at a time.
+    A retry re-runs only the jobs that have neither succeeded nor failed
+    permanently; once only permanent failures remain, the batch fails for good.
+    """
+    payload = task.payload
+    resume = db.query(Resume).filter(Resume.id == payload["resume_id"], Resume.user_id == task.user_id).first()
+    if not resume or not resume.raw_text:
+        raise PermanentTaskError("Resume not found or has no raw text data")
+
+    get_parsed_resume(resume.id, resume.raw_text)
+    on_stage_complete("parse_resume", None)
+
+    job_ids = [int(job_id) for job_id in payload["job_ids"]]
+    jobs = {job.id: job for job in db.query(Job).filter(Job.id.in_(job_ids), Job.user_id == task.user_id).all()}
+    previous = (task.progress or {}).get("jobs") or {}
+    done = {job_id for job_id, entry in previous.items()
+            if entry.get("status") == "succeeded" or entry.get("permanent")}
+    pending = [job_id for job_id in job_ids if str(job_id) not in done]
+    asyncio.run(_tailor_batch_jobs(db, task, heartbeat, resume, jobs, pending))
+
+    db.refresh(task)
+    statuses = task.progress["jobs"]
+    failed = [job_id for job_id in job_ids if statuses[str(job_id)]["status"] != "succeeded"]
+    if failed and all(statuses[str(job_id)].get("permanent") for job_id in failed):
+        raise PermanentTaskError(f"{len(failed)} of {len(job_ids)} jobs failed permanently: {failed}")
+    if failed:
+        raise RuntimeError(f"{len(failed)} of {len(job_ids)} jobs failed: {failed}")
+    return {"applications": {str(job_id): statuses[str(job_id)]["application_id"] for job_id in job_ids}}, None
+
+
+HANDLERS: Dict[str, Handler] = {
+    "tailor": _run_tailor_task,
+    "tailor_batch": _run_tailor_batch_task,
+}
+
+
+def process_task(db: Session, task: Task, worker_id: str) -> None:
+    """Run a claimed task to completion, recording progress, retries and cancellation."""
+    handler = HANDLERS.get(task.kind)
+    if handler is None:
+        task_queue.fail_task(db, task, worker_id, f"No handler for task kind '{task.kind}'", retryable=False)
+        return
+
+    with _Heartbeat(task.id, worker_id) as heartbeat:
+        def on_stage_complete(stage: str, _result: Any) -> None:
+            # Stop at the next stage once the task was lost; its outcome would be discarded anyway
+            if heartbeat.lost or task_queue.record_stage(db, task, worker_id, stage):
+                raise TaskCancelled()
+
+        logger.info(f"Task {task.id} ({task.kind}) started, attempt {task.attempts}/{task.max_attempts}")
+        try:
+            result, application_id = handler(db, task, heartbeat, on_stage_complete)
+        except TaskCancelled:
+            db.rollback()
+            if task_queue.mark_cancelled(db, task, worker_id):
+                logger.info(f"Task {task.id} cancelled")
+        except PermanentTaskError as e:
+            db.rollback()
+            if task_queue.fail_task(db, task, worker_id, str(e), retryable=False):
+                logger.warning(f"Task {task.id} failed permanently: {e}")
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Task {task.id} failed: {e}", exc_info=True)
+            task_queue.fail_task(db, task, worker_id, str(e))
+        else:
+            if task_queue.complete_task(db, task, worker_id, result, application_id):
+                logger.info(f"Task {task.id} succeeded")
+
+
+def run_worker(stop_event: threading.Event, worker_id: Optional[str] = None) -> None:
+    """Poll for tasks until `stop_event` is set. Each worker runs one task at a time."""
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{threading.current_thread().name}"
+    kinds: List[str] = list(HANDLERS)
+    logger.info(f"Task worker {worker_id} started")
+    while not stop_event.is_set():
+        db = SessionLocal()
+        task = None
+        try:
+            task_queue.requeue_stale_tasks(db)
+            task = task_queue.claim_next_task(db, worker_id, kinds)
+            if task is not None:
+                process_task(db, task, worker_id)
+        except Exception as e:
+            logger.error(f"Task worker {worker_id} error: {e}", exc_info=True)
+        finally:
+            db.close()
+        if task is None:
+            stop_event.wait(TASK_POLL_INTERVAL_SECONDS)
+    logger.info(f"Task worker {worker_id} stopped")
+
+
+def start_embedded_workers(concurrency: int = TASK_WORKER_CONCURRENCY) -> threading.Event:
+    """Start worker threads in this process; set the returned event to stop them."""
+    stop_event = threading.Event()
+    for i in range(concurrency):
+        threading.Thread(target=run_worker, args=(stop_event,), name=f"task-worker-{i}", daemon=True).start()
+    return stop_event
+
+
+def _worker_process() -> None:
+    # Connections pooled by the parent must not be shared across fork
+    engine.dispose()
+    stop_event = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop_event.set())
+    signal.signal(signal.SIGINT, lambda *_: stop_event.set())
+    run_worker(stop_event)
+    # Let background S3 uploads of the last tasks finish before the process exits
+    if upload_queue is not None and not upload_queue.drain(upload_queue.SHUTDOWN_DRAIN_SECONDS):
+        logger.warning(f"Worker exiting with {upload_queue.stats()['pending']} S3 upload(s) still pending")
+
+
+def main(concurrency: int = TASK_WORKER_CONCURRENCY) -> None:
+    """Run a pool of `concurrency` worker processes until SIGTERM/SIGINT."""
+    init_db()
+    # Build the LaTeX format once here rather than racing to build it in every worker
+    latex_compile_service.warm_up()
+    # Report S3 misconfiguration once at startup (worker processes create their own client)
+    if s3_utils is not None and os.getenv("S3_BUCKET_NAME"):
+        s3_utils.probe_s3()
+    processes = [
+        multiprocessing.Process(target=_worker_process, name=f"task-worker-{i}")
+        for i in range(concurrency)
+    ]
+    for process in processes:
+        process.start()
+
+    def _shutdown(*_):
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+
+    signal.signal(signal.SIGTERM, _shutdown)
+    signal.signal(signal.SIGINT, _shutdown)
+    logger.info(f"Started {concurrency} task worker process(es)")
+    for process in processes:
+        process.join()
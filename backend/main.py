@@ -3,6 +3,7 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 import os
 import logging
+import threading
 from dotenv import load_dotenv
 
 # Import database initialization
@@ -11,6 +12,14 @@ from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from datetime import datetime as dt_now
 from app.db.database import SessionLocal
 from app.models.application import Application as ApplicationModel
+from app.services.llm_cache import get_llm_cache
+from app.services.task_worker import TASK_WORKER_EMBEDDED, TASK_WORKER_CONCURRENCY, start_embedded_workers
+from pdf_generator import compile_service as latex_compile_service
+
+try:
+    from pdf_generator import presign, s3_utils, upload_queue
+except ImportError:
+    presign = s3_utils = upload_queue = None
 
 # Configure logging
 logging.basicConfig(
@@ -47,9 +56,10 @@ app.add_middleware(
 )
 
 # Import routers
-from app.api.endpoints import jobs, resumes, search, outreach, automation, referrals, gmail, auth, applications
+from app.api.endpoints import jobs, resumes, search, outreach, automation, referrals, gmail, auth, applications, tasks
 
 scheduler = AsyncIOScheduler()
+_task_workers_stop = None
 
 async def _check_follow_up_reminders():
     """Hourly background task: logs overdue follow-ups. Extend with email notifications as needed."""
@@ -79,11 +89,25 @@ async def startup_event():
     scheduler.add_job(_check_follow_up_reminders, 'interval', hours=1, id='follow_up_check')
     scheduler.start()
     logger.info("Database initialized and scheduler started")
+    # Build the resume template's LaTeX format in the background, ahead of the first PDF
+    threading.Thread(target=latex_compile_service.warm_up, name="latex-format-warmup", daemon=True).start()
+    # Check S3 reachability once, off the startup path; uploads no longer test the connection themselves
+    if s3_utils is not None and os.getenv("S3_BUCKET_NAME"):
+        threading.Thread(target=s3_utils.probe_s3, name="s3-probe", daemon=True).start()
+    if TASK_WORKER_EMBEDDED:
+        # Development convenience; in production run `python worker.py` instead
+        global _task_workers_stop
+        _task_workers_stop = start_embedded_workers(TASK_WORKER_CONCURRENCY)
+        logger.info(f"Started {TASK_WORKER_CONCURRENCY} embedded task worker thread(s)")
 
 @app.on_event("shutdown")
 async def shutdown_event():
     scheduler.shutdown()
     logger.info("Scheduler stopped")
+    if _task_workers_stop is not None:
+        _task_workers_stop.set()
+    if upload_queue is not None and not upload_queue.drain(upload_queue.SHUTDOWN_DRAIN_SECONDS):
+        logger.warning(f"Shutting down with {upload_queue.stats()['pending']} S3 upload(s) still pending")
 
 # Include routers
 app.include_router(auth.router, prefix="/auth", tags=["Auth"])
@@ -95,11 +119,19 @@ app.include_router(automation.router)
 app.include_router(referrals.router)
 app.include_router(gmail.router)
 app.include_router(applications.router)
+app.include_router(tasks.router)
 
 @app.get("/health")
 async def health_check():
     """Health check endpoint."""
-    return {"status": "healthy"}
+    cache = get_llm_cache()
+    return {
+        "status": "healthy",
+        "llm_cache": cache.stats() if cache else None,
+        "s3": s3_utils.probe_status() if s3_utils else None,
+        "s3_uploads": upload_queue.stats() if upload_queue else None,
+        "presigned_urls": presign.stats() if presign else None
+    }
 
 # Mount static files directories for output
 OUTPUT_DIR = "output"
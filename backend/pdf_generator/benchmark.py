@@ -0,0 +1,259 @@
+"""
+Micro-benchmarks for resume PDF generation.
+
+    python -m pdf_generator.benchmark [--resumes 500] [--seed 7] [--only populate]
+
+Each benchmark runs over a synthetic resume corpus (special characters,
+unicode, long bullet lists), checks that the optimized code path produces
+output identical to the reference implementation, and reports the speedup.
+`render` instead compares the two PDF renderers end to end (latency and peak
+memory); its LaTeX half only runs where pdflatex is installed.
+"""
+import os
+import re
+import sys
+import time
+import random
+import shutil
+import argparse
+import resource
+import tempfile
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+from . import compile_service, direct_renderer, pdf_cache
+from .constants import DEFAULT_TEMPLATE_PATH
+from .json_to_pdf import (
+    LATEX_ESCAPE_SEQUENCE,
+    escape_latex_special_chars,
+    escape_latex_special_chars_by_replace,
+    load_template,
+    populate_template,
+    populate_template_by_pattern,
+    read_latex_template
+)
+
+TEMPLATE_PATH = str(Path(__file__).parent / "templates" / DEFAULT_TEMPLATE_PATH)
+
+_WORDS = ("built", "scaled", "latency", "pipeline", "API", "users", "Kubernetes", "PostgreSQL", "C++", "C#",
+          "R&D", "100%", "$2M", "p_99", "{json}", "~5x", "^2", "#1", "back\\slash", "naïve", "café", "→", "—")
+_SPECIAL_HEAVY = "&%$#_{}~^\\"
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    text = " ".join(rng.choice(_WORDS) for _ in range(words))
+    if rng.random() < 0.3:
+        text += " " + "".join(rng.choice(_SPECIAL_HEAVY) for _ in range(rng.randint(1, 8)))
+    return text
+
+
+def synthetic_resume(rng: random.Random) -> Dict[str, Any]:
+    """A resume in the customized-resume JSON shape with randomized, escape-heavy content."""
+    return {
+        "personal_info": {
+            "name": f"Jane_{rng.randint(1, 999)} O'Neil & Co",
+            "email": "jane.doe+jobs@example.com",
+            "phone": "949-555-0100",
+            "linkedin": "linkedin.com/in/jane_doe",
+            "github": "github.com/jane-doe",
+        },
+        "education": [
+            {
+                "institution": f"University of {rng.choice(['California', 'Texas', 'Zürich'])}",
+                "location": "Irvine, CA",
+                "degree": "B.S. Computer Science & Engineering",
+                "dates": "Aug 2016 – May 2020",
+                "details": [_sentence(rng, 8) for _ in range(rng.randint(0, 3))],
+            }
+            for _ in range(rng.randint(1, 2))
+        ],
+        "experience": [
+            {
+                "company": f"Company {i} & Sons",
+                "title": rng.choice(["Software Engineer", "SRE_II", "Data Scientist (ML/AI)"]),
+                "location": "Remote",
+                "dates": f"Jan 20{10 + i} – Present",
+                "details": [_sentence(rng, rng.randint(8, 25)) for _ in range(rng.randint(3, 8))],
+            }
+            for i in range(rng.randint(2, 6))
+        ],
+        "projects": [
+            {
+                "name": f"Project_{i} {{beta}}",
+                "technologies_used": [rng.choice(_WORDS) for _ in range(rng.randint(1, 12))],
+                "details": [_sentence(rng, rng.randint(8, 20)) for _ in range(rng.randint(1, 4))],
+            }
+            for i in range(rng.randint(1, 4))
+        ],
+        "skills": {
+            "Languages": [rng.choice(_WORDS) for _ in range(10)],
+            "Frameworks & Tools": [rng.choice(_WORDS) for _ in range(10)],
+            "Cloud": "AWS, GCP, 50% of infra",
+        },
+    }
+
+
+def _time(func: Callable[[], Any], repeat: int = 3) -> float:
+    """Best wall time of `repeat` runs, in seconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def _report(name: str, items: int, before: float, after: float) -> None:
+    print(f"{name}: {items} resumes | before {before * 1e6 / items:9.1f} us/resume | "
+          f"after {after * 1e6 / items:9.1f} us/resume | speedup {before / after:5.1f}x")
+
+
+def bench_populate(corpus: List[Dict[str, Any]]) -> bool:
+    """Template population: read + pattern-by-pattern substitution vs. cached template + single pass."""
+    template = load_template(TEMPLATE_PATH)
+    mismatches = sum(
+        populate_template(template, resume) != populate_template_by_pattern(template, resume)
+        for resume in corpus
+    )
+
+    def before():
+        for resume in corpus:
+            populate_template_by_pattern(read_latex_template(TEMPLATE_PATH), resume)
+
+    def after():
+        for resume in corpus:
+            populate_template(load_template(TEMPLATE_PATH), resume)
+
+    _report("populate_template", len(corpus), _time(before), _time(after))
+    if mismatches:
+        print(f"  MISMATCH: {mismatches} resumes differ from the reference output")
+    return mismatches == 0
+
+
+def _strings(value: Any) -> List[str]:
+    if isinstance(value, str):
+        return [value]
+    if isinstance(value, dict):
+        return [s for k, v in value.items() for s in _strings(k) + _strings(v)]
+    if isinstance(value, list):
+        return [s for v in value for s in _strings(v)]
+    return []
+
+
+def bench_escape(corpus: List[Dict[str, Any]]) -> bool:
+    """
+    LaTeX escaping of every field string: one replace per special character vs.
+    replacing only the characters present. The single-pass alternatives (a
+    str.translate table, an alternation regex) are timed too, for comparison.
+    """
+    fields = [s for resume in corpus for s in _strings(resume)]
+    # Adversarial strings: every special character, repeated and adjacent
+    fields += ["\\{}" * 50, "&%$#_{}~^\\" * 20, "", "plain ascii text " * 30]
+    plain = [s for s in fields if not any(c in s for c, _ in LATEX_ESCAPE_SEQUENCE)]
+
+    table = {char: escape_latex_special_chars_by_replace(char) for char, _ in LATEX_ESCAPE_SEQUENCE}
+    translate_table = str.maketrans(table)
+    alternation = re.compile("[" + re.escape("".join(table)) + "]")
+    candidates = {
+        "replace each (before)": escape_latex_special_chars_by_replace,
+        "replace present (after)": escape_latex_special_chars,
+        "str.translate": lambda s: s.translate(translate_table),
+        "alternation regex": lambda s: alternation.sub(lambda m: table[m.group()], s),
+    }
+    ok = True
+    for name, escape in candidates.items():
+        mismatches = sum(escape(s) != escape_latex_special_chars_by_replace(s) for s in fields)
+        all_s = _time(lambda: [escape(s) for s in fields])
+        plain_s = _time(lambda: [escape(s) for s in plain]) if plain else 0.0
+        print(f"escape, {name:24s}: {all_s * 1e9 / len(fields):6.0f} ns/field over {len(fields)} fields, "
+              f"{plain_s * 1e9 / max(1, len(plain)):6.0f} ns/field over the {len(plain)} without special characters"
+              + (f" | MISMATCH in {mismatches} fields" if mismatches else ""))
+        if name == "replace present (after)":
+            ok = mismatches == 0
+    return ok
+
+
+def _render_stats(name: str, render: Callable[[Dict[str, Any], str], bool], resumes: List[Dict[str, Any]],
+                  workdir: str) -> bool:
+    """Render each resume once, untraced for latency, then again under tracemalloc for peak Python memory."""
+    paths = [os.path.join(workdir, f"{name}_{i}.pdf") for i in range(len(resumes))]
+    started = time.perf_counter()
+    ok = render(resumes[0], paths[0])
+    first = time.perf_counter() - started
+
+    timings = []
+    for resume, path in zip(resumes, paths):
+        started = time.perf_counter()
+        ok = render(resume, path) and ok
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+
+    tracemalloc.start()
+    peak = 0
+    for resume, path in zip(resumes, paths):
+        tracemalloc.reset_peak()
+        render(resume, path)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+    tracemalloc.stop()
+
+    # Peak RSS of the largest child process so far, i.e. pdflatex (KiB on Linux)
+    child_rss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024 if name == "latex" else 0
+    size = sum(os.path.getsize(path) for path in paths if os.path.exists(path)) / len(paths)
+    print(f"render, {name:6s}: first {first * 1e3:8.1f} ms | median {timings[len(timings) // 2] * 1e3:8.1f} ms | "
+          f"p95 {timings[int(len(timings) * 0.95)] * 1e3:8.1f} ms | peak Python heap {peak / 1024:6.0f} KiB | "
+          f"peak subprocess RSS {child_rss:4.0f} MiB | {size / 1024:4.0f} KiB/PDF" + ("" if ok else " | FAILED"))
+    return ok
+
+
+def bench_render(corpus: List[Dict[str, Any]]) -> bool:
+    """
+    PDF rendering end to end with the PDF cache off: LaTeX (template population +
+    pdflatex through the compile pool) vs. the in-process direct renderer, over
+    the first 25 resumes of the corpus.
+    """
+    resumes = corpus[:25]
+    pdf_cache.PDF_CACHE_ENABLED = False
+    workdir = tempfile.mkdtemp(prefix="render-bench-")
+    ok = True
+    try:
+        if direct_renderer.available():
+            ok = _render_stats("direct", direct_renderer.render_pdf, resumes, workdir)
+        else:
+            print("render, direct: skipped, ReportLab is not installed")
+        if shutil.which("pdflatex"):
+            template = load_template(TEMPLATE_PATH)
+            ok = _render_stats(
+                "latex",
+                lambda resume, path: compile_service.compile_latex_source(populate_template(template, resume), path),
+                resumes, workdir
+            ) and ok
+        else:
+            print("render, latex : skipped, pdflatex is not installed")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return ok
+
+
+BENCHMARKS: Dict[str, Callable[[List[Dict[str, Any]]], bool]] = {
+    "populate": bench_populate,
+    "escape": bench_escape,
+    "render": bench_render,
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark resume PDF generation steps")
+    parser.add_argument("--resumes", type=int, default=500, help="Size of the synthetic corpus")
+    parser.add_argument("--seed", type=int, default=7, help="Random seed for the corpus")
+    parser.add_argument("--only", choices=sorted(BENCHMARKS), action="append", help="Run only these benchmarks")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    corpus = [synthetic_resume(rng) for _ in range(args.resumes)]
+    ok = all([BENCHMARKS[name](corpus) for name in (args.only or BENCHMARKS)])
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+"""
+LaTeX compile service.
+
+Running latexmk for every resume starts a fresh TeX and loads every package
+in the template preamble each time, which is most of the compile time. This
+service instead:
+
+- precompiles the template preamble (everything up to its last \\usepackage)
+  into a custom format file with mylatexformat, once per distinct preamble, so
+  each compile only typesets the body; format files are kept in
+  LATEX_FORMAT_DIR, keyed by a hash of the preamble, and shared by processes
+- runs at most LATEX_COMPILE_WORKERS TeX processes at a time, so concurrent
+  tailor requests queue instead of oversubscribing the CPU
+- compiles each job in its own temporary directory, killed after
+  LATEX_COMPILE_TIMEOUT_SECONDS
+
+If a format cannot be built (e.g. mylatexformat is not installed), or TeX
+fails to load it, the same pool compiles the full document without one. An
+error in the document itself is reported as is, without a second compile.
+
+Configure via env vars: LATEX_COMPILE_WORKERS, LATEX_COMPILE_TIMEOUT_SECONDS,
+LATEX_USE_FORMAT, LATEX_FORMAT_DIR.
+"""
+import os
+import re
+import time
+import shutil
+import hashlib
+import logging
+import tempfile
+import threading
+import subprocess
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .constants import DEFAULT_TEMPLATE_PATH
+
+logger = logging.getLogger(__name__)
+
+LATEX_COMPILE_WORKERS = max(1, int(os.getenv("LATEX_COMPILE_WORKERS", str(min(4, os.cpu_count() or 1)))))
+LATEX_COMPILE_TIMEOUT_SECONDS = float(os.getenv("LATEX_COMPILE_TIMEOUT_SECONDS", "60"))
+LATEX_USE_FORMAT = os.getenv("LATEX_USE_FORMAT", "true").lower() == "true"
+LATEX_FORMAT_DIR = Path(os.getenv("LATEX_FORMAT_DIR", Path(__file__).parent.parent / "output" / "latex_formats"))
+
+# pdflatex passes at most; a second one only runs when the log asks for it (e.g. hyperref outlines)
+LATEX_MAX_PASSES = 3
+# Bump to rebuild every format file (e.g. after changing how they are built)
+FORMAT_VERSION = "1"
+
+_JOB_NAME = "resume"
+_RERUN_RE = re.compile(r"Rerun to get|Label\(s\) may have changed")
+_ERROR_LINE_RE = re.compile(r".*\.tex:\d+: ")
+# pdflatex could not load the format, or the format did not come from mylatexformat (no \endofdump)
+_FORMAT_ERROR_RE = re.compile(r"I can't find the format file|Fatal format file error|^---! .*\.fmt|\\endofdump",
+                              re.MULTILINE)
+_LAST_PACKAGE_RE = re.compile(r"^[ \t]*\\(?:usepackage|RequirePackage)\b.*$", re.MULTILINE)
+
+_compile_slots = threading.BoundedSemaphore(LATEX_COMPILE_WORKERS)
+_format_lock = threading.Lock()
+# Format name -> the name once built or found on disk, None once building or using it has failed
+_formats: Dict[str, Optional[str]] = {}
+
+
+def split_preamble(latex: str) -> Optional[Tuple[str, str]]:
+    """
+    Split a document into the part dumped into the format (through the last
+    \\usepackage line) and the rest, which is typeset on every run.
+    Returns None when the document has no package preamble to dump.
+    """
+    begin = latex.find("\\begin{document}")
+    if begin < 0:
+        return None
+    packages = list(_LAST_PACKAGE_RE.finditer(latex, 0, begin))
+    if not packages:
+        return None
+    cut = packages[-1].end() + 1
+    return latex[:cut], latex[cut:]
+
+
+def _format_name(dumped: str) -> str:
+    digest = hashlib.sha256(f"{FORMAT_VERSION}\n{dumped}".encode("utf-8")).hexdigest()[:16]
+    return f"{_JOB_NAME}_{digest}"
+
+
+def _tex_env() -> Dict[str, str]:
+    # Trailing separator keeps the distribution's default format path after ours
+    return {**os.environ, "TEXFORMATS": f"{LATEX_FORMAT_DIR}{os.pathsep}"}
+
+
+def _run(cmd: List[str], cwd: str, timeout: float) -> Optional[subprocess.CompletedProcess]:
+    """Run a TeX command; None if it is not installed or timed out (the process is killed)."""
+    if timeout <= 0:
+        logger.error(f"LaTeX job exceeded {LATEX_COMPILE_TIMEOUT_SECONDS:.0f}s before running {cmd[0]}")
+        return None
+    try:
+        return subprocess.run(
+            cmd, cwd=cwd, env=_tex_env(), stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, errors="replace",
+            timeout=timeout
+        )
+    except subprocess.TimeoutExpired:
+        logger.error(f"{cmd[0]} timed out after {timeout:.0f}s; killed")
+    except FileNotFoundError:
+        logger.error(f"{cmd[0]} not found. Please install TeX Live, MiKTeX, or another LaTeX distribution.")
+    return None
+
+
+def ensure_format(dumped: str) -> Optional[str]:
+    """Name of the format file for this preamble, building it if needed; None if it cannot be built."""
+    name = _format_name(dumped)
+    if name in _formats:
+        return _formats[name]
+    with _format_lock:
+        if name not in _formats:
+            exists = (LATEX_FORMAT_DIR / f"{name}.fmt").exists()
+            _formats[name] = name if exists else _build_format(dumped, name)
+        return _formats[name]
+
+
+def _build_format(dumped: str, name: str) -> Optional[str]:
+    started = time.perf_counter()
+    workdir = tempfile.mkdtemp(prefix="latex-fmt-")
+    try:
+        with open(os.path.join(workdir, "preamble.tex"), "w", encoding="utf-8") as f:
+            f.write(dumped + "\\begin{document}\n\\end{document}\n")
+        cmd = ["pdftex", "-ini", "-interaction=nonstopmode", f"-jobname={name}",
+               "&pdflatex", "mylatexformat.ltx", "preamble.tex"]
+        result = _run(cmd, workdir, LATEX_COMPILE_TIMEOUT_SECONDS)
+        built = os.path.join(workdir, f"{name}.fmt")
+        if result is None or not os.path.exists(built):
+            if result is not None:
+                logger.warning(f"Building LaTeX format {name} failed; compiling without it:\n{result.stdout[-2000:]}")
+            return None
+        LATEX_FORMAT_DIR.mkdir(parents=True, exist_ok=True)
+        # Build elsewhere and rename, so other processes never load a partial file
+        staged = LATEX_FORMAT_DIR / f".{name}.{os.getpid()}.fmt"
+        shutil.copyfile(built, staged)
+        os.replace(staged, LATEX_FORMAT_DIR / f"{name}.fmt")
+        logger.info(f"Built LaTeX format {name} in {time.perf_counter() - started:.2f}s")
+        return name
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def _typeset(source: str, fmt: Optional[str], workdir: str, deadline: float) -> Tuple[Optional[str], str]:
+    """
+    Run pdflatex in `workdir` until the log stops asking for reruns.
+    Returns the path of the PDF (None on failure) and the last pass's output.
+    """
+    tex_path = os.path.join(workdir, f"{_JOB_NAME}.tex")
+    with open(tex_path, "w", encoding="utf-8") as f:
+        f.write(source)
+    cmd = ["pdflatex", "-interaction=nonstopmode", "-file-line-error", f"-jobname={_JOB_NAME}"]
+    if fmt:
+        cmd.append(f"-fmt={fmt}")
+    cmd.append(f"{_JOB_NAME}.tex")
+
+    result = None
+    for _ in range(LATEX_MAX_PASSES):
+        result = _run(cmd, workdir, deadline - time.monotonic())
+        if result is None:
+            return None, ""
+        if not _RERUN_RE.search(result.stdout):
+            break
+    pdf_path = os.path.join(workdir, f"{_JOB_NAME}.pdf")
+    if not os.path.exists(pdf_path):
+        errors = [line for line in result.stdout.splitlines() if line.startswith("!") or _ERROR_LINE_RE.match(line)]
+        logger.error("LaTeX compilation produced no PDF:\n" + "\n".join(errors[:20] or result.stdout.splitlines()[-20:]))
+        return None, result.stdout
+    return pdf_path, result.stdout
+
+
+def compile_latex_source(latex: str, output_pdf: str) -> bool:
+    """
+    Compile a LaTeX document to `output_pdf` in an isolated temporary directory.
+    Blocks while all LATEX_COMPILE_WORKERS slots are busy. Returns True on success.
+    """
+    with _compile_slots:
+        deadline = time.monotonic() + LATEX_COMPILE_TIMEOUT_SECONDS
+        workdir = tempfile.mkdtemp(prefix="latex-")
+        try:
+            started = time.perf_counter()
+            parts = split_preamble(latex) if LATEX_USE_FORMAT else None
+            fmt = ensure_format(parts[0]) if parts else None
+            pdf_path = None
+            if fmt:
+                # mylatexformat skips the preamble up to \endofdump when the format is loaded
+                pdf_path, log = _typeset(parts[0] + "\\endofdump\n" + parts[1], fmt, workdir, deadline)
+                if pdf_path is None and _FORMAT_ERROR_RE.search(log) and time.monotonic() < deadline:
+                    # Only a broken format is worth a retry; a content error would fail the same way without it
+                    logger.warning(f"Loading format {fmt} failed; disabling it and retrying without it")
+                    _formats[fmt] = None
+                    fmt = None
+            if pdf_path is None and not fmt:
+                pdf_path, _ = _typeset(latex, None, workdir, deadline)
+            if pdf_path is None:
+                return False
+            os.makedirs(os.path.dirname(os.path.abspath(output_pdf)), exist_ok=True)
+            # Move next to the output first: across filesystems shutil.move copies, and copying
+            # into output_pdf itself would rewrite a PDF cache entry it may be hard-linked to
+            staged = f"{output_pdf}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                shutil.move(pdf_path, staged)
+                os.replace(staged, output_pdf)
+            finally:
+                if os.path.exists(staged):
+                    os.unlink(staged)
+            logger.info(f"Compiled {output_pdf} in {time.perf_counter() - started:.2f}s"
+                        f"{' with format ' + fmt if fmt else ''}")
+            return True
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+def warm_up(template_path: Optional[str] = None) -> None:
+    """Build the format for a template ahead of the first compile (call at startup)."""
+    if not LATEX_USE_FORMAT:
+        return
+    template_path = template_path or str(Path(__file__).parent / "templates" / DEFAULT_TEMPLATE_PATH)
+    try:
+        with open(template_path, encoding="utf-8") as f:
+            parts = split_preamble(f.read())
+        if parts:
+            ensure_format(parts[0])
+    except Exception as e:
+        logger.warning(f"LaTeX format warm-up failed: {e}")
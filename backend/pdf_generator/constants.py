@@ -7,6 +7,9 @@ DEFAULT_JSON_PATH = 'resume.json'
 DEFAULT_TEMPLATE_PATH = 'template.tex'
 DEFAULT_OUTPUT_PATH = 'generated_resume.tex'
 
+# PDF renderers: "latex" compiles the template with TeX, "direct" lays out the JSON in-process
+PDF_RENDERERS = ('latex', 'direct')
+
 # LaTeX special characters and their replacements
 LATEX_SPECIAL_CHARS = {
     '&': r'\&',
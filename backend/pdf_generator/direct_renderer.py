@@ -0,0 +1,365 @@
+"""
+In-process resume renderer.
+
+Lays out the customized-resume JSON (personal_info, education, experience,
+projects, skills) straight to PDF with ReportLab, in the same one-column style
+as templates/template.tex: a centered header, small-caps section titles over a
+rule, bold/italic two-column subheadings with right-aligned dates, and bullet
+lists. No TeX distribution is needed and a resume renders in milliseconds
+inside the calling process, which suits small container images and workers
+without a TeX install. The LaTeX path (json_to_pdf) stays the high-fidelity
+option: only sections filled from the JSON are rendered here, not the
+template's fixed text (summary, certifications), and typography is Times
+rather than Computer Modern.
+
+The PDF standard fonts only cover Latin-1 style text; set PDF_DIRECT_FONT to a
+TrueType font (e.g. DejaVuSerif.ttf) to embed it for full Unicode. Its bold and
+italic faces are looked up next to it as <name>-Bold.ttf, <name>-Italic.ttf
+and <name>-BoldItalic.ttf.
+
+Configure via env vars: PDF_DIRECT_FONT.
+"""
+import os
+import re
+import json
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+from xml.sax.saxutils import escape
+
+try:
+    from reportlab.lib.enums import TA_CENTER
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.styles import ParagraphStyle
+    from reportlab.lib.units import inch
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+    from reportlab.platypus import HRFlowable, Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+except ImportError:
+    pdfmetrics = None
+
+from . import pdf_cache
+from .json_to_pdf import _resume_projects, ensure_url_protocol, is_email, is_github, is_linkedin, is_phone, \
+    parse_education_string
+
+logger = logging.getLogger(__name__)
+
+PDF_DIRECT_FONT = os.getenv("PDF_DIRECT_FONT", "")
+
+# Bump when the layout changes, so cached PDFs of the old layout are not reused
+LAYOUT_VERSION = "1"
+
+# Layout, in points, following template.tex (11pt article, 0.5in margins, \small items)
+PAGE_MARGIN = 0.5 * inch
+BODY_SIZE = 10
+NAME_SIZE = 16
+SECTION_SIZE = 12
+BULLET_INDENT = 0.15 * inch
+# Same threshold as format_projects
+PROJECT_HEADING_TECH_CHARS = 40
+
+_fonts: Optional[Dict[str, str]] = None
+_fonts_lock = threading.Lock()
+
+
+def available() -> bool:
+    """True when ReportLab is installed."""
+    return pdfmetrics is not None
+
+
+def _load_fonts() -> Dict[str, str]:
+    """Font names for the regular/bold/italic/bolditalic faces, registering PDF_DIRECT_FONT once."""
+    global _fonts
+    if _fonts is not None:
+        return _fonts
+    with _fonts_lock:
+        if _fonts is None:
+            fonts = {"regular": "Times-Roman", "bold": "Times-Bold",
+                     "italic": "Times-Italic", "bolditalic": "Times-BoldItalic"}
+            if PDF_DIRECT_FONT:
+                try:
+                    fonts = _register_ttf_family(PDF_DIRECT_FONT)
+                except Exception as e:
+                    logger.error(f"Could not load PDF_DIRECT_FONT {PDF_DIRECT_FONT}; using Times: {e}")
+            _fonts = fonts
+    return _fonts
+
+
+def _register_ttf_family(path: str) -> Dict[str, str]:
+    stem, ext = os.path.splitext(path)
+    family = os.path.basename(stem)
+    fonts = {}
+    for face, suffix in (("regular", ""), ("bold", "-Bold"), ("italic", "-Italic"), ("bolditalic", "-BoldItalic")):
+        face_path = f"{stem}{suffix}{ext}"
+        if not os.path.exists(face_path):
+            # A missing face falls back to the regular one
+            fonts[face] = fonts.get("regular", family)
+            continue
+        name = f"{family}{suffix}"
+        pdfmetrics.registerFont(TTFont(name, face_path))
+        fonts[face] = name
+    pdfmetrics.registerFontFamily(family, normal=fonts["regular"], bold=fonts["bold"],
+                                  italic=fonts["italic"], boldItalic=fonts["bolditalic"])
+    return fonts
+
+
+def _styles(fonts: Dict[str, str]) -> Dict[str, "ParagraphStyle"]:
+    body = ParagraphStyle("body", fontName=fonts["regular"], fontSize=BODY_SIZE, leading=BODY_SIZE * 1.15)
+    return {
+        "body": body,
+        "name": ParagraphStyle("name", parent=body, fontName=fonts["bold"], fontSize=NAME_SIZE,
+                               leading=NAME_SIZE * 1.2, alignment=TA_CENTER),
+        "contact": ParagraphStyle("contact", parent=body, alignment=TA_CENTER),
+        "section": ParagraphStyle("section", parent=body, fontSize=SECTION_SIZE, leading=SECTION_SIZE * 1.2,
+                                  spaceBefore=6, spaceAfter=1),
+        "heading": ParagraphStyle("heading", parent=body, fontSize=BODY_SIZE + 1, leading=(BODY_SIZE + 1) * 1.15),
+        "bullet": ParagraphStyle("bullet", parent=body, leftIndent=2 * BULLET_INDENT + 6,
+                                 bulletIndent=2 * BULLET_INDENT - 2, bulletFontSize=7, spaceBefore=1),
+        "skills": ParagraphStyle("skills", parent=body, fontSize=BODY_SIZE - 1, leading=(BODY_SIZE - 1) * 1.2,
+                                 leftIndent=BULLET_INDENT, spaceBefore=1),
+    }
+
+
+def _text(value: Any) -> str:
+    """A JSON value as Paragraph markup."""
+    return "" if value is None else escape(str(value))
+
+
+def _small_caps(text: str, size: float) -> str:
+    """Small-caps markup: lowercase letters as capitals at 80% size."""
+    small = size * 0.8
+    return re.sub(r"&\w+;|[a-z]+",
+                  lambda m: m.group() if m.group()[0] == "&" else f'<font size="{small:.1f}">{m.group().upper()}</font>',
+                  escape(text))
+
+
+def _link(url: str, label: str, underline: bool = True) -> str:
+    label = f"<u>{label}</u>" if underline else label
+    return f'<a href="{escape(url, {chr(34): "&quot;"})}">{label}</a>'
+
+
+def _contact_items(personal_info: Any) -> Tuple[str, List[str]]:
+    """(name, contact item markup), like format_personal_info."""
+    if isinstance(personal_info, dict):
+        items = []
+        if personal_info.get("phone"):
+            phone = str(personal_info["phone"])
+            items.append(_link(f"tel:{phone.replace('-', '')}", _text(phone), underline=False))
+        if personal_info.get("email"):
+            items.append(_link(f"mailto:{personal_info['email']}", _text(personal_info["email"])))
+        for key in ("linkedin", "github"):
+            if personal_info.get(key):
+                items.append(_link(ensure_url_protocol(str(personal_info[key])), _text(personal_info[key])))
+        return str(personal_info.get("name") or "Your Name"), items
+
+    if isinstance(personal_info, str) and personal_info.strip():
+        parts = [part.strip() for part in personal_info.strip().split("|")]
+        name_parts = parts[0].split()
+        name = " ".join(name_parts[0:2]) if len(name_parts) >= 2 else parts[0]
+        items = []
+        for part in parts[1:]:
+            if is_email(part):
+                items.append(_link(f"mailto:{part}", _text(part)))
+            elif is_linkedin(part) or is_github(part):
+                items.append(_link(ensure_url_protocol(part), _text(part)))
+            elif is_phone(part):
+                items.append(_link(f"tel:{''.join(c for c in part if c.isdigit())}", _text(part), underline=False))
+            else:
+                items.append(_text(part))
+        return name, items
+
+    return "Your Name", []
+
+
+def _education_entries(education: Any) -> List[Dict[str, Any]]:
+    if isinstance(education, list):
+        entries = []
+        for entry in education:
+            if not isinstance(entry, dict):
+                continue
+            entry = dict(entry)
+            institution, location = entry.get("institution") or "", entry.get("location") or ""
+            if institution and location and institution.endswith(location):
+                # Remove the location from the institution if it's duplicated
+                entry["institution"] = institution.replace(location, "").strip()
+            entries.append(entry)
+        return entries
+    if isinstance(education, str) and education.strip():
+        return parse_education_string(education)
+    return []
+
+
+def _joined(values: Any) -> str:
+    if isinstance(values, list):
+        return ", ".join(str(v) for v in values)
+    return "" if values is None else str(values)
+
+
+def _skill_lines(skills: Any) -> List[Tuple[str, str]]:
+    """(category, skills) rows, in the same order and nesting rules as format_skills."""
+    lines = []
+    if isinstance(skills, dict):
+        for category, value in skills.items():
+            if isinstance(value, dict):
+                parts = [(sub, _joined(sub_skills)) for sub, sub_skills in value.items()
+                         if isinstance(sub_skills, list) and sub_skills]
+                if parts and category != "Technical Skills":
+                    # Subcategories of "Technical Skills" are listed without the prefix
+                    lines.append((category, ""))
+                lines.extend(parts)
+            elif isinstance(value, list):
+                if value:
+                    lines.append((category, _joined(value)))
+            elif category != "Technical Skills":
+                lines.append((category, str(value)))
+    elif isinstance(skills, list):
+        for skill in skills:
+            skill = str(skill)
+            if ":" in skill:
+                category, details = skill.split(":", 1)
+                lines.append((category.strip(), details.strip()))
+            else:
+                lines.append(("", skill))
+    return lines
+
+
+class _Layout:
+    """Builds the flowables for one resume."""
+
+    def __init__(self, fonts: Dict[str, str]):
+        self.fonts = fonts
+        self.styles = _styles(fonts)
+        self.width = letter[0] - 2 * PAGE_MARGIN
+        self.story: List[Any] = []
+
+    def header(self, personal_info: Any) -> None:
+        name, items = _contact_items(personal_info)
+        self.story.append(Paragraph(_small_caps(name, NAME_SIZE), self.styles["name"]))
+        if items:
+            self.story.append(Spacer(1, 2))
+            self.story.append(Paragraph(" | ".join(items), self.styles["contact"]))
+
+    def section(self, title: str) -> None:
+        self.story.append(Paragraph(_small_caps(title, SECTION_SIZE), self.styles["section"]))
+        self.story.append(HRFlowable(width="100%", thickness=0.5, color="black", spaceBefore=0, spaceAfter=3))
+
+    def subheading(self, top_left: str, top_right: str, bottom_left: str = "", bottom_right: str = "",
+                   top_left_is_markup: bool = False) -> None:
+        """Two rows, left text flush left and right text flush right, like \\resumeSubheading."""
+        style = self.styles["heading"]
+        right_width = max(
+            pdfmetrics.stringWidth(str(text), self.fonts["italic"], style.fontSize) for text in (top_right, bottom_right)
+        ) + 8
+        left = top_left if top_left_is_markup else f"<b>{_text(top_left)}</b>"
+        rows = [[Paragraph(left, style), Paragraph(_text(top_right), ParagraphStyle("r", parent=style, alignment=2))]]
+        if bottom_left or bottom_right:
+            small = ParagraphStyle("small", parent=style, fontSize=BODY_SIZE, leading=BODY_SIZE * 1.15)
+            rows.append([Paragraph(f"<i>{_text(bottom_left)}</i>", small),
+                         Paragraph(f"<i>{_text(bottom_right)}</i>", ParagraphStyle("sr", parent=small, alignment=2))])
+        table = Table(rows, colWidths=[self.width - BULLET_INDENT - right_width, right_width])
+        table.setStyle(TableStyle([
+            ("LEFTPADDING", (0, 0), (-1, -1), 0), ("RIGHTPADDING", (0, 0), (-1, -1), 0),
+            ("TOPPADDING", (0, 0), (-1, -1), 0), ("BOTTOMPADDING", (0, 0), (-1, -1), 0),
+            ("VALIGN", (0, 0), (-1, -1), "TOP"),
+        ]))
+        table.hAlign = "RIGHT"
+        self.story.append(Spacer(1, 3))
+        self.story.append(table)
+
+    def bullets(self, details: Any) -> None:
+        if isinstance(details, str):
+            details = [details]
+        if not isinstance(details, list):
+            return
+        for detail in details:
+            self.story.append(Paragraph(_text(detail), self.styles["bullet"], bulletText="•"))
+
+    def education(self, education: Any) -> None:
+        entries = _education_entries(education)
+        if not entries:
+            return
+        self.section("Education")
+        for entry in entries:
+            self.subheading(entry.get("institution") or "", entry.get("location") or "",
+                            entry.get("degree") or "", entry.get("dates") or "")
+            self.bullets(entry.get("details"))
+
+    def skills(self, skills: Any) -> None:
+        lines = _skill_lines(skills)
+        if not lines:
+            return
+        self.section("Technical Skills")
+        for category, text in lines:
+            label = f"<b>{_text(category)}:</b> " if category else ""
+            self.story.append(Paragraph(label + _text(text), self.styles["skills"]))
+
+    def experience(self, experience: Any) -> None:
+        if not isinstance(experience, list) or not experience:
+            return
+        self.section("Experience")
+        for job in experience:
+            if not isinstance(job, dict):
+                continue
+            self.subheading(job.get("title") or "", job.get("dates") or "",
+                            job.get("company") or "", job.get("location") or "")
+            self.bullets(job.get("details"))
+
+    def projects(self, projects: Any) -> None:
+        if not isinstance(projects, list) or not projects:
+            return
+        self.section("Projects")
+        for project in projects:
+            if not isinstance(project, dict):
+                continue
+            name = project.get("name", project.get("title", ""))
+            technologies = _joined(project.get("technologies_used", project.get("technologies", "")))
+            heading = f"<b>{_text(name)}</b>"
+            # A long technology list gets its own first bullet instead of sharing the heading line
+            if technologies and len(technologies) <= PROJECT_HEADING_TECH_CHARS:
+                heading += f" | <i>{_text(technologies)}</i>"
+            self.subheading(heading, "", top_left_is_markup=True)
+            if len(technologies) > PROJECT_HEADING_TECH_CHARS:
+                self.story.append(Paragraph(f"<i>Technologies:</i> {_text(technologies)}", self.styles["bullet"],
+                                            bulletText="•"))
+            self.bullets(project.get("details") or project.get("description") or [])
+
+
+def render_pdf(resume_data: Dict[str, Any], output_path: str) -> bool:
+    """
+    Render resume JSON to a PDF at `output_path` without TeX.
+    Returns True on success, False if ReportLab is missing or rendering failed.
+    """
+    if not available():
+        logger.error("The direct PDF renderer needs ReportLab: pip install reportlab")
+        return False
+    # Cached alongside LaTeX renders; the prefix keeps the two key spaces apart
+    key = pdf_cache.cache_key(f"direct renderer {LAYOUT_VERSION} {PDF_DIRECT_FONT}\n"
+                              + json.dumps(resume_data, sort_keys=True, default=str))
+    if pdf_cache.fetch(key, output_path):
+        return True
+    staged = None
+    try:
+        layout = _Layout(_load_fonts())
+        layout.header(resume_data.get("personal_info", ""))
+        layout.education(resume_data.get("education", ""))
+        layout.skills(resume_data.get("skills", []))
+        layout.experience(resume_data.get("experience", []))
+        layout.projects(_resume_projects(resume_data))
+
+        os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+        personal_info = resume_data.get("personal_info")
+        title = personal_info.get("name") if isinstance(personal_info, dict) else None
+        # Build beside the output and replace it: output_path may be a hard link into the PDF cache
+        staged = f"{output_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        doc = SimpleDocTemplate(staged, pagesize=letter, leftMargin=PAGE_MARGIN, rightMargin=PAGE_MARGIN,
+                                topMargin=PAGE_MARGIN, bottomMargin=PAGE_MARGIN, title=str(title or "Resume"))
+        doc.build(layout.story)
+        os.replace(staged, output_path)
+    except Exception as e:
+        logger.error(f"Direct PDF rendering failed for {output_path}: {e}")
+        return False
+    finally:
+        if staged and os.path.exists(staged):
+            os.unlink(staged)
+    pdf_cache.store(key, output_path)
+    return True
@@ -45,17 +45,20 @@ logger.setLevel(logging.DEBUG)
 
 # Import the JSON to PDF module
 from .json_to_pdf import populate_template, read_latex_template, compile_latex_to_pdf, json_to_pdf
-from .constants import DEFAULT_TEMPLATE_PATH
+from .constants import DEFAULT_TEMPLATE_PATH, PDF_RENDERERS
+from . import direct_renderer
 
 # Import S3 utilities if available
 try:
     from .s3_utils import upload_file_to_s3, parse_s3_url
+    from . import upload_queue
 except ImportError:
     # Fallback for when S3 utils are not available
     def upload_file_to_s3(*args, **kwargs):
         return None
     def parse_s3_url(*args, **kwargs):
         return None, None
+    upload_queue = None
 
 # Directory for storing generated PDFs
 PDF_OUTPUT_DIR = Path(__file__).parent.parent / "output" / "pdfs"
@@ -65,6 +68,23 @@ os.makedirs(PDF_OUTPUT_DIR, exist_ok=True)
 LATEX_OUTPUT_DIR = Path(__file__).parent.parent / "output" / "latex"
 os.makedirs(LATEX_OUTPUT_DIR, exist_ok=True)
 
+# Renderer used when a request does not pick one: "latex" or "direct"
+PDF_RENDERER = os.getenv("PDF_RENDERER", "latex").lower()
+
+def resolve_renderer(renderer: Optional[str] = None) -> str:
+    """
+    The renderer to use: the requested one, else PDF_RENDERER. Falls back to
+    LaTeX when the direct renderer is chosen but ReportLab is not installed.
+    """
+    renderer = (renderer or PDF_RENDERER).lower()
+    if renderer not in PDF_RENDERERS:
+        logger.warning(f"Unknown PDF renderer {renderer!r}; using latex")
+        return "latex"
+    if renderer == "direct" and not direct_renderer.available():
+        logger.warning("PDF renderer 'direct' needs ReportLab, which is not installed; using latex")
+        return "latex"
+    return renderer
+
 # Get S3 bucket name from environment variables
 # We'll now get this dynamically each time we need it
 def get_s3_bucket_name():
@@ -78,7 +98,26 @@ def get_s3_bucket_name():
     logger.debug(f"S3 bucket name from environment: {bucket_name}")
     return bucket_name
 
-def generate_resume_pdf(resume_data: Dict[str, Any], output_filename: Optional[str] = None, verbose: bool = False) -> Dict[str, str]:
+def _upload_artifact(result: Dict[str, Any], url_key: str, file_path: str, s3_bucket: str, s3_path: str,
+                     content_type: str) -> None:
+    """
+    Hand a generated file to the background S3 uploader. The URL lands in
+    `result[url_key]` only if the upload ran inline; a queued upload is listed
+    under result["s3_pending"] and reported to upload_queue listeners later.
+    """
+    if upload_queue is None:
+        queued, s3_url = False, upload_file_to_s3(file_path, s3_bucket, s3_path, content_type=content_type)
+    else:
+        queued, s3_url = upload_queue.upload(file_path, s3_bucket, s3_path, content_type)
+    if queued:
+        result.setdefault("s3_pending", []).append(url_key)
+        logger.info(f"Queued S3 upload of {file_path}")
+    elif s3_url:
+        result[url_key] = s3_url
+        logger.info(f"Uploaded {file_path} to S3: {s3_url}")
+
+def generate_resume_pdf(resume_data: Dict[str, Any], output_filename: Optional[str] = None, verbose: bool = False,
+                        renderer: Optional[str] = None) -> Dict[str, str]:
     """
     Generate a PDF from the given resume data.
     
@@ -86,9 +125,11 @@ def generate_resume_pdf(resume_data: Dict[str, Any], output_filename: Optional[s
         resume_data: Dictionary containing the resume data
         output_filename: Optional filename (without extension) for the output PDF
         verbose: Whether to log verbose output
+        renderer: "latex" or "direct" (defaults to PDF_RENDERER)
         
     Returns:
-        Dictionary with paths to the generated PDF (local and S3 if enabled)
+        Dictionary with paths to the generated PDF (local, and S3 URLs of uploads that
+        ran inline; queued uploads are listed under "s3_pending")
     """
     # Use provided filename or generate a timestamp-based one
     if not output_filename:
@@ -104,35 +145,35 @@ def generate_resume_pdf(resume_data: Dict[str, Any], output_filename: Optional[s
         # Generate a PDF from the resume data
         output_path = f"output/{output_filename}.pdf"
         latex_path = f"output/{output_filename}.tex"
-        json_to_pdf(resume_data, output_path, verbose)
+        renderer = resolve_renderer(renderer)
+        if renderer == "direct":
+            direct_renderer.render_pdf(resume_data, output_path)
+        else:
+            json_to_pdf(resume_data, output_path, verbose)
         
-        logger.info(f"Generated PDF at {output_path}")
+        logger.info(f"Generated PDF at {output_path} with the {renderer} renderer")
         
         result = {
             "pdf_path": output_path,
-            "custom_filename": f"{output_filename}.pdf"
+            "custom_filename": f"{output_filename}.pdf",
+            "renderer": renderer
         }
         
         # Try to upload to S3 if configured
         s3_bucket = os.getenv("S3_BUCKET_NAME")
         if s3_bucket:
             try:
-                # Upload PDF to S3
+                # Upload PDF to S3 (in the background; see upload_queue)
                 s3_path = f"resumes/{output_filename}.pdf"
-                s3_url = upload_file_to_s3(output_path, s3_bucket, s3_path, content_type="application/pdf")
-                if s3_url:
-                    result["s3_pdf_url"] = s3_url
-                    logger.info(f"Uploaded PDF to S3: {s3_url}")
+                _upload_artifact(result, "s3_pdf_url", output_path, s3_bucket, s3_path, "application/pdf")
                 
-                # Upload LaTeX file to S3 if it exists
-                if os.path.exists(latex_path):
-                    latex_s3_path = f"latex/{output_filename}.tex"
-                    latex_s3_url = upload_file_to_s3(latex_path, s3_bucket, latex_s3_path, content_type="text/plain")
-                    if latex_s3_url:
-                        result["s3_latex_url"] = latex_s3_url
-                        logger.info(f"Uploaded LaTeX file to S3: {latex_s3_url}")
-                else:
-                    logger.warning(f"LaTeX file not found at {latex_path}, cannot upload to S3")
+                # Upload LaTeX file to S3 if it exists (the direct renderer writes none)
+                if renderer == "latex":
+                    if os.path.exists(latex_path):
+                        latex_s3_path = f"latex/{output_filename}.tex"
+                        _upload_artifact(result, "s3_latex_url", latex_path, s3_bucket, latex_s3_path, "text/plain")
+                    else:
+                        logger.warning(f"LaTeX file not found at {latex_path}, cannot upload to S3")
             except Exception as e:
                 logger.error(f"Error uploading files to S3: {str(e)}")
         
@@ -150,7 +191,8 @@ def save_resume_json(resume_data: Dict[str, Any], output_filename: Optional[str]
         output_filename: Optional filename (without extension) for the output JSON
         
     Returns:
-        Dictionary with paths to the saved JSON (local and S3 if enabled)
+        Dictionary with paths to the saved JSON (local, and the S3 URL if the upload
+        ran inline; a queued upload is listed under "s3_pending")
     """
     # Use provided filename or generate a timestamp-based one
     if not output_filename:
@@ -178,12 +220,9 @@ def save_resume_json(resume_data: Dict[str, Any], output_filename: Optional[str]
         s3_bucket = os.getenv("S3_BUCKET_NAME")
         if s3_bucket:
             try:
-                # Upload JSON to S3
+                # Upload JSON to S3 (in the background; see upload_queue)
                 s3_path = f"json/{output_filename}.json"
-                s3_url = upload_file_to_s3(json_path, s3_bucket, s3_path, content_type="application/json")
-                if s3_url:
-                    result["s3_json_url"] = s3_url
-                    logger.info(f"Uploaded JSON to S3: {s3_url}")
+                _upload_artifact(result, "s3_json_url", json_path, s3_bucket, s3_path, "application/json")
             except Exception as e:
                 logger.error(f"Error uploading JSON to S3: {str(e)}")
         
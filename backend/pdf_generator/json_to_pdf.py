@@ -6,8 +6,10 @@ import argparse
 import subprocess
 import webbrowser
 import glob
+from functools import lru_cache
 from pathlib import Path
 from typing import Dict, Any, Optional
+from . import compile_service, pdf_cache
 from .constants import (
     LATEX_SPECIAL_CHARS,
     SECTION_PATTERNS,
@@ -25,9 +27,10 @@ from .constants import (
 # Utility Functions
 #------------------------------------------------------------------------------
 
-def escape_latex_special_chars(text):
+def escape_latex_special_chars_by_replace(text):
     """
-    Escape LaTeX special characters in the given text.
+    Escape LaTeX special characters with one str.replace per character.
+    Reference implementation for escape_latex_special_chars.
     
     Args:
         text (str): The text containing potentially special LaTeX characters
@@ -50,6 +53,37 @@ def escape_latex_special_chars(text):
     
     return text
 
+# Replacement chain in application order: backslashes first, so the braces of
+# \textbackslash{} are then escaped again (\textbackslash\{\}), as they always have been
+LATEX_ESCAPE_SEQUENCE = (('\\', r'\textbackslash{}'),) + tuple(LATEX_SPECIAL_CHARS.items())
+
+def escape_latex_special_chars(text):
+    """
+    Escape LaTeX special characters in the given text.
+    
+    Only characters that occur are replaced, so a field is copied once per
+    distinct special character it contains (usually none) instead of ten times.
+    (A str.translate table or an alternation regex is slower in CPython here;
+    see `python -m pdf_generator.benchmark --only escape`.)
+    
+    Args:
+        text (str): The text containing potentially special LaTeX characters
+        
+    Returns:
+        str: Text with escaped LaTeX special characters
+    """
+    if text is None:
+        return ""
+    
+    if not isinstance(text, str):
+        return str(text)
+    
+    for char, replacement in LATEX_ESCAPE_SEQUENCE:
+        if char in text:
+            text = text.replace(char, replacement)
+    
+    return text
+
 def is_email(text):
     """Check if text is likely an email address."""
     return '@' in text and re.search(EMAIL_PATTERN, text) is not None
@@ -125,6 +159,11 @@ def read_latex_template(file_path):
         print(f"LaTeX template file not found: {file_path}")
         sys.exit(1)
 
+@lru_cache(maxsize=8)
+def load_template(file_path):
+    """Read a LaTeX template once per process; templates ship with the package and do not change."""
+    return read_latex_template(file_path)
+
 def write_latex_output(latex_content, output_path):
     """
     Write the populated LaTeX content to an output file.
@@ -414,6 +453,46 @@ def format_personal_info(personal_info):
 \\small phone $|$ email $|$ linkedin $|$ github
 \\end{center}"""
 
+def parse_education_string(education):
+    """
+    Split a legacy single-string education field into entries.
+    
+    Args:
+        education (str): Education information as free text
+        
+    Returns:
+        list: Dicts with institution, location, degree and dates
+    """
+    # Parse using regex patterns from constants
+    parts = re.split(EDUCATION_PATTERNS['institution_split'], education)
+    
+    institutions = []
+    # Extract all universities/institutes
+    for i, part in enumerate(parts):
+        if part in ["University", "Institute", "College"]:
+            if i > 0 and i+1 < len(parts):
+                inst = parts[i-1].strip() + part + parts[i+1].split("Master")[0].split("Bachelor")[0].strip()
+                institutions.append(inst.strip())
+    
+    # Extract other information
+    locations = re.findall(EDUCATION_PATTERNS['location'], education)
+    degrees = re.findall(EDUCATION_PATTERNS['degree'], education)
+    dates = re.findall(EDUCATION_PATTERNS['dates'], education)
+    
+    # Create entries from extracted data
+    edu_entries = []
+    for i in range(max(len(institutions), len(locations), len(degrees), len(dates))):
+        entry = {
+            'institution': institutions[i] if i < len(institutions) else '',
+            'location': locations[i] if i < len(locations) else '',
+            'degree': degrees[i] if i < len(degrees) else '',
+            'dates': dates[i] if i < len(dates) else ''
+        }
+        if entry['institution'] and (entry['degree'] or entry['dates']):
+            edu_entries.append(entry)
+    
+    return edu_entries
+
 def format_education(education):
     """
     Format education section for LaTeX.
@@ -456,33 +535,7 @@ def format_education(education):
     
     # Handle education as a string (legacy format)
     elif isinstance(education, str) and education.strip():
-        # Parse using regex patterns from constants
-        parts = re.split(EDUCATION_PATTERNS['institution_split'], education)
-        
-        institutions = []
-        # Extract all universities/institutes
-        for i, part in enumerate(parts):
-            if part in ["University", "Institute", "College"]:
-                if i > 0 and i+1 < len(parts):
-                    inst = parts[i-1].strip() + part + parts[i+1].split("Master")[0].split("Bachelor")[0].strip()
-                    institutions.append(inst.strip())
-        
-        # Extract other information
-        locations = re.findall(EDUCATION_PATTERNS['location'], education)
-        degrees = re.findall(EDUCATION_PATTERNS['degree'], education)
-        dates = re.findall(EDUCATION_PATTERNS['dates'], education)
-        
-        # Create entries from extracted data
-        edu_entries = []
-        for i in range(max(len(institutions), len(locations), len(degrees), len(dates))):
-            entry = {
-                'institution': institutions[i] if i < len(institutions) else '',
-                'location': locations[i] if i < len(locations) else '',
-                'degree': degrees[i] if i < len(degrees) else '',
-                'dates': dates[i] if i < len(dates) else ''
-            }
-            if entry['institution'] and (entry['degree'] or entry['dates']):
-                edu_entries.append(entry)
+        edu_entries = parse_education_string(education)
         
         # Format entries in LaTeX
         for entry in edu_entries:
@@ -740,21 +793,58 @@ def format_projects(projects):
 # Template Processing Functions 
 #------------------------------------------------------------------------------
 
-def populate_template(template, resume_data):
+# Compiled once; populate_template previously recompiled these on every call
+SECTION_REGEXES = {name: re.compile(pattern, re.DOTALL) for name, pattern in SECTION_PATTERNS.items()}
+LEFTOVER_SUBHEADING_REGEX = re.compile(
+    r'%---+\s*\\resumeSubheading.*?(?=\\section|\s*\\end{document})',
+    re.DOTALL
+)
+
+SECTION_FORMATTERS = {
+    'personal_info': lambda data, projects: format_personal_info(data.get('personal_info', '')),
+    'education': lambda data, projects: format_education(data.get('education', '')),
+    'experience': lambda data, projects: format_experience(data.get('experience', [])),
+    'projects': lambda data, projects: format_projects(projects),
+    'skills': lambda data, projects: format_skills(data.get('skills', []))
+}
+
+# Parsed templates by content: (literal segments, slot names between them), or None
+_parsed_templates = {}
+
+def parse_template(template):
     """
-    Replace content in template with resume data from JSON.
+    Split a template into literal segments and the named section slots between
+    them, where each SECTION_PATTERNS match is a slot.
     
     Args:
         template (str): LaTeX template content
-        resume_data (dict): Resume data parsed from JSON
         
     Returns:
-        str: Populated LaTeX template with resume data
+        tuple: (segments, slots) with len(segments) == len(slots) + 1, or None
+        if section matches overlap and the template must be populated pattern by pattern
     """
-    # Create a copy of the template for manipulation
-    populated_template = template
+    if template in _parsed_templates:
+        return _parsed_templates[template]
     
-    # Get projects from either direct 'projects' field or from 'other.projects'
+    matches = sorted(
+        (m.start(), m.end(), section_name)
+        for section_name, regex in SECTION_REGEXES.items()
+        for m in regex.finditer(template)
+    )
+    parsed = None
+    if all(prev[1] <= cur[0] for prev, cur in zip(matches, matches[1:])):
+        segments, slots, pos = [], [], 0
+        for start, end, section_name in matches:
+            segments.append(template[pos:start])
+            slots.append(section_name)
+            pos = end
+        segments.append(template[pos:])
+        parsed = (segments, slots)
+    _parsed_templates[template] = parsed
+    return parsed
+
+def _resume_projects(resume_data):
+    """Projects from either the direct 'projects' field or from 'other.projects'."""
     projects = resume_data.get('projects', [])
     
     # If projects is empty and there's an 'other' field with 'projects'
@@ -762,33 +852,70 @@ def populate_template(template, resume_data):
         other_projects = resume_data['other'].get('projects', [])
         if other_projects and len(other_projects) > 0:
             projects = other_projects
+    return projects
+
+def populate_template(template, resume_data):
+    """
+    Replace content in template with resume data from JSON.
+    
+    The template is parsed into segments and section slots once; each call
+    formats only the sections the template has and joins everything in one pass.
+    
+    Args:
+        template (str): LaTeX template content
+        resume_data (dict): Resume data parsed from JSON
+        
+    Returns:
+        str: Populated LaTeX template with resume data
+    """
+    parsed = parse_template(template)
+    if parsed is None:
+        return populate_template_by_pattern(template, resume_data)
+    segments, slots = parsed
+    
+    projects = _resume_projects(resume_data)
+    sections = {name: SECTION_FORMATTERS[name](resume_data, projects) for name in dict.fromkeys(slots)}
+    
+    parts = [segments[0]]
+    for section_name, segment in zip(slots, segments[1:]):
+        parts.append(sections[section_name])
+        parts.append(segment)
+    populated_template = ''.join(parts)
+    
+    # Remove any duplicate sections or unwanted content (the pattern cannot match without '%---')
+    if '%---' in populated_template:
+        populated_template = LEFTOVER_SUBHEADING_REGEX.sub('', populated_template)
+    
+    return populated_template
+
+def populate_template_by_pattern(template, resume_data):
+    """
+    Populate a template by substituting each section pattern in turn over the
+    whole document. Used for templates whose section matches overlap, and as
+    the reference output for populate_template.
+    
+    Args:
+        template (str): LaTeX template content
+        resume_data (dict): Resume data parsed from JSON
+        
+    Returns:
+        str: Populated LaTeX template with resume data
+    """
+    # Create a copy of the template for manipulation
+    populated_template = template
+    
+    projects = _resume_projects(resume_data)
     
     # Format the sections first
-    sections = {
-        'personal_info': format_personal_info(resume_data.get('personal_info', '')),
-        'education': format_education(resume_data.get('education', '')),
-        'experience': format_experience(resume_data.get('experience', [])),
-        'projects': format_projects(projects),
-        'skills': format_skills(resume_data.get('skills', []))
-    }
+    sections = {name: formatter(resume_data, projects) for name, formatter in SECTION_FORMATTERS.items()}
     
     # Replace each section pattern with formatted content
-    for section_name, pattern in SECTION_PATTERNS.items():
+    for section_name, regex in SECTION_REGEXES.items():
         # Use a function for replacement to avoid escape sequence issues
-        populated_template = re.sub(
-            pattern, 
-            lambda m: sections[section_name], 
-            populated_template, 
-            flags=re.DOTALL
-        )
+        populated_template = regex.sub(lambda m: sections[section_name], populated_template)
     
     # Remove any duplicate sections or unwanted content
-    populated_template = re.sub(
-        r'%---+\s*\\resumeSubheading.*?(?=\\section|\s*\\end{document})', 
-        '', 
-        populated_template, 
-        flags=re.DOTALL
-    )
+    populated_template = LEFTOVER_SUBHEADING_REGEX.sub('', populated_template)
     
     return populated_template
 
@@ -884,8 +1011,8 @@ def json_to_pdf(resume_data: Dict[str, Any], output_path: str, verbose: bool = F
         # Get the template path
         template_path = Path(__file__).parent / "templates" / DEFAULT_TEMPLATE_PATH
         
-        # Read the LaTeX template
-        template = read_latex_template(template_path)
+        # Read the LaTeX template (once per process)
+        template = load_template(str(template_path))
         
         # Convert resume data to LaTeX
         latex_content = populate_template(template, resume_data)
@@ -897,14 +1024,17 @@ def json_to_pdf(resume_data: Dict[str, Any], output_path: str, verbose: bool = F
         with open(latex_path, 'w', encoding='utf-8') as f:
             f.write(latex_content)
         
-        # Compile LaTeX to PDF
-        success = compile_latex_to_pdf(
-            latex_path,
-            output_pdf=output_path,
-            verbose=verbose
-        )
+        # Reuse the PDF of an identical earlier render instead of compiling again
+        key = pdf_cache.cache_key(latex_content)
+        if pdf_cache.fetch(key, output_path):
+            print(f"Reused cached PDF for identical LaTeX: {output_path}")
+            return True
+        
+        # Compile LaTeX to PDF (bounded pool, precompiled preamble format)
+        success = compile_service.compile_latex_source(latex_content, output_path)
         
         if success:
+            pdf_cache.store(key, output_path)
             print(f"Successfully generated PDF: {output_path}")
             return True
         else:
@@ -0,0 +1,165 @@
+"""
+Content-addressed cache for compiled resume PDFs.
+
+A PDF is keyed by a SHA-256 of the populated LaTeX plus PDF_CACHE_VERSION,
+so re-rendering a resume whose LaTeX is byte-identical to an earlier render
+reuses that PDF instead of running TeX again. Entries live under
+PDF_CACHE_DIR/<2-char prefix>/<key>.pdf; the per-filename output PDF is a hard
+link to the entry (a copy on filesystems without hard links), so a hit costs
+no PDF bytes and evicting an entry never breaks an already returned file.
+
+The directory is kept under PDF_CACHE_MAX_MB by evicting the least recently
+used entries (hits refresh an entry's mtime). Each process keeps a running
+total of the cache size from its last directory scan plus the entries it has
+stored since, and only scans (and evicts) when that total crosses the limit
+or the scan is older than a few minutes, since other processes store entries
+too; a store is otherwise a single stat.
+
+Configure via env vars: PDF_CACHE_ENABLED, PDF_CACHE_DIR, PDF_CACHE_MAX_MB.
+"""
+import os
+import time
+import shutil
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+PDF_CACHE_ENABLED = os.getenv("PDF_CACHE_ENABLED", "true").lower() == "true"
+PDF_CACHE_DIR = Path(os.getenv("PDF_CACHE_DIR", Path(__file__).parent.parent / "output" / "pdf_cache"))
+PDF_CACHE_MAX_BYTES = int(float(os.getenv("PDF_CACHE_MAX_MB", "512")) * 1024 * 1024)
+
+# Bump when the LaTeX -> PDF toolchain changes in a way the LaTeX source does not show
+PDF_CACHE_VERSION = "1"
+
+# Rescan at least this often, to count entries other processes stored
+_RESCAN_SECONDS = 300
+# Evict down to this share of the limit, so a full cache isn't rescanned on every store
+_EVICT_TO = 0.9
+
+_evict_lock = threading.Lock()
+_usage_lock = threading.Lock()
+# Cache size in bytes as of the last scan plus what this process stored since; None before the first scan
+_usage_bytes: Optional[int] = None
+_scanned_at = 0.0
+
+
+def cache_key(latex: str) -> str:
+    return hashlib.sha256(f"{PDF_CACHE_VERSION}\n{latex}".encode("utf-8")).hexdigest()
+
+
+def _entry_path(key: str) -> Path:
+    return PDF_CACHE_DIR / key[:2] / f"{key}.pdf"
+
+
+def _link_or_copy(src: Path, dst: Path) -> None:
+    """
+    Atomically make `dst` refer to the contents of `src`. The two may end up
+    sharing an inode, so every writer of either path must replace it (write a
+    temp file and os.replace it into place), never write into it.
+    """
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    # Raises FileNotFoundError for a missing src, which fetch reports as a miss
+    if dst.exists() and os.path.samefile(src, dst):
+        return
+    staged = dst.with_name(f".{dst.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        try:
+            os.link(src, staged)
+        except OSError:
+            shutil.copyfile(src, staged)
+        os.replace(staged, dst)
+    finally:
+        # Left behind if anything above failed
+        try:
+            os.unlink(staged)
+        except FileNotFoundError:
+            pass
+
+
+def fetch(key: str, output_pdf: str) -> bool:
+    """Place the cached PDF for `key` at `output_pdf`; False on a miss."""
+    if not PDF_CACHE_ENABLED:
+        return False
+    entry = _entry_path(key)
+    try:
+        _link_or_copy(entry, Path(output_pdf))
+        os.utime(entry)
+    except FileNotFoundError:
+        return False
+    except OSError as e:
+        logger.warning(f"PDF cache read failed for {key[:12]}: {e}")
+        return False
+    return True
+
+
+def store(key: str, pdf_path: str) -> None:
+    """Add a freshly compiled PDF to the cache and evict down to PDF_CACHE_MAX_MB."""
+    if not PDF_CACHE_ENABLED:
+        return
+    entry = _entry_path(key)
+    try:
+        _link_or_copy(Path(pdf_path), entry)
+        size = entry.stat().st_size
+    except OSError as e:
+        logger.warning(f"PDF cache write failed for {key[:12]}: {e}")
+        return
+    if _add_usage(size):
+        evict()
+
+
+def _add_usage(size: int) -> bool:
+    """Count a stored entry; True when the cache needs a scan (over the limit, or the last scan is stale)."""
+    global _usage_bytes
+    with _usage_lock:
+        if _usage_bytes is None or time.monotonic() - _scanned_at > _RESCAN_SECONDS:
+            return True
+        _usage_bytes += size
+        return _usage_bytes > PDF_CACHE_MAX_BYTES
+
+
+def evict(max_bytes: Optional[int] = None) -> int:
+    """
+    Scan the cache and, if it exceeds `max_bytes`, remove least recently used
+    entries until it is back under 90% of it; returns entries removed. Resets
+    the running size total.
+    """
+    max_bytes = PDF_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    with _evict_lock:
+        entries = []
+        total = 0
+        for path in PDF_CACHE_DIR.glob("*/*.pdf"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+        if total <= max_bytes:
+            _set_usage(total)
+            return 0
+
+        removed = 0
+        started = time.perf_counter()
+        for _, size, path in sorted(entries):
+            if total <= max_bytes * _EVICT_TO:
+                break
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        _set_usage(total)
+        logger.info(f"PDF cache evicted {removed} entries in {time.perf_counter() - started:.3f}s")
+        return removed
+
+
+def _set_usage(total: int) -> None:
+    global _usage_bytes, _scanned_at
+    with _usage_lock:
+        _usage_bytes = total
+        _scanned_at = time.monotonic()
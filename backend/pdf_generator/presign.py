@@ -0,0 +1,138 @@
+"""
+Cached presigned download links for stored resume files.
+
+A page of applications links every tailored resume and cover letter, and
+signing each link on every render repeats the same work for URLs that are
+still valid. Links are instead cached per (bucket, key, disposition,
+expiration) and handed out again until they come within
+PRESIGN_REFRESH_MARGIN_SECONDS of expiring (at most half their lifetime), so
+a browser always gets a link with at least that long left to use it. Signing
+happens locally with the shared S3 client; `presigned_urls` looks up a whole
+page of s3:// URLs under one lock and signs only the misses.
+
+The cache holds the PRESIGN_CACHE_SIZE most recently used links per process.
+Links are signed with the process's static credentials, so they stay valid
+for their full expiration; temporary credentials that expire sooner would
+cut them short.
+
+Configure via env vars: PRESIGN_EXPIRATION_SECONDS, PRESIGN_REFRESH_MARGIN_SECONDS,
+PRESIGN_CACHE_SIZE.
+"""
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from .s3_utils import generate_presigned_url, parse_s3_url
+
+logger = logging.getLogger(__name__)
+
+PRESIGN_EXPIRATION_SECONDS = int(os.getenv("PRESIGN_EXPIRATION_SECONDS", "3600"))
+PRESIGN_REFRESH_MARGIN_SECONDS = int(os.getenv("PRESIGN_REFRESH_MARGIN_SECONDS", "300"))
+PRESIGN_CACHE_SIZE = max(1, int(os.getenv("PRESIGN_CACHE_SIZE", "4096")))
+
+# (bucket, key, download, expiration)
+CacheKey = Tuple[str, str, bool, int]
+
+
+class PresignCache:
+    """A bounded LRU of presigned URLs, each reused until it nears expiry."""
+
+    def __init__(self, max_entries: int = PRESIGN_CACHE_SIZE,
+                 refresh_margin: int = PRESIGN_REFRESH_MARGIN_SECONDS,
+                 sign: Callable[..., Optional[str]] = generate_presigned_url,
+                 clock: Callable[[], float] = time.time):
+        self.max_entries = max_entries
+        self.refresh_margin = refresh_margin
+        self._sign = sign
+        self._clock = clock
+        self._lock = threading.Lock()
+        # Key -> (url, unix time the url expires)
+        self._entries: "OrderedDict[CacheKey, Tuple[str, float]]" = OrderedDict()
+        self._counts = {"hits": 0, "signed": 0, "failed": 0}
+
+    def get(self, bucket: str, key: str, download: bool = False,
+            expiration: int = PRESIGN_EXPIRATION_SECONDS) -> Optional[str]:
+        return self.get_many(bucket, [key], download, expiration).get(key)
+
+    def get_many(self, bucket: str, keys: Iterable[str], download: bool = False,
+                 expiration: int = PRESIGN_EXPIRATION_SECONDS) -> Dict[str, str]:
+        """Presigned URLs for `keys` in one bucket; keys that could not be signed are left out."""
+        margin = min(self.refresh_margin, expiration // 2)
+        now = self._clock()
+        urls: Dict[str, str] = {}
+        missing = []
+        with self._lock:
+            for key in dict.fromkeys(keys):
+                cache_key = (bucket, key, download, expiration)
+                entry = self._entries.get(cache_key)
+                if entry is not None and entry[1] - now > margin:
+                    urls[key] = entry[0]
+                    self._entries.move_to_end(cache_key)
+                else:
+                    missing.append(key)
+            self._counts["hits"] += len(urls)
+        if not missing:
+            return urls
+
+        # Sign outside the lock; the expiry is counted from before signing, so it is never overstated
+        signed = {}
+        for key in missing:
+            url = self._sign(bucket, key, expiration=expiration, download=download)
+            if url:
+                signed[key] = url
+        with self._lock:
+            for key, url in signed.items():
+                cache_key = (bucket, key, download, expiration)
+                self._entries[cache_key] = (url, now + expiration)
+                self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._counts["signed"] += len(signed)
+            self._counts["failed"] += len(missing) - len(signed)
+        urls.update(signed)
+        return urls
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self._counts, "entries": len(self._entries)}
+
+
+_cache = PresignCache()
+
+
+def _reset_after_fork():
+    # The lock may have been held by a parent thread at fork; cached URLs stay valid but are dropped with it
+    global _cache
+    _cache = PresignCache()
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def presigned_urls(s3_urls: Iterable[Optional[str]], download: bool = False,
+                   expiration: int = PRESIGN_EXPIRATION_SECONDS) -> Dict[str, str]:
+    """
+    Presigned https URLs for a batch of s3:// URLs, keyed by the s3:// URL.
+    Empty and unparseable URLs, and those that could not be signed, are left out.
+    """
+    by_bucket: Dict[str, Dict[str, str]] = {}
+    for s3_url in s3_urls:
+        bucket, key = parse_s3_url(s3_url)
+        if bucket and key:
+            by_bucket.setdefault(bucket, {})[key] = s3_url
+    urls = {}
+    for bucket, keys in by_bucket.items():
+        for key, url in _cache.get_many(bucket, keys, download, expiration).items():
+            urls[keys[key]] = url
+    return urls
+
+
+def presigned_url(s3_url: Optional[str], download: bool = False,
+                  expiration: int = PRESIGN_EXPIRATION_SECONDS) -> Optional[str]:
+    return presigned_urls([s3_url], download, expiration).get(s3_url)
+
+
+def stats() -> Dict[str, int]:
+    return _cache.stats()
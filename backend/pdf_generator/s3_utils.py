@@ -1,25 +1,54 @@
+"""
+S3 helpers for generated resumes.
+
+All calls share one lazily created client (boto3 clients are thread-safe), so
+uploads reuse pooled HTTPS connections instead of paying for a new client,
+TLS handshake and a list_buckets round trip each time. Connectivity is checked
+once by `probe_s3` at startup rather than on every call.
+
+S3_ENDPOINT_URL points the client at an S3-compatible stand-in such as MinIO
+or a moto server (path-style addressing is used then).
+
+Configure via env vars: AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY, AWS_REGION,
+S3_ENDPOINT_URL, S3_MAX_POOL_CONNECTIONS, S3_MAX_ATTEMPTS, S3_CONNECT_TIMEOUT_SECONDS,
+S3_READ_TIMEOUT_SECONDS.
+"""
 import os
+import time
+import threading
 import boto3
-from botocore.exceptions import ClientError
+from boto3.exceptions import S3UploadFailedError
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+from botocore.exceptions import BotoCoreError, ClientError
 import logging
 
 logger = logging.getLogger(__name__)
 # Set logger level to DEBUG for detailed information
 logger.setLevel(logging.DEBUG)
 
-def get_s3_client():
-    """
-    Create and return an S3 client using AWS credentials from environment variables.
-    
-    Returns:
-        boto3.client: Configured S3 client
-    """
+# Connections kept open per client; tailoring uploads run in several pipeline and worker threads
+S3_MAX_POOL_CONNECTIONS = int(os.getenv("S3_MAX_POOL_CONNECTIONS", "32"))
+# Total attempts per request, with botocore's "standard" retry mode (backoff, throttling-aware)
+S3_MAX_ATTEMPTS = int(os.getenv("S3_MAX_ATTEMPTS", "5"))
+S3_CONNECT_TIMEOUT_SECONDS = float(os.getenv("S3_CONNECT_TIMEOUT_SECONDS", "5"))
+S3_READ_TIMEOUT_SECONDS = float(os.getenv("S3_READ_TIMEOUT_SECONDS", "30"))
+S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL") or None
+
+# Resume files are a few KB: upload in the calling thread instead of starting a transfer thread pool
+_TRANSFER_CONFIG = TransferConfig(use_threads=False)
+
+_client = None
+_client_lock = threading.Lock()
+# Result of the last probe_s3 call, reported by /health
+_probe_status = None
+
+def _create_s3_client():
     aws_access_key = os.getenv("AWS_ACCESS_KEY_ID")
     aws_secret_key = os.getenv("AWS_SECRET_ACCESS_KEY")
     aws_region = os.getenv("AWS_REGION", "us-east-2")
-    s3_bucket = os.getenv("S3_BUCKET_NAME")
     
-    logger.debug(f"AWS Config - Region: {aws_region}, Bucket: {s3_bucket}")
+    logger.debug(f"AWS Config - Region: {aws_region}, Bucket: {os.getenv('S3_BUCKET_NAME')}")
     logger.debug(f"AWS Access Key ID exists: {bool(aws_access_key)}")
     logger.debug(f"AWS Secret Access Key exists: {bool(aws_secret_key)}")
     
@@ -27,20 +56,85 @@ def get_s3_client():
         logger.error("AWS credentials not found in environment variables")
         raise ValueError("AWS credentials not found in environment variables")
     
+    config = Config(
+        region_name=aws_region,
+        # Regional endpoint and SigV4, which presigned URLs need
+        signature_version='s3v4',
+        # Local stand-ins serve buckets by path rather than by subdomain
+        s3={'addressing_style': 'path' if S3_ENDPOINT_URL else 'virtual'},
+        max_pool_connections=S3_MAX_POOL_CONNECTIONS,
+        retries={'total_max_attempts': S3_MAX_ATTEMPTS, 'mode': 'standard'},
+        connect_timeout=S3_CONNECT_TIMEOUT_SECONDS,
+        read_timeout=S3_READ_TIMEOUT_SECONDS,
+        tcp_keepalive=True
+    )
+    # A session per client: boto3's default session is not thread-safe to create clients from
+    session = boto3.session.Session()
+    return session.client(
+        's3',
+        aws_access_key_id=aws_access_key,
+        aws_secret_access_key=aws_secret_key,
+        region_name=aws_region,
+        endpoint_url=S3_ENDPOINT_URL,
+        config=config
+    )
+
+def _reset_after_fork():
+    # A forked worker must not share the parent's pooled sockets
+    global _client, _client_lock
+    _client = None
+    _client_lock = threading.Lock()
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+def get_s3_client():
+    """
+    Return the shared S3 client, creating it on first use.
+    
+    Returns:
+        boto3.client: Configured S3 client
+        
+    Raises:
+        ValueError: If AWS credentials are not set
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = _create_s3_client()
+                logger.debug("Created shared S3 client")
+    return _client
+
+def probe_s3(bucket_name=None):
+    """
+    Check once (e.g. at startup) that the credentials can reach the bucket.
+    Uses head_bucket, which needs access to this bucket only, not list_buckets.
+    
+    Args:
+        bucket_name (str, optional): Bucket to check. Defaults to S3_BUCKET_NAME.
+        
+    Returns:
+        bool: True if the bucket is reachable, False otherwise (or if S3 is not configured)
+    """
+    global _probe_status
+    bucket_name = bucket_name or os.getenv("S3_BUCKET_NAME")
+    if not bucket_name:
+        return False
+    started = time.perf_counter()
     try:
-        s3_client = boto3.client(
-            's3',
-            aws_access_key_id=aws_access_key,
-            aws_secret_access_key=aws_secret_key,
-            region_name=aws_region
-        )
-        # Test if client works
-        s3_client.list_buckets()
-        logger.debug("Successfully created S3 client and connected to AWS")
-        return s3_client
-    except Exception as e:
-        logger.error(f"Error creating S3 client: {str(e)}")
-        raise
+        get_s3_client().head_bucket(Bucket=bucket_name)
+    except (ValueError, ClientError, BotoCoreError) as e:
+        logger.error(f"S3 probe failed for bucket {bucket_name}: {str(e)}")
+        _probe_status = {"bucket": bucket_name, "ok": False, "error": str(e)}
+        return False
+    elapsed = time.perf_counter() - started
+    logger.info(f"S3 bucket {bucket_name} reachable ({elapsed * 1000:.0f} ms)")
+    _probe_status = {"bucket": bucket_name, "ok": True, "latency_ms": round(elapsed * 1000)}
+    return True
+
+def probe_status():
+    """Result of the last probe_s3 call, or None if S3 has not been probed."""
+    return _probe_status
 
 def upload_file_to_s3(file_path, bucket_name, object_name=None, content_type=None):
     """
@@ -69,14 +163,15 @@ def upload_file_to_s3(file_path, bucket_name, object_name=None, content_type=Non
     
     try:
         logger.debug(f"About to upload file: {file_path} to bucket: {bucket_name}, object: {object_name}")
-        s3_client.upload_file(file_path, bucket_name, object_name, ExtraArgs=extra_args)
+        s3_client.upload_file(file_path, bucket_name, object_name, ExtraArgs=extra_args, Config=_TRANSFER_CONFIG)
         logger.info(f"File {file_path} uploaded to {bucket_name}/{object_name}")
         
         # Generate S3 URL
         s3_url = f"s3://{bucket_name}/{object_name}"
         logger.debug(f"Generated S3 URL: {s3_url}")
         return s3_url
-    except ClientError as e:
+    except (ClientError, S3UploadFailedError) as e:
+        # upload_file wraps a rejected PutObject in S3UploadFailedError rather than a ClientError
         logger.error(f"Error uploading file to S3: {str(e)}")
         return None
 
@@ -93,33 +188,17 @@ def generate_presigned_url(bucket_name, object_name, expiration=3600, download=F
     Returns:
         str: Presigned URL or None if generation failed
     """
-    # Get the region from environment variables
-    aws_region = os.getenv("AWS_REGION", "us-east-2")
-    
     # Set response headers based on download parameter
     response_headers = {}
     if download:
         filename = os.path.basename(object_name)
         response_headers['ResponseContentDisposition'] = f'attachment; filename="{filename}"'
     
-    # Use specific config to ensure regional endpoint and proper signing
-    config = boto3.session.Config(
-        signature_version='s3v4',
-        region_name=aws_region,
-        s3={'addressing_style': 'virtual'}  # Use virtual addressing style
-    )
-    
     try:
-        # Create a client with explicit config
-        s3_client = boto3.client(
-            's3',
-            region_name=aws_region,
-            aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
-            aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
-            config=config
-        )
+        # Signing is local: the shared client already uses the regional endpoint and SigV4
+        s3_client = get_s3_client()
         
-        logger.debug(f"Generating presigned URL for {bucket_name}/{object_name} in region {aws_region}")
+        logger.debug(f"Generating presigned URL for {bucket_name}/{object_name}")
         
         # Generate presigned URL
         url = s3_client.generate_presigned_url(
@@ -134,7 +213,7 @@ def generate_presigned_url(bucket_name, object_name, expiration=3600, download=F
         
         logger.debug(f"Generated presigned URL: {url}")
         return url
-    except ClientError as e:
+    except (ClientError, ValueError) as e:
         logger.error(f"Error generating presigned URL: {str(e)}")
         return None
 
@@ -157,7 +236,7 @@ def download_file_from_s3(bucket_name, object_name, destination_path):
         os.makedirs(os.path.dirname(destination_path), exist_ok=True)
         
         # Download the file
-        s3_client.download_file(bucket_name, object_name, destination_path)
+        s3_client.download_file(bucket_name, object_name, destination_path, Config=_TRANSFER_CONFIG)
         logger.info(f"Downloaded {bucket_name}/{object_name} to {destination_path}")
         return True
     except ClientError as e:
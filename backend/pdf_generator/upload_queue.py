@@ -0,0 +1,320 @@
+"""
+Background S3 uploads for generated resume artifacts.
+
+Uploading the PDF, .tex and .json of a tailored resume one after another
+used to sit on the tailoring response path. `upload` instead hands each file
+to a pool of S3_UPLOAD_WORKERS threads behind a bounded queue and returns at
+once; the response carries local paths and the S3 URLs arrive later:
+
+- listeners registered with `add_listener(callback)` are called with
+  (file_path, s3_url) after each successful upload (the app uses this to
+  backfill Application.tailored_resume_s3_url)
+- `uploaded_url(file_path)` returns the URL of a recent upload, for callers
+  that store a path after its upload may already have finished
+
+A failed upload is retried up to S3_UPLOAD_MAX_ATTEMPTS times with
+exponential backoff and jitter, on top of botocore's own request retries.
+When the queue is full the file is uploaded inline, so a backlog slows
+tailoring down instead of dropping files. The queue lives in memory: uploads
+still pending when a process is killed are lost (the local files remain),
+so shutdown paths call `drain`.
+
+`python -m pdf_generator.upload_queue` checks the retry path against a
+stubbed S3 client.
+
+Configure via env vars: S3_UPLOAD_ASYNC, S3_UPLOAD_WORKERS, S3_UPLOAD_QUEUE_SIZE,
+S3_UPLOAD_MAX_ATTEMPTS, S3_UPLOAD_BACKOFF_SECONDS.
+"""
+import os
+import sys
+import time
+import queue
+import random
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+import boto3
+from boto3.exceptions import Boto3Error
+from botocore.config import Config
+from botocore.exceptions import BotoCoreError, ClientError
+
+from .s3_utils import upload_file_to_s3
+
+logger = logging.getLogger(__name__)
+
+S3_UPLOAD_ASYNC = os.getenv("S3_UPLOAD_ASYNC", "true").lower() == "true"
+S3_UPLOAD_WORKERS = max(1, int(os.getenv("S3_UPLOAD_WORKERS", "4")))
+S3_UPLOAD_QUEUE_SIZE = max(1, int(os.getenv("S3_UPLOAD_QUEUE_SIZE", "256")))
+S3_UPLOAD_MAX_ATTEMPTS = max(1, int(os.getenv("S3_UPLOAD_MAX_ATTEMPTS", "4")))
+S3_UPLOAD_BACKOFF_SECONDS = float(os.getenv("S3_UPLOAD_BACKOFF_SECONDS", "1.0"))
+
+# Completed uploads remembered for uploaded_url
+_RECENT_UPLOADS = 1024
+# How long shutdown paths wait for queued uploads
+SHUTDOWN_DRAIN_SECONDS = 30
+
+Listener = Callable[[str, str], None]
+
+
+@dataclass
+class UploadJob:
+    file_path: str
+    bucket: str
+    object_name: str
+    content_type: Optional[str] = None
+    attempts: int = 0
+
+
+class S3Uploader:
+    """A bounded queue of uploads drained by a pool of daemon threads, started on first use."""
+
+    def __init__(self, workers: int = S3_UPLOAD_WORKERS, queue_size: int = S3_UPLOAD_QUEUE_SIZE,
+                 max_attempts: int = S3_UPLOAD_MAX_ATTEMPTS, backoff_seconds: float = S3_UPLOAD_BACKOFF_SECONDS,
+                 upload: Callable[..., Optional[str]] = upload_file_to_s3):
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self._upload = upload
+        self._queue: "queue.Queue[UploadJob]" = queue.Queue(maxsize=queue_size)
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        self._listeners: List[Listener] = []
+        self._recent: "OrderedDict[str, str]" = OrderedDict()
+        self._counts = {"uploaded": 0, "failed": 0, "retried": 0, "inline": 0}
+
+    def add_listener(self, listener: Listener) -> None:
+        self._listeners.append(listener)
+
+    def submit(self, file_path: str, bucket: str, object_name: str, content_type: Optional[str] = None) -> bool:
+        """Queue an upload; False if the queue is full (upload inline with `upload_now` instead)."""
+        self._start()
+        try:
+            self._queue.put_nowait(UploadJob(file_path, bucket, object_name, content_type))
+        except queue.Full:
+            logger.warning(f"S3 upload queue full ({self._queue.maxsize}); uploading {file_path} inline")
+            return False
+        return True
+
+    def upload_now(self, file_path: str, bucket: str, object_name: str,
+                   content_type: Optional[str] = None) -> Optional[str]:
+        """Upload in the calling thread (one attempt); listeners are notified as for queued uploads."""
+        with self._lock:
+            self._counts["inline"] += 1
+        try:
+            s3_url = self._upload(file_path, bucket, object_name, content_type=content_type)
+        except (ValueError, ClientError, BotoCoreError, Boto3Error, OSError) as e:
+            logger.error(f"S3 upload of {file_path} failed: {e}")
+            return None
+        if s3_url:
+            self._completed(file_path, s3_url)
+        return s3_url
+
+    def uploaded_url(self, file_path: str) -> Optional[str]:
+        with self._lock:
+            return self._recent.get(file_path)
+
+    def pending(self) -> int:
+        return self._queue.unfinished_tasks
+
+    def drain(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every queued upload has finished; False if `timeout` passed first."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self._counts, "pending": self.pending()}
+
+    def _start(self) -> None:
+        if self._threads:
+            return
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f"s3-upload-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _work(self) -> None:
+        while True:
+            job = self._queue.get()
+            try:
+                self._run(job)
+            except Exception as e:
+                logger.error(f"S3 upload of {job.file_path} failed unexpectedly: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _run(self, job: UploadJob) -> None:
+        while True:
+            job.attempts += 1
+            try:
+                s3_url = self._upload(job.file_path, job.bucket, job.object_name, content_type=job.content_type)
+            except ValueError as e:
+                # Missing credentials: retrying cannot help
+                logger.error(f"S3 upload of {job.file_path} failed: {e}")
+                s3_url = None
+                job.attempts = self.max_attempts
+            except (ClientError, BotoCoreError, Boto3Error, OSError) as e:
+                logger.warning(f"S3 upload of {job.file_path} failed (attempt {job.attempts}): {e}")
+                s3_url = None
+            if s3_url:
+                self._completed(job.file_path, s3_url)
+                return
+            if job.attempts >= self.max_attempts:
+                with self._lock:
+                    self._counts["failed"] += 1
+                logger.error(f"Giving up on S3 upload of {job.file_path} after {job.attempts} attempt(s)")
+                return
+            with self._lock:
+                self._counts["retried"] += 1
+            # Exponential backoff with full jitter
+            time.sleep(random.uniform(0, self.backoff_seconds * 2 ** (job.attempts - 1)))
+
+    def _completed(self, file_path: str, s3_url: str) -> None:
+        # Recorded before listeners run, so a caller that stores its row and then checks
+        # uploaded_url sees either the URL or the listener's update
+        with self._lock:
+            self._counts["uploaded"] += 1
+            self._recent[file_path] = s3_url
+            self._recent.move_to_end(file_path)
+            while len(self._recent) > _RECENT_UPLOADS:
+                self._recent.popitem(last=False)
+        for listener in self._listeners:
+            try:
+                listener(file_path, s3_url)
+            except Exception as e:
+                logger.error(f"S3 upload listener failed for {file_path}: {e}")
+
+
+_uploader: Optional[S3Uploader] = None
+_uploader_lock = threading.Lock()
+_listeners: List[Listener] = []
+
+
+def get_uploader() -> S3Uploader:
+    """The process-wide uploader, created on first use."""
+    global _uploader
+    if _uploader is None:
+        with _uploader_lock:
+            if _uploader is None:
+                uploader = S3Uploader()
+                for listener in _listeners:
+                    uploader.add_listener(listener)
+                _uploader = uploader
+    return _uploader
+
+
+def _reset_after_fork():
+    # Worker threads do not survive fork; a child starts its own pool on first use
+    global _uploader, _uploader_lock
+    _uploader = None
+    _uploader_lock = threading.Lock()
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def add_listener(listener: Listener) -> None:
+    """Call `listener(file_path, s3_url)` after every successful upload, in this and forked processes."""
+    _listeners.append(listener)
+    if _uploader is not None:
+        _uploader.add_listener(listener)
+
+
+def upload(file_path: str, bucket: str, object_name: str,
+           content_type: Optional[str] = None) -> Tuple[bool, Optional[str]]:
+    """
+    Upload a file to S3, in the background when S3_UPLOAD_ASYNC is on.
+    Returns (queued, s3_url): (True, None) once queued; otherwise the file was
+    uploaded inline (async off or queue full) and s3_url is None on failure.
+    """
+    uploader = get_uploader()
+    if S3_UPLOAD_ASYNC and uploader.submit(file_path, bucket, object_name, content_type):
+        return True, None
+    return False, uploader.upload_now(file_path, bucket, object_name, content_type)
+
+
+def uploaded_url(file_path: str) -> Optional[str]:
+    return _uploader.uploaded_url(file_path) if _uploader is not None else None
+
+
+def drain(timeout: Optional[float] = None) -> bool:
+    return _uploader.drain(timeout) if _uploader is not None else True
+
+
+def stats() -> Optional[Dict[str, int]]:
+    return _uploader.stats() if _uploader is not None else None
+
+
+def check(max_attempts: int = 3) -> bool:
+    """
+    Run the uploader against a stubbed S3 client (botocore's Stubber, no network):
+    an upload S3 keeps rejecting is retried and then counted as failed, one that
+    fails once is retried and backfilled, and a failed inline upload returns None.
+    """
+    import tempfile
+    from botocore.stub import Stubber
+    from . import s3_utils
+
+    client = boto3.session.Session().client(
+        "s3", region_name="us-east-1", aws_access_key_id="check", aws_secret_access_key="check",
+        # One request per attempt, so every retry below is the uploader's own
+        config=Config(retries={"total_max_attempts": 1})
+    )
+    stubber = Stubber(client)
+    previous_client, s3_utils._client = s3_utils._client, client
+    fd, file_path = tempfile.mkstemp(suffix=".pdf")
+    os.write(fd, b"%PDF-1.4 check")
+    os.close(fd)
+    results = []
+
+    def expect(name: str, ok: bool, detail: object) -> None:
+        print(f"{'ok  ' if ok else 'FAIL'} {name}: {detail}")
+        results.append(ok)
+
+    try:
+        with stubber:
+            uploader = S3Uploader(workers=1, max_attempts=max_attempts, backoff_seconds=0.01)
+            backfilled = []
+            uploader.add_listener(lambda path, url: backfilled.append(url))
+
+            for _ in range(max_attempts):
+                stubber.add_client_error("put_object", "InternalError", http_status_code=500)
+            uploader.submit(file_path, "check-bucket", "failing.pdf", "application/pdf")
+            uploader.drain(10)
+            stats = uploader.stats()
+            expect("rejected upload retried, then failed",
+                   stats["retried"] == max_attempts - 1 and stats["failed"] == 1 and not backfilled, stats)
+
+            stubber.add_client_error("put_object", "SlowDown", http_status_code=503)
+            stubber.add_response("put_object", {})
+            uploader.submit(file_path, "check-bucket", "flaky.pdf", "application/pdf")
+            uploader.drain(10)
+            stats = uploader.stats()
+            expect("flaky upload retried, then backfilled",
+                   stats["uploaded"] == 1 and backfilled == ["s3://check-bucket/flaky.pdf"], backfilled)
+
+            stubber.add_client_error("put_object", "AccessDenied", http_status_code=403)
+            s3_url = uploader.upload_now(file_path, "check-bucket", "inline.pdf", "application/pdf")
+            expect("failed inline upload returns None", s3_url is None, s3_url)
+            stubber.assert_no_pending_responses()
+    finally:
+        s3_utils._client = previous_client
+        os.unlink(file_path)
+    return all(results)
+
+
+if __name__ == "__main__":
+    # s3_utils logs every attempt at DEBUG; the check reports its own results
+    logging.disable(logging.ERROR)
+    sys.exit(0 if check() else 1)
@@ -0,0 +1,25 @@
+"""
+Background task worker.
+Run alongside the API to process queued tasks (e.g. resume tailoring):
+
+    python worker.py [--concurrency N]
+"""
+import argparse
+import logging
+from dotenv import load_dotenv
+
+load_dotenv(".env")
+
+from app.services.task_worker import TASK_WORKER_CONCURRENCY, main
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(processName)s - %(levelname)s - %(message)s'
+)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run background task worker processes.")
+    parser.add_argument("--concurrency", type=int, default=TASK_WORKER_CONCURRENCY,
+                        help="Number of worker processes (default: TASK_WORKER_CONCURRENCY)")
+    args = parser.parse_args()
+    main(max(1, args.concurrency))